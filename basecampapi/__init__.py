@@ -1,6 +1,32 @@
-from .basecamp import Basecamp
-from .endpoints.camprife import Campfire
-from .endpoints.messageboard import MessageBoard
-from .endpoints.attachments import Attachments
-from .cli import app
-from .config import BasecampConfig
\ No newline at end of file
+# Public names are imported on first use, so that `import basecampapi` and the CLI start quickly.
+_EXPORTS = {
+    "Basecamp": ".basecamp",
+    "Campfire": ".endpoints.camprife",
+    "MessageBoard": ".endpoints.messageboard",
+    "Attachments": ".endpoints.attachments",
+    "Recordings": ".endpoints.recordings",
+    "app": ".cli",
+    "BasecampConfig": ".config",
+    "Mirror": ".mirror",
+    "Outbox": ".outbox",
+    "AsyncBasecamp": ".aio",
+    "AsyncCampfire": ".aio",
+    "AsyncMessageBoard": ".aio",
+    "AsyncAttachments": ".aio",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
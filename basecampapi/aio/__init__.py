@@ -0,0 +1,4 @@
+from .basecamp import AsyncBasecamp
+from .campfire import AsyncCampfire, follow_many
+from .messageboard import AsyncMessageBoard
+from .attachments import AsyncAttachments
@@ -0,0 +1,82 @@
+import asyncio
+import os
+
+from ..models import Attachment
+from ..uploads import SNIFF_SIZE, file_mime, sniff_mime
+from .basecamp import AsyncBasecamp, _raise_for_status
+
+
+class AsyncAttachments:
+
+    def __init__(self, session: AsyncBasecamp, chunk_size: int = 64 * 1024):
+        '''
+        Uploads files to Basecamp from asyncio code and keeps their sgids in AsyncAttachments().files.
+
+        Parameters:
+            session (AsyncBasecamp): The session used to send requests.
+            chunk_size (int): Number of bytes read from disk at a time when uploading files.
+        '''
+        self.session = session
+        self.chunk_size = chunk_size
+        self.files = {}
+
+    def attachment(self, filename) -> Attachment:
+        '''
+        Returns the upload saved in AsyncAttachments().files under filename as an Attachment model.
+        '''
+        return Attachment.from_dict(self.files[filename])
+
+    async def _read_chunks(self, path: str):
+        loop = asyncio.get_running_loop()
+        with open(path, "rb") as file_bytes:
+            while True:
+                chunk = await loop.run_in_executor(None, file_bytes.read, self.chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    async def _upload(self, name: str, filename, content, file_size: int, mime: str):
+        headers = {
+            "Content-Type": mime,
+            "Content-Length": str(file_size)
+        }
+        response = await self.session.request("POST", f"{self.session.base_url}/attachments.json", params={"name": name}, headers=headers, content=content)
+        _raise_for_status(response)
+        sgid = response.json()['attachable_sgid']
+
+        self.files[filename] = {
+            "filename": filename,
+            "file_size": str(file_size),
+            "content-type": mime,
+            "sgid": sgid
+        }
+        return sgid
+
+    async def upload_file(self, path: str, filename) -> str:
+        '''
+        Uploads a file to Basecamp's servers without blocking the event loop and saves the file sgid in AsyncAttachments().files.
+
+        Parameters:
+            path (str): Path to file you wish to upload.
+            filename: Name of your file.
+
+        Returns:
+            str: The attachable sgid of the uploaded file.
+        '''
+        file_size = os.path.getsize(path)
+        mime = await asyncio.get_running_loop().run_in_executor(None, file_mime, path)
+        return await self._upload(path, filename, self._read_chunks(path), file_size, mime)
+
+    async def upload_from_bytes(self, variable, title) -> str:
+        '''
+        Uploads a file from bytes to Basecamp's servers and saves the file sgid in AsyncAttachments().files.
+
+        Parameters:
+            variable (bytes): Variable containing the bytes.
+            title: Name of your upload.
+
+        Returns:
+            str: The attachable sgid of the uploaded file.
+        '''
+        mime = sniff_mime(memoryview(variable).cast("B")[:SNIFF_SIZE], title)
+        return await self._upload(title, title, variable, len(variable), mime)
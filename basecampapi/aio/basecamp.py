@@ -0,0 +1,375 @@
+import asyncio
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Union
+
+from ..basecamp import API_URL, LAUNCHPAD_URL
+from ..metrics import RequestEvent, emit, endpoint_name
+from ..models import response_json
+from ..pagination import next_page_url
+from ..ratelimit import TokenBucket, retry_delay
+from ..singleflight import AsyncSingleFlight, request_key
+from ..tokens import DEFAULT_EXPIRES_IN, MemoryTokenStore, is_fresh, token_key
+from ..transport import _CACHED_HEADERS
+
+if TYPE_CHECKING:
+    from ..config import BasecampConfig
+
+
+def _raise_for_status(response):
+    if not response.is_success:
+        raise Exception(f"Status code: {response.status_code}. {response.reason_phrase}. Error text: {response.text}.")
+
+
+# Per event loop, one asyncio.Lock per token store and key, so that at most one task of a loop waits for the
+# store's lock at a time.
+_STORE_LOCKS = weakref.WeakKeyDictionary()
+
+
+@asynccontextmanager
+async def _store_lock(token_store, key: str):
+    # TokenStore.lock() blocks, so it is held by a thread of its own for as long as the block runs. Threads of the
+    # shared executor are not used: waiting tasks could occupy all of them and leave none to release the lock.
+    loop = asyncio.get_running_loop()
+    locks = _STORE_LOCKS.setdefault(loop, {})
+    async with locks.setdefault((token_store, key), asyncio.Lock()):
+        acquired = loop.create_future()
+        release = threading.Event()
+
+        def report(error=None):
+            try:
+                loop.call_soon_threadsafe(lambda: acquired.done() or (acquired.set_exception(error) if error else acquired.set_result(None)))
+            except RuntimeError:
+                # The loop was closed meanwhile.
+                pass
+
+        def hold():
+            try:
+                with token_store.lock(key):
+                    report()
+                    release.wait()
+            except Exception as exc:
+                report(exc)
+
+        threading.Thread(target=hold, name="basecampapi-token-lock", daemon=True).start()
+        try:
+            # When the task is cancelled while waiting, the thread gives the lock back as soon as it gets it.
+            await acquired
+            yield
+        finally:
+            release.set()
+
+
+class AsyncBasecamp:
+
+    def __init__(self, credentials: Union[dict, "BasecampConfig"], verification_code='Not available!', pool_size: int = 100, concurrency: int = 50, max_retries: int = 3, client=None, cache=None, rate_limiter=None, backoff_factor: float = 0.5, token_store=None, refresh_margin: float = 24 * 60 * 60, hooks=None, api_url: str = API_URL, launchpad_url: str = LAUNCHPAD_URL, single_flight: bool = True, memo_ttl: float = 0.0):
+        '''
+        Initializes an asyncio Basecamp session. Authentication happens on the first request, or explicitly with
+        `await session.authenticate()`. Use it as an async context manager so the connection pool is closed at the end.
+
+        Parameters:
+            credentials (dict): A dictionary containing account_id, client_id, client_secret, redirect_uri and refresh_token.
+            verification_code (str): Code from the authorization redirect, needed only when refresh_token is missing.
+            pool_size (int): Maximum number of connections kept open to Basecamp.
+            concurrency (int): Maximum number of requests in flight at the same time.
+            max_retries (int): Number of retries for failed connections, 429 and 5xx responses.
+            client (httpx.AsyncClient): Optional preconfigured client to use instead of creating one.
+            cache (ResponseCache): Optional MemoryCache or SQLiteCache; GET requests then revalidate stored responses with ETags.
+            rate_limiter (TokenBucket): Limiter that paces requests. Defaults to Basecamp's budget of 50 requests per 10 seconds.
+            backoff_factor (float): Base delay in seconds for the exponential backoff between retries.
+            token_store (TokenStore): Where access tokens are cached. Pass a FileTokenStore to reuse tokens across processes.
+            refresh_margin (float): Access tokens are renewed this many seconds before they expire.
+            hooks (list): Callables called with a RequestEvent after every request, e.g. Metrics or LoggingHook objects.
+            api_url (str): Root URL of the Basecamp 3 API. Change it only to talk to a proxy or a test server.
+            launchpad_url (str): Root URL of the 37signals authorization server.
+            single_flight (bool): Identical GET requests sent at the same time from several tasks share one network call.
+            memo_ttl (float): With single_flight, successful GET responses are also reused for this many seconds.
+                Any write made through this session drops them.
+        '''
+        try:
+            import httpx
+        except ImportError:
+            raise ImportError("AsyncBasecamp requires httpx. Install it with: pip install basecampapi[async]")
+
+        if not isinstance(credentials, dict):
+            credentials = credentials.model_dump()
+
+        self.credentials = dict(credentials)
+        self.verification_code = verification_code
+        self.base_url = f"{api_url}/{self.credentials['account_id']}"
+        self.launchpad_url = launchpad_url
+        self.concurrency = concurrency
+        self.cache = cache
+        self.rate_limiter = rate_limiter if rate_limiter is not None else TokenBucket(capacity=50, period=10)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.token_store = token_store if token_store is not None else MemoryTokenStore()
+        self.refresh_margin = refresh_margin
+        self.token_expires_at = 0
+        self.hooks = list(hooks or ())
+        self.pool_size = pool_size
+        self.in_flight = 0
+        self.single_flight = AsyncSingleFlight(ttl=memo_ttl) if single_flight else None
+
+        if client is None:
+            client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+                transport=httpx.AsyncHTTPTransport(retries=max_retries),
+            )
+        self.client = client
+        self.__semaphore = None
+        self.__auth_lock = None
+
+    async def __aenter__(self):
+        await self.authenticate()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self):
+        '''
+        Closes the pooled connections held by this session.
+        '''
+        await self.client.aclose()
+
+    async def authenticate(self, rejected_token: str = None):
+        '''
+        Obtains an access token, exchanging the verification code for a refresh token first if necessary.
+        A cached token from the token store is reused while it does not expire within refresh_margin seconds.
+
+        Parameters:
+            rejected_token (str): A token Basecamp answered 401 to. It is replaced even if it has not expired yet.
+        '''
+        if self.__auth_lock is None:
+            self.__auth_lock = asyncio.Lock()
+
+        async with self.__auth_lock:
+            if rejected_token is None and self.token_expires_at - self.refresh_margin > time.time():
+                return
+            if rejected_token is not None and self.credentials.get('access_token') != rejected_token:
+                return
+
+            if 'refresh_token' not in self.credentials:
+                if self.verification_code == 'Not available!':
+                    verification_link = f"{self.launchpad_url}/authorization/new?type=web_server&client_id={self.credentials['client_id']}&redirect_uri={self.credentials['redirect_uri']}"
+                    raise Exception("Access denied. Please use the following url to allow access and get the code from the redirect page's url parameter \"code\", then pass it as verification_code parameter of the AsyncBasecamp object: " + verification_link)
+                verification_url = f"{self.launchpad_url}/authorization/token?type=web_server&client_id={self.credentials['client_id']}&redirect_uri={self.credentials['redirect_uri']}&client_secret={self.credentials['client_secret']}&code={self.verification_code}"
+                response = await self.client.post(verification_url)
+                _raise_for_status(response)
+                self.credentials['refresh_token'] = response.json()["refresh_token"]
+
+            key = token_key(self.credentials)
+            token = self.token_store.load(key)
+            if rejected_token is not None or not is_fresh(token, self.refresh_margin):
+                # Only one session, thread or process refreshes at a time; the others pick up its token from the store.
+                async with _store_lock(self.token_store, key):
+                    token = self.token_store.load(key)
+                    if rejected_token is None:
+                        usable = is_fresh(token, self.refresh_margin)
+                    else:
+                        usable = is_fresh(token, 0) and token['access_token'] != rejected_token
+
+                    if not usable:
+                        access_url = f"{self.launchpad_url}/authorization/token?type=refresh&refresh_token={self.credentials['refresh_token']}&client_id={self.credentials['client_id']}&redirect_uri={self.credentials['redirect_uri']}&client_secret={self.credentials['client_secret']}"
+                        response = await self.client.post(access_url)
+                        _raise_for_status(response)
+                        payload = response.json()
+                        token = {
+                            'access_token': payload['access_token'],
+                            'expires_at': time.time() + payload.get('expires_in', DEFAULT_EXPIRES_IN),
+                        }
+                        self.token_store.save(key, token)
+
+            self.credentials['access_token'] = token['access_token']
+            self.token_expires_at = token['expires_at']
+
+    async def request(self, method: str, url: str, **kwargs):
+        '''
+        Sends an authenticated request, waiting for a free slot when the concurrency limit is reached and for the
+        rate limiter. 429 responses are retried after Retry-After, 5xx responses to idempotent requests with backoff,
+        and a 401 response once with a renewed access token.
+
+        Parameters:
+            method (str): HTTP method, e.g. "GET" or "POST".
+            url (str): Absolute URL of the request.
+            **kwargs: Any additional arguments accepted by httpx.AsyncClient.request.
+
+        Returns:
+            httpx.Response: The response received from the server.
+        '''
+        if self.single_flight is None:
+            return await self._request(method, url, **kwargs)
+        if method.upper() != "GET":
+            try:
+                return await self._request(method, url, **kwargs)
+            finally:
+                self.single_flight.forget()
+        key = request_key(url, kwargs.get("headers"), kwargs.get("params"))
+        return await self.single_flight.do(key, self._request, method, url, memoize=lambda response: response.is_success, **kwargs)
+
+    async def _request(self, method: str, url: str, **kwargs):
+        if self.__semaphore is None:
+            self.__semaphore = asyncio.Semaphore(self.concurrency)
+
+        extra_headers = kwargs.pop('headers', None) or {}
+        content = kwargs.get("content")
+        rewindable = content is None or isinstance(content, (bytes, bytearray, str))
+        reauthenticated = False
+        attempt = 0
+        while True:
+            if self.token_expires_at - self.refresh_margin <= time.time():
+                await self.authenticate()
+            token = self.credentials['access_token']
+            headers = {
+                'Authorization': 'Bearer ' + token,
+                "Content-Type": "application/json",
+            }
+            headers.update(extra_headers)
+
+            wait = self.rate_limiter.reserve()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            if self.hooks:
+                response, report = await self._observed_send(method, url, headers, attempt, **kwargs)
+            else:
+                response, report = await self._send(method, url, headers, **kwargs), None
+
+            if response.status_code == 401 and not reauthenticated and rewindable:
+                if report is not None:
+                    report("retry")
+                await response.aclose()
+                await self.authenticate(rejected_token=token)
+                reauthenticated = True
+                continue
+
+            delay = retry_delay(method, response.status_code, response.headers, attempt, self.max_retries, self.backoff_factor)
+            if delay is None or not rewindable:
+                if report is not None:
+                    report("response")
+                return response
+            if report is not None:
+                report("retry")
+            if response.status_code == 429:
+                self.rate_limiter.pause(delay)
+            await response.aclose()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _observed_send(self, method: str, url: str, headers: dict, attempt: int, **kwargs):
+        self.in_flight += 1
+        in_flight = self.in_flight
+        started_at = time.time()
+        start = time.perf_counter()
+        try:
+            response = await self._send(method, url, headers, **kwargs)
+        except Exception as exc:
+            emit(self.hooks, RequestEvent("error", method, endpoint_name(url), url, None, time.perf_counter() - start, None, 0,
+                                          attempt, False, in_flight, self.pool_size, str(exc), started_at))
+            raise
+        finally:
+            self.in_flight -= 1
+        duration = time.perf_counter() - start
+
+        def report(kind: str):
+            length = response.request.headers.get("Content-Length")
+            event = RequestEvent(kind, method, endpoint_name(url), url, response.status_code, duration,
+                                 int(length) if length is not None else 0, len(response.content) if response.is_closed else None,
+                                 attempt, bool(response.extensions.get("from_cache")), in_flight, self.pool_size, None, started_at)
+            emit(self.hooks, event)
+
+        return response, report
+
+    async def _send(self, method: str, url: str, headers: dict, **kwargs):
+        if self.cache is not None and method == "GET" and not kwargs.get("params"):
+            return await self._conditional_get(url, headers, **kwargs)
+
+        async with self.__semaphore:
+            return await self.client.request(method, url, headers=headers, **kwargs)
+
+    async def _conditional_get(self, url: str, headers: dict, **kwargs):
+        import httpx
+
+        entry = self.cache.get(url)
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+
+        async with self.__semaphore:
+            response = await self.client.request("GET", url, headers=headers, **kwargs)
+
+        if response.status_code == 304 and entry is not None:
+            self.cache.record_not_modified()
+            return httpx.Response(200, content=entry.body, headers=entry.headers, request=response.request, extensions={"from_cache": True})
+        if response.status_code == 200:
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            if etag or last_modified:
+                kept = {name: response.headers[name] for name in _CACHED_HEADERS if name in response.headers}
+                self.cache.set(url, etag, last_modified, response.content, kept)
+        return response
+
+    async def fetch_page(self, url: str):
+        '''
+        Downloads a single page of a paginated list.
+
+        Returns:
+            tuple: The list of records on the page and the URL of the next page (None on the last page).
+        '''
+        response = await self.request("GET", url)
+        _raise_for_status(response)
+        return response_json(response), next_page_url(response.headers.get("Link"))
+
+    async def paginate(self, url: str, limit: int = None, until=None, prefetch: bool = False, model=None, fields=None):
+        '''
+        Lazily iterates over every record of a paginated list, following the Link: rel="next" header.
+
+        Parameters:
+            url (str): URL of the first page.
+            limit (int): Maximum number of records to yield. None yields everything.
+            until (callable): Iteration stops at the first record for which until(record) is true.
+            prefetch (bool): Start downloading the next page while the current one is being consumed.
+            model (type): Optional Record subclass, e.g. Message; records are then yielded as models instead of dicts.
+            fields (iterable): With a model, the names of the fields to keep.
+        '''
+        if limit is not None and limit <= 0:
+            return
+        count = 0
+        pending = self.fetch_page(url)
+        try:
+            while pending is not None:
+                records, next_url = await pending
+                pending = None
+                if next_url is not None:
+                    pending = asyncio.ensure_future(self.fetch_page(next_url)) if prefetch else self.fetch_page(next_url)
+                if model is not None:
+                    records = [model.from_dict(record, fields) for record in records]
+                for record in records:
+                    if until is not None and until(record):
+                        return
+                    yield record
+                    count += 1
+                    if limit is not None and count >= limit:
+                        return
+        finally:
+            if pending is not None:
+                if asyncio.isfuture(pending):
+                    pending.cancel()
+                else:
+                    pending.close()
+
+    def campfire(self, project_id: int, campfire_id: int):
+        from .campfire import AsyncCampfire
+        return AsyncCampfire(self, project_id=project_id, campfire_id=campfire_id)
+
+    def message_board(self, project_id: int, message_board_id: int):
+        from .messageboard import AsyncMessageBoard
+        return AsyncMessageBoard(self, project_id=project_id, message_board_id=message_board_id)
+
+    def attachments(self):
+        from .attachments import AsyncAttachments
+        return AsyncAttachments(self)
@@ -0,0 +1,146 @@
+import asyncio
+import logging
+
+from ..models import CampfireLine, response_json
+from ..pagination import next_page_url
+from ..polling import AdaptiveInterval, unseen
+from .basecamp import AsyncBasecamp, _raise_for_status
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncCampfire:
+
+    def __init__(self, session: AsyncBasecamp, project_id: int, campfire_id: int):
+        '''
+        Interacts with Basecamp campfires from asyncio code.
+
+        Parameters:
+            session (AsyncBasecamp): The session used to send requests.
+            project_id (int): The ID the Basecamp project containing the Campfire.
+            campfire_id (int): ID of the Campfire you wish to target.
+        '''
+        self.session = session
+        self.project_id = project_id
+        self.campfire_id = campfire_id
+        self.__campfire_url = f"{session.base_url}/buckets/{project_id}/chats/{campfire_id}"
+
+    async def get_info(self) -> dict:
+        '''
+        Returns:
+            dict: Information about the campfire.
+        '''
+        response = await self.session.request("GET", f"{self.__campfire_url}.json")
+        _raise_for_status(response)
+        return response_json(response)
+
+    async def get_lines(self) -> list:
+        '''
+        Returns:
+            list: A list of all campfire messages.
+        '''
+        response = await self.session.request("GET", f"{self.__campfire_url}/lines.json")
+        _raise_for_status(response)
+        return response_json(response)
+
+    def iter_lines(self, limit: int = None, until=None, prefetch: bool = False, typed: bool = False, fields=None):
+        '''
+        Lazily iterates over all campfire messages, following pagination. Use with `async for`.
+
+        Parameters:
+            limit (int): Maximum number of lines to yield. None yields every line.
+            until (callable): Iteration stops at the first line for which until(line) returns True.
+            prefetch (bool): Download the next page while the current one is consumed.
+            typed (bool): Yield compact CampfireLine objects instead of dicts.
+            fields (iterable): With typed, the names of the fields to decode, e.g. ("id", "content"); the others are None.
+        '''
+        return self.session.paginate(f"{self.__campfire_url}/lines.json", limit=limit, until=until, prefetch=prefetch,
+                                     model=CampfireLine if typed else None, fields=fields)
+
+    async def poll_lines(self, last_id: int = None, etag: str = None):
+        '''
+        Checks the campfire once for lines newer than last_id, with a request conditional on etag.
+        If every line on the first page is new, older pages are read until a line that was already seen is reached.
+
+        Returns:
+            tuple: The new lines, oldest first, and the ETag to pass to the next poll.
+        '''
+        headers = {"If-None-Match": etag} if etag is not None else None
+        response = await self.session.request("GET", f"{self.__campfire_url}/lines.json", headers=headers)
+        if response.status_code == 304:
+            return [], etag
+        _raise_for_status(response)
+
+        records = response_json(response)
+        lines = unseen(records, last_id)
+        next_url = next_page_url(response.headers.get("Link"))
+        if last_id is not None and next_url is not None and len(lines) == len(records):
+            older = [line async for line in self.session.paginate(next_url, until=lambda line: line["id"] <= last_id)]
+            lines = unseen(older, last_id) + lines
+        return lines, response.headers.get("ETag")
+
+    async def follow(self, since_id: int = None, min_interval: float = 2.0, max_interval: float = 60.0):
+        '''
+        Yields new campfire lines as they are posted, oldest first. Use with `async for`; it polls until cancelled.
+        Polls are conditional requests and the interval adapts to the chat's activity, as in Campfire.follow().
+
+        Parameters:
+            since_id (int): Yield lines newer than this line ID. None yields only lines posted after the first poll.
+            min_interval (float): Seconds between polls while the chat is active.
+            max_interval (float): Longest wait between polls of a quiet chat.
+        '''
+        interval = AdaptiveInterval(min_interval, max_interval)
+        last_id, etag = since_id, None
+        if last_id is None:
+            lines, etag = await self.poll_lines()
+            last_id = max((line["id"] for line in lines), default=0)
+
+        while True:
+            await asyncio.sleep(interval.current)
+            lines, etag = await self.poll_lines(last_id, etag)
+            interval.update(bool(lines))
+            for line in lines:
+                last_id = line["id"]
+                yield line
+
+    async def write(self, content: str):
+        '''
+        Sends a message to campfire.
+
+        Parameters:
+            content (str): Message to be sent to campfire. Unable to send rich text, files or images from API to campfire.
+        '''
+        response = await self.session.request("POST", f"{self.__campfire_url}/lines.json", json={"content": content})
+        _raise_for_status(response)
+        logger.info("Sent to campfire successfully!")
+
+
+async def follow_many(campfires, **kwargs):
+    '''
+    Follows several campfires from one event loop, yielding (campfire, line) tuples as lines arrive in any of them.
+    Each campfire is polled on its own adaptive interval.
+
+    Parameters:
+        campfires (iterable): AsyncCampfire objects, possibly from different sessions.
+        **kwargs: Passed to AsyncCampfire.follow(), e.g. min_interval and max_interval.
+    '''
+    queue = asyncio.Queue()
+
+    async def pump(campfire):
+        try:
+            async for line in campfire.follow(**kwargs):
+                await queue.put((campfire, line, None))
+        except Exception as exc:
+            await queue.put((campfire, None, exc))
+
+    tasks = [asyncio.ensure_future(pump(campfire)) for campfire in campfires]
+    try:
+        while True:
+            campfire, line, error = await queue.get()
+            if error is not None:
+                raise error
+            yield campfire, line
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
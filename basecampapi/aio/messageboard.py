@@ -0,0 +1,200 @@
+import asyncio
+import logging
+
+from ..endpoints.messageboard import _compact
+from ..models import Comment, Message, response_json
+from ..singleflight import AsyncSingleFlight
+from .basecamp import AsyncBasecamp, _raise_for_status
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncMessageBoard:
+
+    def __init__(self, session: AsyncBasecamp, project_id: int, message_board_id: int):
+        '''
+        Interacts with Message Boards, Messages and Message comments from asyncio code.
+
+        Parameters:
+            session (AsyncBasecamp): The session used to send requests.
+            project_id (int): The ID the Basecamp project containing the Message Board.
+            message_board_id (int): ID of the Message Board you wish to target.
+        '''
+        self.session = session
+        self.project_id = project_id
+        self.message_board_id = message_board_id
+        self.__bucket_url = f"{session.base_url}/buckets/{project_id}"
+
+    async def _get(self, url: str):
+        response = await self.session.request("GET", url)
+        _raise_for_status(response)
+        return response_json(response)
+
+    async def get_all_messages(self) -> list:
+        '''
+        Returns:
+            list: A list of all messages posted on the Message Board
+        '''
+        return await self._get(f"{self.__bucket_url}/message_boards/{self.message_board_id}/messages.json")
+
+    def iter_messages(self, limit: int = None, until=None, prefetch: bool = False, typed: bool = False, fields=None):
+        '''
+        Lazily iterates over all messages on the Message Board, following pagination. Use with `async for`.
+
+        Parameters:
+            limit (int): Maximum number of messages to yield. None yields every message.
+            until (callable): Iteration stops at the first message for which until(message) returns True.
+            prefetch (bool): Download the next page while the current one is consumed.
+            typed (bool): Yield compact Message objects instead of dicts.
+            fields (iterable): With typed, the names of the fields to decode, e.g. ("id", "content"); the others are None.
+        '''
+        return self.session.paginate(f"{self.__bucket_url}/message_boards/{self.message_board_id}/messages.json", limit=limit, until=until, prefetch=prefetch,
+                                     model=Message if typed else None, fields=fields)
+
+    async def get_message(self, message_id: int) -> dict:
+        '''
+        Returns all information about a message, together with its content.
+
+        Parameters:
+            message_id (int): The ID of the message that you wish to read.
+        '''
+        return await self._get(f"{self.__bucket_url}/messages/{message_id}.json")
+
+    async def create_message(self, subject: str, content: str):
+        '''
+        Creates a new Message Board post (a new message). Messages can contain files and rich text.
+
+        Parameters:
+            subject (str): Message title.
+            content (str): Message body.
+        '''
+        payload = {"subject": subject, "content": content, "status": "active"}
+        response = await self.session.request("POST", f"{self.__bucket_url}/message_boards/{self.message_board_id}/messages.json", json=payload)
+        _raise_for_status(response)
+        logger.info("Message created successfully!")
+
+    async def update_message(self, message_id: int, subject: str, content: str):
+        '''
+        Replaces the content and/or subject of an already existing message.
+
+        Parameters:
+            message_id (int): The ID of the message to update.
+            subject (str): Updated subject.
+            content (str): Updated content.
+        '''
+        payload = {"subject": subject, "content": content}
+        response = await self.session.request("PUT", f"{self.__bucket_url}/messages/{message_id}.json", json=payload)
+        _raise_for_status(response)
+        logger.info("Message updated successfully!")
+
+    async def get_all_comments(self, message_id: int) -> list:
+        '''
+        Gets a list of all the comments on a selected message board post.
+
+        Parameters:
+            message_id (int): The ID of the message to return the comments for.
+        '''
+        return await self._get(f"{self.__bucket_url}/recordings/{message_id}/comments.json")
+
+    def iter_comments(self, message_id: int, limit: int = None, until=None, prefetch: bool = False, typed: bool = False, fields=None):
+        '''
+        Lazily iterates over all comments on a message, following pagination. Use with `async for`.
+
+        Parameters:
+            message_id (int): The ID of the message to return the comments for.
+            limit (int): Maximum number of comments to yield. None yields every comment.
+            until (callable): Iteration stops at the first comment for which until(comment) returns True.
+            prefetch (bool): Download the next page while the current one is consumed.
+            typed (bool): Yield compact Comment objects instead of dicts.
+            fields (iterable): With typed, the names of the fields to decode, e.g. ("id", "content"); the others are None.
+        '''
+        return self.session.paginate(f"{self.__bucket_url}/recordings/{message_id}/comments.json", limit=limit, until=until, prefetch=prefetch,
+                                     model=Comment if typed else None, fields=fields)
+
+    async def hydrate(self, messages, compact: bool = True) -> list:
+        '''
+        Fetches the bodies and comments of many messages concurrently, within the session's concurrency limit.
+        Message bodies are downloaded only when the given records lack content, comments only for messages that have
+        any, and a URL requested twice is downloaded once.
+
+        Parameters:
+            messages (iterable): Message records or message IDs.
+            compact (bool): Keep only the id, subject, content, creator name and timestamps of each record.
+
+        Returns:
+            list: One message per input, in the same order, each with a "comments" list.
+        '''
+        messages = [message if isinstance(message, dict) else {"id": message} for message in messages]
+        # Results are kept for the whole call, so a URL is downloaded once even when its requests do not overlap.
+        flights = AsyncSingleFlight(ttl=float("inf"))
+        tasks = []
+
+        def fetch(url, coroutine_function, *args):
+            tasks.append(asyncio.ensure_future(flights.do(url, coroutine_function, *args)))
+            return tasks[-1]
+
+        async def all_comments(message_id):
+            return [comment async for comment in self.iter_comments(message_id)]
+
+        jobs = []
+        for message in messages:
+            body = fetch(f"{self.__bucket_url}/messages/{message['id']}.json", self.get_message, message["id"]) if "content" not in message else None
+            comments = None
+            if message.get("comments_count", 1):
+                comments = fetch(f"{self.__bucket_url}/recordings/{message['id']}/comments.json", all_comments, message["id"])
+            jobs.append((message, body, comments))
+
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        threads = []
+        for message, body, comments in jobs:
+            if body is not None:
+                message = body.result()
+            thread = dict(_compact(message) if compact else message)
+            thread["comments"] = [_compact(comment) if compact else comment for comment in (comments.result() if comments is not None else [])]
+            threads.append(thread)
+        return threads
+
+    async def fetch_thread_tree(self, compact: bool = True) -> list:
+        '''
+        Returns every message on the Message Board together with its comments, fetched concurrently with hydrate().
+        '''
+        messages = [message async for message in self.iter_messages()]
+        return await self.hydrate(messages, compact=compact)
+
+    async def get_comment(self, comment_id: int) -> dict:
+        '''
+        Gets information and content of a specific comment.
+
+        Parameters:
+            comment_id (int): The ID of the comment to return the information for.
+        '''
+        return await self._get(f"{self.__bucket_url}/comments/{comment_id}.json")
+
+    async def create_comment(self, message_id: int, content: str):
+        '''
+        Creates a new comment on a message board post. Comments can contain files and rich text.
+
+        Parameters:
+            message_id (int): The ID of the message on Basecamp to comment on.
+            content (str): The body of the comment.
+        '''
+        response = await self.session.request("POST", f"{self.__bucket_url}/recordings/{message_id}/comments.json", json={"content": content})
+        _raise_for_status(response)
+        logger.info("Comment created successfully!")
+
+    async def update_comment(self, comment_id: int, content: str):
+        '''
+        Updates an existing comment on a message board post.
+
+        Parameters:
+            comment_id (int): The ID of the comment to update.
+            content (str): The updated body of the comment.
+        '''
+        response = await self.session.request("PUT", f"{self.__bucket_url}/comments/{comment_id}.json", json={"content": content})
+        _raise_for_status(response)
+        logger.info("Comment updated successfully!")
@@ -1,56 +1,208 @@
-import requests
-from typing import Union
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Union
 
-from .config import BasecampConfig
+from .ratelimit import TokenBucket
+from .singleflight import SingleFlight
+from .tokens import DEFAULT_EXPIRES_IN, MemoryTokenStore, is_fresh, token_key
+from .transport import Transport
+
+if TYPE_CHECKING:
+    from .config import BasecampConfig
+
+logger = logging.getLogger(__name__)
+
+API_URL = "https://3.basecampapi.com"
+LAUNCHPAD_URL = "https://launchpad.37signals.com"
 
 class Basecamp:
     
-    __credentials = {}
-    __base_url = ""
+    __default = None
     
-    def __init__(self, credentials: Union[dict, BasecampConfig], verification_code='Not available!'):
+    def __init__(self, credentials: Union[dict, "BasecampConfig"], verification_code='Not available!', pool_size: int = 10, max_retries: int = 3, cache=None, rate_limiter=None, token_store=None, refresh_margin: float = 24 * 60 * 60, hooks=None, api_url: str = API_URL, launchpad_url: str = LAUNCHPAD_URL, single_flight: bool = True, memo_ttl: float = 0.0):
         '''
-        Initializes a Basecamp session.
+        Initializes a Basecamp session. Each session has its own credentials, connection pool and access token,
+        so several accounts can be used from one process and from several threads at the same time.
 
         Parameters:
             account_id (int): ID number for the Basecamp account.
             credentials (dict): A dictionary containing client_id, client_secret, redirect_uri and refresh_token.
+            pool_size (int): Number of keep-alive connections held open to Basecamp.
+            max_retries (int): Number of retries for failed connections, 429 and 5xx responses.
+            cache (ResponseCache): Optional MemoryCache or SQLiteCache; GET requests then revalidate stored responses with ETags.
+            rate_limiter (TokenBucket): Limiter that paces requests. Defaults to Basecamp's budget of 50 requests per 10 seconds.
+            token_store (TokenStore): Where access tokens are cached. Pass a FileTokenStore to reuse tokens across processes.
+            refresh_margin (float): Access tokens are renewed this many seconds before they expire.
+            hooks (list): Callables called with a RequestEvent after every request, e.g. Metrics, LoggingHook or OpenTelemetryHook objects.
+            api_url (str): Root URL of the Basecamp 3 API. Change it only to talk to a proxy or a test server.
+            launchpad_url (str): Root URL of the 37signals authorization server.
+            single_flight (bool): Identical GET requests sent at the same time from several threads share one network call.
+            memo_ttl (float): With single_flight, successful GET responses are also reused for this many seconds.
+                Any write made through this session drops them.
         ''' 
         
-        if isinstance(credentials, BasecampConfig):
+        if not isinstance(credentials, dict):
             credentials = credentials.model_dump()
 
-        Basecamp.__base_url = f"https://3.basecampapi.com/{credentials['account_id']}"
-        Basecamp.__credentials = credentials
-        
+        if rate_limiter is None:
+            rate_limiter = TokenBucket(capacity=50, period=10)
+
+        flights = SingleFlight(ttl=memo_ttl) if single_flight else None
+        self.transport = Transport(pool_size=pool_size, max_retries=max_retries, cache=cache, rate_limiter=rate_limiter, hooks=hooks, single_flight=flights)
+        self.base_url = f"{api_url}/{credentials['account_id']}"
+        self.launchpad_url = launchpad_url
         self.credentials = credentials
+        self.token_store = token_store if token_store is not None else MemoryTokenStore()
+        self.refresh_margin = refresh_margin
+        self.token_expires_at = 0
         
         if 'refresh_token' not in credentials:
             if verification_code == 'Not available!':
-                self.verification_link = f"https://launchpad.37signals.com/authorization/new?type=web_server&client_id={self.credentials['client_id']}&redirect_uri={self.credentials['redirect_uri']}"
+                self.verification_link = f"{self.launchpad_url}/authorization/new?type=web_server&client_id={self.credentials['client_id']}&redirect_uri={self.credentials['redirect_uri']}"
                 raise Exception("Access denied. Please use the following url to allow access and get the code from the redirect page's url parameter \"code\", then pass it as verification_code parameter of the Basecamp object: " + self.verification_link)
             else:
                 self.verification_code = verification_code
-                verification_url = f"https://launchpad.37signals.com/authorization/token?type=web_server&client_id={self.credentials['client_id']}&redirect_uri={self.credentials['redirect_uri']}&client_secret={self.credentials['client_secret']}&code={self.verification_code}"
-                response = requests.post(verification_url)
+                verification_url = f"{self.launchpad_url}/authorization/token?type=web_server&client_id={self.credentials['client_id']}&redirect_uri={self.credentials['redirect_uri']}&client_secret={self.credentials['client_secret']}&code={self.verification_code}"
+                response = self.transport.post(verification_url)
 
                 if not response.ok:
                     raise Exception(f"Status code: {response.status_code}. {response.reason}. Error text: {response.text}.")
                 else:
-                    Basecamp.__credentials['refresh_token'] = response.json()["refresh_token"]
                     self.credentials['refresh_token'] = response.json()["refresh_token"]
                     self.__get_access()
-                    print('refresh_token and access_token added to credentials. ')
-                    print('Please save your refresh_token for future access: ' + self.credentials['refresh_token'])
+                    logger.info("refresh_token and access_token added to credentials.")
+                    # The token itself is not logged: log output often ends up in shared log stores.
+                    logger.warning("Please save credentials['refresh_token'] of this session for future access.")
         else:
             self.__get_access()
 
+        self.transport.auth = self
+        Basecamp.__default = self
+
+    @classmethod
+    def default_session(cls) -> "Basecamp":
+        '''
+        Returns the most recently created session. Endpoint objects created without an explicit session use it.
+        '''
+        if cls.__default is None:
+            raise Exception("No Basecamp session available. Create a Basecamp object first, or pass session= to the endpoint object.")
+        return cls.__default
+
+    def campfire(self, project_id: int, campfire_id: int):
+        '''
+        Returns a Campfire bound to this session.
+        '''
+        from .endpoints.camprife import Campfire
+        return Campfire(project_id=project_id, campfire_id=campfire_id, session=self)
+
+    def message_board(self, project_id: int, message_board_id: int):
+        '''
+        Returns a MessageBoard bound to this session.
+        '''
+        from .endpoints.messageboard import MessageBoard
+        return MessageBoard(project_id=project_id, message_board_id=message_board_id, session=self)
+
+    def recordings(self):
+        '''
+        Returns a Recordings client bound to this session.
+        '''
+        from .endpoints.recordings import Recordings
+        return Recordings(session=self)
+
+    def post_lines(self, lines, max_workers: int = 8) -> list:
+        '''
+        Posts many campfire lines, possibly to different campfires, using a pool of worker threads.
+        Lines for the same campfire are sent one after another in the given order; different campfires are served in parallel.
+        All requests share this session's connection pool and rate limiter.
+
+        Parameters:
+            lines (iterable): Tuples of (project_id, campfire_id, content).
+            max_workers (int): Maximum number of campfires posted to at the same time.
+
+        Returns:
+            list: One LineResult per line, in the same order as lines.
+        '''
+        lines = list(lines)
+        chats = {}
+        for index, (project_id, campfire_id, content) in enumerate(lines):
+            chats.setdefault((project_id, campfire_id), []).append((index, content))
+
+        results = [None] * len(lines)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self.campfire(project_id, campfire_id).write_many, [content for _, content in items]): items
+                for (project_id, campfire_id), items in chats.items()
+            }
+            for future, items in futures.items():
+                for (index, _), result in zip(items, future.result()):
+                    results[index] = result
+        return results
+
+    def attachments(self, upload_cache=None):
+        '''
+        Returns an Attachments object bound to this session.
+
+        Parameters:
+            upload_cache (UploadCache): Optional cache that skips uploads of content uploaded before.
+        '''
+        from .endpoints.attachments import Attachments
+        return Attachments(session=self, upload_cache=upload_cache)
+
     
-    def __get_access(self):
-        self.__access_url = f"https://launchpad.37signals.com/authorization/token?type=refresh&refresh_token={self.credentials['refresh_token']}&client_id={self.credentials['client_id']}&redirect_uri={self.credentials['redirect_uri']}&client_secret={self.credentials['client_secret']}"
-        response = requests.post(self.__access_url)
-        if not response.ok:
-            raise Exception(f"Status code: {response.status_code}. {response.reason}. Error text: {response.text}.")
-        else:
-            Basecamp.__credentials['access_token'] = response.json()['access_token']
-            print('Authentication successful!')
+    def __get_access(self, rejected_token: str = None):
+        key = token_key(self.credentials)
+        token = self.token_store.load(key)
+
+        if rejected_token is not None or not is_fresh(token, self.refresh_margin):
+            # Only one thread or process refreshes at a time; the others pick up its token from the store.
+            with self.token_store.lock(key):
+                token = self.token_store.load(key)
+                if rejected_token is None:
+                    usable = is_fresh(token, self.refresh_margin)
+                else:
+                    usable = is_fresh(token, 0) and token['access_token'] != rejected_token
+
+                if not usable:
+                    self.__access_url = f"{self.launchpad_url}/authorization/token?type=refresh&refresh_token={self.credentials['refresh_token']}&client_id={self.credentials['client_id']}&redirect_uri={self.credentials['redirect_uri']}&client_secret={self.credentials['client_secret']}"
+                    response = self.transport.post(self.__access_url)
+                    if not response.ok:
+                        raise Exception(f"Status code: {response.status_code}. {response.reason}. Error text: {response.text}.")
+                    else:
+                        payload = response.json()
+                        token = {
+                            'access_token': payload['access_token'],
+                            'expires_at': time.time() + payload.get('expires_in', DEFAULT_EXPIRES_IN),
+                        }
+                        self.token_store.save(key, token)
+                        logger.info("Authentication successful!")
+
+        self.credentials['access_token'] = token['access_token']
+        self.token_expires_at = token['expires_at']
+
+    def access_token(self) -> str:
+        '''
+        Returns a valid access token, renewing it first if it expires within refresh_margin seconds.
+        '''
+        if self.token_expires_at - self.refresh_margin <= time.time():
+            self.__get_access()
+        return self.credentials['access_token']
+
+    def reauthenticate(self, rejected_token: str) -> str:
+        '''
+        Replaces an access token that Basecamp rejected with a 401 response.
+
+        Parameters:
+            rejected_token (str): The token that was rejected. If another thread or process already replaced it, no refresh is made.
+
+        Returns:
+            str: The new access token.
+        '''
+        self.__get_access(rejected_token=rejected_token)
+        return self.credentials['access_token']
+
+    def close(self):
+        '''
+        Closes the pooled connections held by this session.
+        '''
+        self.transport.close()
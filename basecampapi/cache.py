@@ -0,0 +1,179 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+CacheEntry = namedtuple("CacheEntry", ["etag", "last_modified", "body", "headers", "stored_at"])
+
+
+class ResponseCache:
+    '''
+    Base class for response caches used for conditional GET requests.
+    Subclasses implement _load, _store, _remove and clear; counters are kept here.
+    '''
+
+    def __init__(self, maxsize: int = 1024, ttl: float = None):
+        '''
+        Parameters:
+            maxsize (int): Maximum number of responses kept. The least recently used ones are evicted first.
+            ttl (float): Seconds after which a stored response is discarded. None keeps it until it is evicted.
+        '''
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self._lock = threading.Lock()
+
+    @property
+    def stats(self) -> dict:
+        '''
+        Counters for monitoring: hits (a stored response was found and revalidated), misses (nothing usable was stored),
+        not_modified (the server answered 304 and the stored body was reused) and hit_rate.
+        '''
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "hit_rate": self.not_modified / lookups if lookups else 0.0,
+        }
+
+    def get(self, url: str) -> CacheEntry:
+        '''
+        Returns the stored response for a URL, or None if there is none or it has expired.
+        '''
+        with self._lock:
+            entry = self._load(url)
+            if entry is not None and self.ttl is not None and time.time() - entry.stored_at > self.ttl:
+                self._remove(url)
+                entry = None
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return entry
+
+    def set(self, url: str, etag: str, last_modified: str, body: bytes, headers: dict = None):
+        '''
+        Stores a response body together with its validators.
+
+        Parameters:
+            url (str): The requested URL.
+            etag (str): Value of the ETag response header.
+            last_modified (str): Value of the Last-Modified response header.
+            body (bytes): The response body.
+            headers (dict): Other response headers to restore on a 304, such as Link.
+        '''
+        with self._lock:
+            self._store(url, CacheEntry(etag, last_modified, body, headers or {}, time.time()))
+
+    def delete(self, url: str):
+        '''
+        Removes the stored response for a URL, if any.
+        '''
+        with self._lock:
+            self._remove(url)
+
+    def record_not_modified(self):
+        with self._lock:
+            self.not_modified += 1
+
+    def _load(self, url):
+        raise NotImplementedError
+
+    def _store(self, url, entry):
+        raise NotImplementedError
+
+    def _remove(self, url):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class MemoryCache(ResponseCache):
+    '''
+    In-memory LRU response cache.
+    '''
+
+    def __init__(self, maxsize: int = 1024, ttl: float = None):
+        super().__init__(maxsize=maxsize, ttl=ttl)
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _load(self, url):
+        entry = self._entries.get(url)
+        if entry is not None:
+            self._entries.move_to_end(url)
+        return entry
+
+    def _store(self, url, entry):
+        self._entries[url] = entry
+        self._entries.move_to_end(url)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def _remove(self, url):
+        self._entries.pop(url, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteCache(ResponseCache):
+    '''
+    On-disk response cache stored in a SQLite database, shared by every process that uses the same file.
+    '''
+
+    def __init__(self, path: str, maxsize: int = 10000, ttl: float = None):
+        '''
+        Parameters:
+            path (str): Location of the SQLite database file. It is created if it does not exist.
+            maxsize (int): Maximum number of responses kept. The least recently used ones are evicted first.
+            ttl (float): Seconds after which a stored response is discarded. None keeps it until it is evicted.
+        '''
+        super().__init__(maxsize=maxsize, ttl=ttl)
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, body BLOB, headers TEXT, stored_at REAL, used_at REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_used_at ON responses (used_at)")
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def _load(self, url):
+        row = self._db.execute("SELECT etag, last_modified, body, headers, stored_at FROM responses WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        self._db.execute("UPDATE responses SET used_at = ? WHERE url = ?", (time.time(), url))
+        return CacheEntry(row[0], row[1], bytes(row[2]), json.loads(row[3]), row[4])
+
+    def _store(self, url, entry):
+        self._db.execute(
+            "INSERT OR REPLACE INTO responses (url, etag, last_modified, body, headers, stored_at, used_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (url, entry.etag, entry.last_modified, entry.body, json.dumps(entry.headers), entry.stored_at, entry.stored_at),
+        )
+        self._db.execute(
+            "DELETE FROM responses WHERE url IN (SELECT url FROM responses ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+            (self.maxsize,),
+        )
+
+    def _remove(self, url):
+        self._db.execute("DELETE FROM responses WHERE url = ?", (url,))
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+
+    def close(self):
+        self._db.close()
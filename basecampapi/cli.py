@@ -1,9 +1,37 @@
+import json
+import sys
+from typing import List
+
 import typer
-from .basecamp import Basecamp
-from .endpoints.camprife import Campfire
-from .endpoints.messageboard import MessageBoard
+from .daemon import DEFAULT_SOCKET, execute, forward, serve as serve_daemon
+from .tokens import DEFAULT_TOKEN_CACHE
 
 app = typer.Typer(help="CLI interface for Basecamp API")
+webhooks_app = typer.Typer(help="Receive Basecamp webhooks.")
+app.add_typer(webhooks_app, name="webhooks")
+
+
+def _session(credentials: dict, token_cache: str = None, **kwargs):
+    # Imported here so that commands answered by a running daemon never load requests.
+    from .basecamp import Basecamp
+    from .tokens import FileTokenStore
+
+    if token_cache is not None:
+        kwargs["token_store"] = FileTokenStore(token_cache)
+    return Basecamp(credentials=credentials, **kwargs)
+
+
+def _run(credentials: dict, token_cache: str, socket_path: str, command: str, arguments: dict):
+    # Hands the command to a running daemon for these credentials, or runs it in this process.
+    if socket_path:
+        handled, result = forward(credentials, command, arguments, socket_path)
+        if handled:
+            return result
+    bc = _session(credentials, token_cache)
+    try:
+        return execute(bc, command, arguments)
+    finally:
+        bc.close()
 
 @app.command()
 def auth(
@@ -22,10 +50,11 @@ def auth(
     }
     if verification_code:
         typer.echo("Using verification code to obtain refresh token...")
-        Basecamp(credentials=credentials, verification_code=verification_code)
+        bc = _session(credentials, verification_code=verification_code)
+        typer.echo("Please save your refresh_token for future access: " + bc.credentials["refresh_token"])
     else:
         try:
-            Basecamp(credentials=credentials)
+            _session(credentials)
         except Exception as exc:
             typer.echo(str(exc))
 
@@ -38,9 +67,134 @@ def campfire_send(
     refresh_token: str,
     project_id: int,
     campfire_id: int,
-    content: str,
+    content: str = typer.Argument(None, help="Message to send. Omit when using --from-file or --stdin."),
+    from_file: str = typer.Option(None, "--from-file", help="Send every non-empty line of this file as a separate message."),
+    stdin: bool = typer.Option(False, "--stdin", help="Send every non-empty line read from standard input as a separate message."),
+    token_cache: str = typer.Option(DEFAULT_TOKEN_CACHE, help="File where access tokens are cached between runs."),
+    socket_path: str = typer.Option(DEFAULT_SOCKET, "--socket", help="Socket of a daemon started with `serve`. Used when one is running."),
+):
+    """Send a message, or many messages in order, to a Campfire chat."""
+    if from_file is not None:
+        with open(from_file) as source:
+            contents = [line.rstrip("\n") for line in source if line.strip()]
+    elif stdin:
+        contents = [line.rstrip("\n") for line in sys.stdin if line.strip()]
+    elif content is not None:
+        contents = [content]
+    else:
+        raise typer.BadParameter("Provide CONTENT, --from-file or --stdin.")
+
+    credentials = {
+        "account_id": account_id,
+        "client_id": client_id,
+        "client_secret": client_secret,
+        "redirect_uri": redirect_uri,
+        "refresh_token": refresh_token,
+    }
+    arguments = {"project_id": project_id, "campfire_id": campfire_id, "contents": contents}
+    results = _run(credentials, token_cache, socket_path, "campfire_send", arguments)
+    failed = [result for result in results if not result["ok"]]
+    for result in failed:
+        typer.echo(f"Failed to send {result['content']!r}: {result['error']}", err=True)
+    if content is not None and not failed:
+        typer.echo("Sent to campfire successfully!")
+    else:
+        typer.echo(f"Sent {len(results) - len(failed)} of {len(results)} messages.")
+    if failed:
+        raise typer.Exit(code=1)
+
+@app.command()
+def campfire_tail(
+    account_id: int,
+    client_id: str,
+    client_secret: str,
+    redirect_uri: str,
+    refresh_token: str,
+    project_id: int,
+    campfire_id: int,
+    since_id: int = typer.Option(None, help="Also print lines newer than this line ID that were posted before starting."),
+    min_interval: float = typer.Option(2.0, help="Seconds between polls while the chat is active."),
+    max_interval: float = typer.Option(60.0, help="Longest wait between polls of a quiet chat."),
+    as_json: bool = typer.Option(False, "--json", help="Print every line as a JSON object."),
+    token_cache: str = typer.Option(DEFAULT_TOKEN_CACHE, help="File where access tokens are cached between runs."),
+):
+    """Print new Campfire lines as they are posted, until interrupted."""
+    credentials = {
+        "account_id": account_id,
+        "client_id": client_id,
+        "client_secret": client_secret,
+        "redirect_uri": redirect_uri,
+        "refresh_token": refresh_token,
+    }
+    bc = _session(credentials, token_cache)
+    campfire = bc.campfire(project_id=project_id, campfire_id=campfire_id)
+    try:
+        for line in campfire.follow(since_id=since_id, min_interval=min_interval, max_interval=max_interval):
+            if as_json:
+                typer.echo(json.dumps(line))
+            else:
+                creator = (line.get("creator") or {}).get("name", "")
+                typer.echo(f"[{line.get('created_at', '')}] {creator}: {line.get('content', '')}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        bc.close()
+
+@app.command()
+def crawl(
+    account_id: int,
+    client_id: str,
+    client_secret: str,
+    redirect_uri: str,
+    refresh_token: str,
+    project: List[int] = typer.Option(None, "--project", help="ID of a project to crawl. Repeat for several. Defaults to every project."),
+    include: List[str] = typer.Option(None, "--include", help="messages, comments or campfires. Repeat for several. Defaults to all three."),
+    processes: int = typer.Option(None, help="Number of worker processes. Defaults to the number of CPUs."),
+    output: str = typer.Option("-", "--output", "-o", help="File to write NDJSON to. - writes to standard output."),
+    token_cache: str = typer.Option(DEFAULT_TOKEN_CACHE, help="File where access tokens are cached between runs."),
+):
+    """Download every message, comment and campfire line of the account as NDJSON, one record per line."""
+    from .crawl import KINDS, Crawl
+
+    credentials = {
+        "account_id": account_id,
+        "client_id": client_id,
+        "client_secret": client_secret,
+        "redirect_uri": redirect_uri,
+        "refresh_token": refresh_token,
+    }
+    runner = Crawl(credentials, projects=project or None, processes=processes, include=include or KINDS, token_cache=token_cache)
+    target = sys.stdout if output == "-" else open(output, "w")
+    try:
+        for line in runner:
+            target.write(line + "\n")
+    finally:
+        if target is not sys.stdout:
+            target.close()
+    for project_id, error in runner.errors.items():
+        typer.echo(f"Project {project_id} failed: {error}", err=True)
+    typer.echo(f"Crawled {sum(runner.counts.values())} records from {len(runner.counts)} projects.", err=True)
+    if runner.errors:
+        raise typer.Exit(code=1)
+
+@app.command()
+def export(
+    account_id: int,
+    client_id: str,
+    client_secret: str,
+    redirect_uri: str,
+    refresh_token: str,
+    project_id: int,
+    output: str = typer.Argument(..., help="File to write; .gz compresses, .parquet writes a Parquet dataset directory."),
+    format: str = typer.Option(None, "--format", help="ndjson, gzip or parquet. Defaults to the format matching OUTPUT."),
+    include: List[str] = typer.Option(None, "--include", help="messages, comments or campfires. Repeat for several. Defaults to all three."),
+    checkpoint: str = typer.Option(None, help="File where progress is saved. Defaults to OUTPUT.checkpoint."),
+    chunk_size: int = typer.Option(1000, help="Records written between two checkpoints."),
+    token_cache: str = typer.Option(DEFAULT_TOKEN_CACHE, help="File where access tokens are cached between runs."),
 ):
-    """Send a message to a Campfire chat."""
+    """Export the message board and campfire history of a project. Run it again to resume an interrupted export."""
+    from .export import KINDS, Export
+
     credentials = {
         "account_id": account_id,
         "client_id": client_id,
@@ -48,9 +202,14 @@ def campfire_send(
         "redirect_uri": redirect_uri,
         "refresh_token": refresh_token,
     }
-    Basecamp(credentials=credentials)
-    campfire = Campfire(project_id=project_id, campfire_id=campfire_id)
-    campfire.write(content=content)
+    bc = _session(credentials, token_cache)
+    try:
+        job = Export(project_id, output, format=format, include=include or KINDS, checkpoint=checkpoint, chunk_size=chunk_size, session=bc)
+        counts = job.run()
+    finally:
+        bc.close()
+    summary = ", ".join(f"{count} {kind}s" for kind, count in counts.items()) or "nothing"
+    typer.echo(f"Exported {summary} to {output}.")
 
 @app.command()
 def message_create(
@@ -63,6 +222,8 @@ def message_create(
     message_board_id: int,
     subject: str,
     content: str,
+    token_cache: str = typer.Option(DEFAULT_TOKEN_CACHE, help="File where access tokens are cached between runs."),
+    socket_path: str = typer.Option(DEFAULT_SOCKET, "--socket", help="Socket of a daemon started with `serve`. Used when one is running."),
 ):
     """Create a message on a message board."""
     credentials = {
@@ -72,9 +233,76 @@ def message_create(
         "redirect_uri": redirect_uri,
         "refresh_token": refresh_token,
     }
-    Basecamp(credentials=credentials)
-    mb = MessageBoard(project_id=project_id, message_board_id=message_board_id)
-    mb.create_message(subject=subject, content=content)
+    arguments = {"project_id": project_id, "message_board_id": message_board_id, "subject": subject, "content": content}
+    _run(credentials, token_cache, socket_path, "message_create", arguments)
+    typer.echo("Message created successfully!")
+
+@app.command()
+def serve(
+    account_id: int,
+    client_id: str,
+    client_secret: str,
+    redirect_uri: str,
+    refresh_token: str,
+    token_cache: str = typer.Option(DEFAULT_TOKEN_CACHE, help="File where access tokens are cached between runs."),
+    socket_path: str = typer.Option(DEFAULT_SOCKET, "--socket", help="Unix socket to listen on."),
+):
+    """Keep one authenticated session open and run campfire-send and message-create for these credentials."""
+    credentials = {
+        "account_id": account_id,
+        "client_id": client_id,
+        "client_secret": client_secret,
+        "redirect_uri": redirect_uri,
+        "refresh_token": refresh_token,
+    }
+    bc = _session(credentials, token_cache)
+    typer.echo(f"Listening on {socket_path}. Press Ctrl+C to stop.")
+    try:
+        serve_daemon(bc, socket_path)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        bc.close()
+
+@webhooks_app.command("serve")
+def webhooks_serve(
+    host: str = typer.Option("127.0.0.1", help="Interface to listen on."),
+    port: int = typer.Option(8080, help="Port to listen on."),
+    secret: str = typer.Option(None, envvar="BASECAMPAPI_WEBHOOK_SECRET", help="Token the payload URL must carry as ?token=."),
+    mirror: str = typer.Option(None, help="SQLite mirror file to write changed messages and comments to."),
+    cache: str = typer.Option(None, help="SQLite response cache file to drop changed recordings from."),
+    quiet: bool = typer.Option(False, "--quiet", help="Do not print events."),
+):
+    """Receive webhooks and print every event as a JSON line, until interrupted."""
+    from .webhooks import WebhookReceiver, serve as serve_webhooks
+
+    local_mirror = None
+    if mirror is not None:
+        from .mirror import Mirror
+        local_mirror = Mirror(mirror)
+    response_cache = None
+    if cache is not None:
+        from .cache import SQLiteCache
+        response_cache = SQLiteCache(cache)
+
+    receiver = WebhookReceiver(secret=secret, cache=response_cache, mirror=local_mirror)
+    if not quiet:
+        @receiver.on()
+        def echo(event):
+            typer.echo(json.dumps({"id": event.id, "kind": event.kind, "type": event.type, "project_id": event.project_id,
+                                   "creator": event.creator_name, "created_at": event.created_at}))
+
+    typer.echo(f"Listening on http://{host}:{port}. Press Ctrl+C to stop.", err=True)
+    try:
+        serve_webhooks(receiver, host, port)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        receiver.close()
+        if local_mirror is not None:
+            local_mirror.close()
+        if response_cache is not None:
+            response_cache.close()
 
 if __name__ == "__main__":
     app()
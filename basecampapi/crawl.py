@@ -0,0 +1,230 @@
+import json
+import logging
+import os
+import queue
+import shutil
+import tempfile
+
+from .basecamp import API_URL, LAUNCHPAD_URL, Basecamp
+from .pagination import Paginator
+from .tokens import DEFAULT_TOKEN_CACHE
+
+logger = logging.getLogger(__name__)
+
+KINDS = ("messages", "comments", "campfires")
+
+
+def project_ids(session: Basecamp) -> list:
+    '''
+    Returns the IDs of every active project of the account.
+    '''
+    headers = {'Authorization': 'Bearer ' + session.credentials['access_token'], "Content-Type": "application/json"}
+    return [project["id"] for project in Paginator(session.transport, f"{session.base_url}/projects.json", headers)]
+
+
+def crawl_project(session: Basecamp, project_id: int, include=KINDS):
+    '''
+    Downloads the message boards, message comments and campfires of one project.
+
+    Parameters:
+        session (Basecamp): The session to use.
+        project_id (int): ID of the project.
+        include (iterable): Which of "messages", "comments" and "campfires" to download.
+
+    Returns:
+        generator: Lists of NDJSON lines, one list per downloaded page. Every line is an object with the record's
+        type ("message", "comment" or "campfire_line"), project_id, the content as plain text, and the record.
+    '''
+    from .endpoints.camprife import Campfire
+    from .endpoints.messageboard import MessageBoard
+    from .mirror import plain_text
+
+    def encode(kind, records):
+        return [
+            json.dumps({"type": kind, "project_id": project_id, "text": plain_text(record.get("content")), "record": record})
+            for record in records
+        ]
+
+    headers = {'Authorization': 'Bearer ' + session.credentials['access_token'], "Content-Type": "application/json"}
+    response = session.transport.get(f"{session.base_url}/projects/{project_id}.json", headers=headers)
+    if not response.ok:
+        raise Exception(f"Status code: {response.status_code}. {response.reason}. Error text: {response.text}.")
+    dock = [tool for tool in response.json().get("dock") or [] if tool.get("enabled", True)]
+
+    for tool in dock:
+        if tool["name"] == "message_board" and ("messages" in include or "comments" in include):
+            board = MessageBoard(project_id, tool["id"], session=session)
+            for messages in board.iter_messages().pages():
+                if "messages" in include:
+                    yield encode("message", messages)
+                if "comments" in include:
+                    for message in messages:
+                        if message.get("comments_count", 1):
+                            for comments in board.iter_comments(message["id"]).pages():
+                                yield encode("comment", comments)
+        elif tool["name"] == "chat" and "campfires" in include:
+            campfire = Campfire(project_id, tool["id"], session=session)
+            for lines in campfire.iter_lines().pages():
+                yield encode("campfire_line", lines)
+
+
+def _open_session(options: dict) -> Basecamp:
+    from .ratelimit import FileTokenBucket
+    from .tokens import FileTokenStore
+
+    return Basecamp(
+        credentials=dict(options["credentials"]),
+        pool_size=options["pool_size"],
+        rate_limiter=FileTokenBucket(options["budget_path"], capacity=options["capacity"], period=options["period"]),
+        token_store=FileTokenStore(options["token_cache"]),
+        api_url=options["api_url"],
+        launchpad_url=options["launchpad_url"],
+    )
+
+
+def _reports(options: dict, projects):
+    # Crawls the projects one after another and yields ("lines", lines) per page and ("done", project_id, count, error)
+    # per project. Runs in every worker process.
+    try:
+        session = _open_session(options)
+    except Exception as exc:
+        session, failure = None, str(exc)
+    try:
+        for project_id in projects:
+            count = 0
+            try:
+                if session is None:
+                    raise Exception(failure)
+                for lines in crawl_project(session, project_id, options["include"]):
+                    yield "lines", lines
+                    count += len(lines)
+            except Exception as exc:
+                yield "done", project_id, count, str(exc)
+            else:
+                yield "done", project_id, count, None
+    finally:
+        if session is not None:
+            session.close()
+
+
+def _worker(options: dict, tasks, results):
+    for report in _reports(options, iter(tasks.get, None)):
+        results.put(report)
+
+
+class Crawl:
+
+    def __init__(self, credentials: dict, projects=None, processes: int = None, include=KINDS, capacity: int = 50, period: float = 10.0,
+                 pool_size: int = 4, token_cache: str = DEFAULT_TOKEN_CACHE, queue_size: int = 64, api_url: str = API_URL, launchpad_url: str = LAUNCHPAD_URL):
+        '''
+        Crawls a whole account with a pool of worker processes, one project at a time per process, so that decoding
+        JSON and converting HTML to text use several cores. Iterating over the crawl yields NDJSON lines (see
+        crawl_project) as the workers produce them; at most queue_size pages are buffered, so memory use does not
+        grow with the size of the account.
+
+        Every worker has its own connection pool. All of them share the access token through token_cache and one
+        rate-limit budget through a file created by the parent process.
+
+        Parameters:
+            credentials (dict): A dictionary containing account_id, client_id, client_secret, redirect_uri and refresh_token.
+            projects (iterable): IDs of the projects to crawl. Defaults to every active project of the account.
+            processes (int): Number of worker processes. Defaults to the number of CPUs. 0 crawls in this process.
+            include (iterable): Which of "messages", "comments" and "campfires" to download.
+            capacity (int): Requests allowed in a burst, shared by every worker.
+            period (float): Seconds it takes for the shared budget to refill completely.
+            pool_size (int): Keep-alive connections per worker.
+            token_cache (str): File where access tokens are cached.
+            queue_size (int): Maximum number of pages waiting to be read by the parent.
+            api_url (str): Root URL of the Basecamp 3 API.
+            launchpad_url (str): Root URL of the 37signals authorization server.
+
+        After iterating, counts maps every crawled project to its number of records and errors maps every project
+        that could not be crawled completely to the error.
+        '''
+        unknown = set(include) - set(KINDS)
+        if unknown:
+            raise Exception(f"Unknown record types: {', '.join(sorted(unknown))}. Use {', '.join(KINDS)}.")
+        self.credentials = credentials
+        self.projects = list(projects) if projects is not None else None
+        self.processes = (os.cpu_count() or 1) if processes is None else processes
+        self.include = tuple(include)
+        self.capacity = capacity
+        self.period = period
+        self.pool_size = pool_size
+        self.token_cache = token_cache
+        self.queue_size = queue_size
+        self.api_url = api_url
+        self.launchpad_url = launchpad_url
+        self.counts = {}
+        self.errors = {}
+
+    def __iter__(self):
+        directory = tempfile.mkdtemp(prefix="basecampapi-crawl-")
+        options = {
+            "credentials": self.credentials, "include": self.include, "capacity": self.capacity, "period": self.period,
+            "pool_size": self.pool_size, "token_cache": self.token_cache, "budget_path": os.path.join(directory, "budget.json"),
+            "api_url": self.api_url, "launchpad_url": self.launchpad_url,
+        }
+        try:
+            projects = self.projects
+            if projects is None:
+                # The parent refreshes the access token once, before the workers start, and lists the projects.
+                session = _open_session(options)
+                try:
+                    projects = project_ids(session)
+                finally:
+                    session.close()
+            if self.processes <= 0 or len(projects) <= 1:
+                yield from self.__inline(options, projects)
+            else:
+                yield from self.__fan_out(options, projects)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def __inline(self, options: dict, projects: list):
+        for report in _reports(options, projects):
+            yield from self.__handle(report)
+
+    def __fan_out(self, options: dict, projects: list):
+        import multiprocessing
+
+        # Worker processes are started fresh rather than forked from a process that may already run threads.
+        context = multiprocessing.get_context("spawn")
+        tasks = context.Queue()
+        results = context.Queue(maxsize=self.queue_size)
+        for project_id in projects:
+            tasks.put(project_id)
+        count = min(self.processes, len(projects))
+        for _ in range(count):
+            tasks.put(None)
+
+        workers = [context.Process(target=_worker, args=(options, tasks, results), daemon=True) for _ in range(count)]
+        for worker in workers:
+            worker.start()
+        remaining = len(projects)
+        try:
+            while remaining:
+                try:
+                    report = results.get(timeout=1.0)
+                except queue.Empty:
+                    if not any(worker.is_alive() for worker in workers):
+                        raise Exception(f"Every crawl worker stopped with {remaining} projects left.")
+                    continue
+                if report[0] == "done":
+                    remaining -= 1
+                yield from self.__handle(report)
+        finally:
+            for worker in workers:
+                if worker.is_alive():
+                    worker.terminate()
+                worker.join()
+
+    def __handle(self, report):
+        if report[0] == "lines":
+            yield from report[1]
+            return
+        _, project_id, count, error = report
+        self.counts[project_id] = count
+        if error is not None:
+            self.errors[project_id] = error
+            logger.warning("Crawling project %s failed after %d records: %s", project_id, count, error)
@@ -0,0 +1,152 @@
+import json
+import logging
+import os
+import socket
+
+from .tokens import token_key
+
+DEFAULT_SOCKET = os.environ.get("BASECAMPAPI_SOCKET") or os.path.join(os.path.expanduser("~"), ".cache", "basecampapi", "daemon.sock")
+
+logger = logging.getLogger(__name__)
+
+
+def execute(bc, command: str, arguments: dict):
+    '''
+    Runs a CLI command on a Basecamp session. Used both by the daemon and by the CLI when no daemon is running.
+
+    Parameters:
+        bc (Basecamp): The session to use.
+        command (str): "campfire_send", "message_create" or "ping".
+        arguments (dict): The command's arguments.
+
+    Returns:
+        The command's result; it can be encoded as JSON.
+    '''
+    if command == "ping":
+        return "pong"
+    if command == "campfire_send":
+        campfire = bc.campfire(project_id=arguments["project_id"], campfire_id=arguments["campfire_id"])
+        return [{"content": result.content, "ok": result.ok, "error": result.error} for result in campfire.write_many(arguments["contents"])]
+    if command == "message_create":
+        board = bc.message_board(project_id=arguments["project_id"], message_board_id=arguments["message_board_id"])
+        board.create_message(subject=arguments["subject"], content=arguments["content"])
+        return None
+    raise Exception(f"Unknown command: {command}.")
+
+
+def forward(credentials: dict, command: str, arguments: dict, socket_path: str = DEFAULT_SOCKET, timeout: float = 300.0):
+    '''
+    Sends a command to a running daemon serving the same credentials.
+
+    Returns:
+        tuple: (True, result) when the daemon ran the command, or (False, None) when no daemon is listening on
+        socket_path or it serves a different account, in which case the caller runs the command itself.
+
+    Once the command is sent the daemon may have run it, so a timeout or a missing or invalid reply raises an
+    exception; running the command again would post it twice.
+    '''
+    try:
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    except (AttributeError, OSError):
+        return False, None
+    try:
+        client.settimeout(timeout)
+        try:
+            client.connect(socket_path)
+        except OSError:
+            return False, None
+        request = {"key": token_key(credentials), "command": command, "arguments": arguments}
+        try:
+            client.sendall(json.dumps(request).encode() + b"\n")
+            line = client.makefile("rb").readline()
+        except OSError as exc:
+            raise Exception(f"No reply from the daemon on {socket_path}; the command may have been run: {exc}")
+    finally:
+        client.close()
+
+    try:
+        reply = json.loads(line)
+    except ValueError:
+        reply = None
+    if not isinstance(reply, dict) or reply.get("status") not in ("ok", "declined", "error"):
+        raise Exception(f"Invalid reply from the daemon on {socket_path}; the command may have been run.")
+    if reply["status"] == "ok":
+        return True, reply.get("result")
+    if reply["status"] == "error":
+        raise Exception(reply.get("error"))
+    return False, None
+
+
+def bind(bc, socket_path: str = DEFAULT_SOCKET):
+    '''
+    Creates the daemon's server without starting it. Each connection sends one JSON request per line and receives
+    one JSON reply per line. Only the current user can connect, and requests made with other credentials are
+    declined so that the CLI runs them itself.
+
+    Parameters:
+        bc (Basecamp): The session commands are run on.
+        socket_path (str): Location of the socket file.
+
+    Returns:
+        socketserver.ThreadingUnixStreamServer: Call serve_forever() to start it, shutdown() and server_close() to stop it.
+    '''
+    import socketserver
+
+    key = token_key(bc.credentials)
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    return
+                if request.get("key") != key:
+                    reply = {"status": "declined"}
+                else:
+                    try:
+                        reply = {"status": "ok", "result": execute(bc, request.get("command"), request.get("arguments") or {})}
+                    except Exception as exc:
+                        logger.exception("Command %s failed", request.get("command"))
+                        reply = {"status": "error", "error": str(exc)}
+                self.wfile.write(json.dumps(reply).encode() + b"\n")
+
+    class Server(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+
+    os.makedirs(os.path.dirname(os.path.abspath(socket_path)), exist_ok=True)
+    if os.path.exists(socket_path):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(socket_path)
+        except OSError:
+            # Left behind by a daemon that did not shut down cleanly.
+            os.unlink(socket_path)
+        else:
+            raise Exception(f"A daemon is already listening on {socket_path}.")
+        finally:
+            probe.close()
+
+    previous_umask = os.umask(0o177)
+    try:
+        server = Server(socket_path, Handler)
+    finally:
+        os.umask(previous_umask)
+    return server
+
+
+def serve(bc, socket_path: str = DEFAULT_SOCKET):
+    '''
+    Serves commands on a Unix socket with one warm, authenticated Basecamp session until interrupted.
+
+    Parameters:
+        bc (Basecamp): The session commands are run on.
+        socket_path (str): Location of the socket file.
+    '''
+    server = bind(bc, socket_path)
+    logger.info("Serving on %s", socket_path)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        os.unlink(socket_path)
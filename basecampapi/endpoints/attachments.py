@@ -1,78 +1,196 @@
+import hashlib
 import os
-from mimetypes import MimeTypes
-
-import filetype
-import requests
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 
 from ..basecamp import Basecamp
+from ..models import Attachment
+from ..uploads import CHUNK_SIZE, SNIFF_SIZE, UploadBody, content_digest, file_mime, sniff_mime
 
-class Attachments(Basecamp):
-    def __init__(self):
-        self.files = {}
-        self.__base_url = self._Basecamp__base_url
-        self.__credentials = Basecamp._Basecamp__credentials
-    
-    def upload_file(self, path: str, filename):
+def _seekable(source) -> bool:
+    try:
+        return source.seekable()
+    except AttributeError:
+        return False
+
+class Attachments:
+    def __init__(self, session: Basecamp = None, upload_cache=None):
         '''
-        Uploads a file to Basecamp's servers and saves the file sgid in Attachment().files.
+        Uploads files to Basecamp and keeps their sgids in Attachments().files.
 
         Parameters:
-            path (str): Path to file you wish to upload.
-            filename: Name of your file.
+            session (Basecamp): The session to use. Defaults to the most recently created Basecamp session.
+            upload_cache (UploadCache): Optional cache of earlier uploads. Content that was already uploaded under the
+                same name returns the stored sgid without any request to Basecamp.
         '''
-        
-        attachments_url = f"{self.__base_url}/attachments.json?name={path}"
-        file_size = os.path.getsize(path)
-        mime = MimeTypes().guess_type(path)[0]
-        headers = {
-            'Authorization': 'Bearer '+ self.__credentials['access_token'],
-            "Content-Type": mime,
-            "Content-Length": str(file_size)
-            }
-
-        with open(path, "rb") as file_bytes:
-            response = requests.post(attachments_url, headers=headers, data=file_bytes)
-        if not response.ok:
-            raise Exception(f"Status code: {response.status_code}. {response.reason}. Error text: {response.text}.")
-        else:
-            sgid = response.json()['attachable_sgid']
-        
+        self.files = {}
+        self.upload_cache = upload_cache
+        self.session = session if session is not None else Basecamp.default_session()
+        self.__base_url = self.session.base_url
+        self.__credentials = self.session.credentials
+        self.__transport = self.session.transport
+    
+    def __remember(self, filename, file_size, mime: str, sgid: str) -> str:
         self.files[filename] = {
             "filename": filename,
             "file_size": str(file_size),
             "content-type": mime,
             "sgid": sgid
         }
+        return sgid
 
-    
-    def upload_from_bytes(self, variable, title):
+    def attachment(self, filename) -> Attachment:
         '''
-        Uploads a file from bytes to Basecamp's servers and saves the file sgid in Attachment().files.
-
-        Parameters:
-            variable (str): Variable containing the bytes.
-            title: Name of your upload.
+        Returns the upload saved in Attachments().files under filename as an Attachment model.
         '''
-        
-        attachments_url = f"{self.__base_url}/attachments.json?name={title}"
-        file_size = len(variable)
-        mime = filetype.guess(variable).mime
+        return Attachment.from_dict(self.files[filename])
+
+    def __cached(self, name: str, filename, digest: str) -> str:
+        # Keyed by the name sent to Basecamp, which is the name Basecamp shows for the upload.
+        if self.upload_cache is None:
+            return None
+        entry = self.upload_cache.get(self.__credentials['account_id'], digest, str(name))
+        if entry is None:
+            return None
+        return self.__remember(filename, entry["file_size"], entry["content_type"], entry["sgid"])
+
+    def __upload(self, name: str, filename, data, file_size: int, mime: str, digest: str = None) -> str:
+        attachments_url = f"{self.__base_url}/attachments.json?name={name}"
         headers = {
             'Authorization': 'Bearer '+ self.__credentials['access_token'],
             "Content-Type": mime,
-            "Content-Length": str(file_size)
             }
+        if file_size is not None:
+            headers["Content-Length"] = str(file_size)
 
-        response = requests.post(attachments_url, headers=headers, data=variable)
-        
+        response = self.__transport.post(attachments_url, headers=headers, data=data)
         if not response.ok:
             raise Exception(f"Status code: {response.status_code}. {response.reason}. Error text: {response.text}.")
         else:
             sgid = response.json()['attachable_sgid']
+
+        if isinstance(data, UploadBody) and data.digest is not None:
+            digest = data.digest.hexdigest()
+            file_size = data.tell()
+        if self.upload_cache is not None and digest is not None:
+            self.upload_cache.put(self.__credentials['account_id'], digest, str(name), sgid, file_size, mime)
+        return self.__remember(filename, file_size, mime, sgid)
+
+    def upload_file(self, path: str, filename, progress=None) -> str:
+        '''
+        Uploads a file to Basecamp's servers and saves the file sgid in Attachment().files.
+        The file is streamed from disk, never read into memory as a whole.
+
+        Parameters:
+            path (str): Path to file you wish to upload.
+            filename: Name of your file.
+            progress (callable): Optional callback called as progress(bytes_sent, total_bytes) while uploading.
+
+        Returns:
+            str: The attachable sgid of the uploaded file.
+        '''
         
-        self.files[title] = {
-            "filename": title,
-            "file_size": str(file_size),
-            "content-type": mime,
-            "sgid": sgid
-        }
\ No newline at end of file
+        digest = None
+        if self.upload_cache is not None:
+            digest = content_digest(path)
+            sgid = self.__cached(path, filename, digest)
+            if sgid is not None:
+                return sgid
+
+        file_size = os.path.getsize(path)
+        mime = file_mime(path)
+
+        with open(path, "rb") as file_bytes:
+            data = file_bytes if progress is None else UploadBody(file_bytes, size=file_size, progress=progress)
+            return self.__upload(path, filename, data, file_size, mime, digest)
+
+    def upload_from_bytes(self, variable, title, progress=None) -> str:
+        '''
+        Uploads a file from bytes to Basecamp's servers and saves the file sgid in Attachment().files.
+
+        Parameters:
+            variable (bytes): Variable containing the bytes. A bytearray or memoryview is sent without copying it.
+            title: Name of your upload.
+            progress (callable): Optional callback called as progress(bytes_sent, total_bytes) while uploading.
+
+        Returns:
+            str: The attachable sgid of the uploaded file.
+        '''
+        
+        digest = None
+        if self.upload_cache is not None:
+            digest = content_digest(variable)
+            sgid = self.__cached(title, title, digest)
+            if sgid is not None:
+                return sgid
+
+        file_size = len(memoryview(variable).cast("B"))
+        mime = sniff_mime(memoryview(variable).cast("B")[:SNIFF_SIZE], title)
+        data = variable if progress is None else UploadBody(variable, progress=progress)
+        return self.__upload(title, title, data, file_size, mime, digest)
+
+    def upload_stream(self, source, title, size: int = None, content_type: str = None, progress=None) -> str:
+        '''
+        Uploads content from any source without loading it into memory: bytes, bytearray, memoryview,
+        a binary file object, or an iterable yielding bytes (for example a generator). Only the first bytes
+        are read to detect the MIME type. With an upload cache, buffers and seekable files are hashed first and skipped
+        when already uploaded; other sources are hashed while they are sent, so that later uploads of the same content hit the cache.
+
+        Basecamp requires the size of an upload up front. Iterables and unseekable files given without size are
+        therefore first copied to a temporary file on disk to measure them, and are then handled like seekable files.
+
+        Parameters:
+            source: The content to upload.
+            title: Name of your upload.
+            size (int): Size in bytes. Needed only for iterables and unseekable files; pass it to avoid the temporary copy.
+            content_type (str): MIME type. Detected from the content when omitted.
+            progress (callable): Optional callback called as progress(bytes_sent, total_bytes) while uploading.
+
+        Returns:
+            str: The attachable sgid of the uploaded file.
+        '''
+        buffered = isinstance(source, (bytes, bytearray, memoryview)) or (hasattr(source, "read") and _seekable(source))
+        if size is not None or buffered:
+            return self.__upload_stream(source, title, size, content_type, progress)
+        with tempfile.TemporaryFile() as spool:
+            chunks = iter(lambda: source.read(CHUNK_SIZE), b"") if hasattr(source, "read") else source
+            for chunk in chunks:
+                spool.write(chunk)
+            spool.seek(0)
+            return self.__upload_stream(spool, title, None, content_type, progress)
+
+    def __upload_stream(self, source, title, size: int, content_type: str, progress) -> str:
+        digest = None
+        hasher = None
+        if self.upload_cache is not None:
+            if isinstance(source, (bytes, bytearray, memoryview)) or (hasattr(source, "read") and _seekable(source)):
+                digest = content_digest(source)
+                sgid = self.__cached(title, title, digest)
+                if sgid is not None:
+                    return sgid
+            else:
+                hasher = hashlib.blake2b(digest_size=32)
+
+        body = UploadBody(source, size=size, progress=progress, digest=hasher)
+        mime = content_type or sniff_mime(body.peek(SNIFF_SIZE), title)
+        return self.__upload(title, title, body, body.len, mime, digest)
+
+    def upload_many(self, paths, max_workers: int = 4, progress=None) -> list:
+        '''
+        Uploads several files at the same time over the session's connection pool.
+        Each file is saved in Attachments().files under its base name.
+
+        Parameters:
+            paths (iterable): Paths of the files to upload.
+            max_workers (int): Maximum number of uploads running at the same time.
+            progress (callable): Optional callback called as progress(path, bytes_sent, total_bytes).
+
+        Returns:
+            list: The attachable sgids, in the same order as paths.
+        '''
+        def upload(path):
+            callback = None if progress is None else lambda sent, total: progress(path, sent, total)
+            return self.upload_file(path, os.path.basename(path), progress=callback)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(upload, list(paths)))
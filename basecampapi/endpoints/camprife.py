@@ -1,31 +1,62 @@
-import requests
+import logging
+import time
+from collections import namedtuple
+
 from ..basecamp import Basecamp
+from ..models import CampfireLine, response_json
+from ..pagination import Paginator, next_page_url
+from ..polling import AdaptiveInterval, unseen
+
+logger = logging.getLogger(__name__)
 
-class Campfire(Basecamp):
+LineResult = namedtuple("LineResult", ["project_id", "campfire_id", "content", "ok", "status_code", "line", "error"])
+LineResult.__doc__ = '''
+Outcome of posting one campfire line: ok is True on success, line holds the created line,
+error holds the error text on failure.
+'''
+
+class Campfire:
     
-    def __init__(self, project_id: int, campfire_id: int):
+    def __init__(self, project_id: int, campfire_id: int, session: Basecamp = None):
         '''
-        Interacts with Basecamp campfires.
+        Interacts with Basecamp campfires. No request is sent until data is actually needed.
 
         Parameters:
             project_id (int): The ID the Basecamp project containing the Campfire.
             campfire_id (int): ID of the Campfire you wish to target.
+            session (Basecamp): The session to use. Defaults to the most recently created Basecamp session.
         '''
-        self.__base_url = Basecamp._Basecamp__base_url
-        self.__credentials = Basecamp._Basecamp__credentials
+        self.session = session if session is not None else Basecamp.default_session()
+        self.__base_url = self.session.base_url
+        self.__credentials = self.session.credentials
+        self.__transport = self.session.transport
         self.project_id = project_id
         self.campfire_id = campfire_id
         self.__headers = {
             'Authorization': 'Bearer '+ self.__credentials['access_token'],
             "Content-Type": "application/json"
         } 
-        
-        get_campfire_url = f"{self.__base_url}/buckets/{self.project_id}/chats/{self.campfire_id}.json"
-        response = requests.get(get_campfire_url, headers=self.__headers)
-        if not response.ok:
-            raise Exception(f"Status code: {response.status_code}. {response.reason}. Error text: {response.text}.")
-        else:
-            self.info = response.json()
+        self.__info = None
+
+    @property
+    def info(self) -> dict:
+        '''
+        Information about the campfire. Downloaded on first access and cached until refresh() is called.
+        '''
+        if self.__info is None:
+            get_campfire_url = f"{self.__base_url}/buckets/{self.project_id}/chats/{self.campfire_id}.json"
+            response = self.__transport.get(get_campfire_url, headers=self.__headers)
+            if not response.ok:
+                raise Exception(f"Status code: {response.status_code}. {response.reason}. Error text: {response.text}.")
+            else:
+                self.__info = response_json(response)
+        return self.__info
+
+    def refresh(self):
+        '''
+        Discards the cached campfire information so that it is downloaded again on next access.
+        '''
+        self.__info = None
     
     def get_lines(self) -> list:
         '''
@@ -33,27 +64,143 @@ class Campfire(Basecamp):
             list: A list of all campfire messages.
         '''
         get_lines_url = f"{self.__base_url}/buckets/{self.project_id}/chats/{self.campfire_id}/lines.json"
-        response = requests.get(get_lines_url, headers=self.__headers)
+        response = self.__transport.get(get_lines_url, headers=self.__headers)
         if not response.ok:
             raise Exception(f"Status code: {response.status_code}. {response.reason}. Error text: {response.text}.")
         else:
-            return response.json()
+            return response_json(response)
     
-    def write(self, content: str):
+    def iter_lines(self, limit: int = None, until=None, prefetch: bool = False, typed: bool = False, fields=None) -> Paginator:
+        '''
+        Lazily iterates over all campfire messages, following pagination and yielding one line at a time.
+
+        Parameters:
+            limit (int): Maximum number of lines to yield. None yields every line.
+            until (callable): Iteration stops at the first line for which until(line) returns True.
+            prefetch (bool): Download the next page in the background while the current one is consumed.
+            typed (bool): Yield compact CampfireLine objects instead of dicts.
+            fields (iterable): With typed, the names of the fields to decode, e.g. ("id", "content"); the others are None.
+
+        Returns:
+            Paginator: An iterable of campfire lines.
+        '''
+        get_lines_url = f"{self.__base_url}/buckets/{self.project_id}/chats/{self.campfire_id}/lines.json"
+        return Paginator(self.__transport, get_lines_url, self.__headers, limit=limit, until=until, prefetch=prefetch, model=CampfireLine if typed else None, fields=fields)
+
+    def poll_lines(self, last_id: int = None, etag: str = None):
+        '''
+        Checks the campfire once for lines newer than last_id. The request is conditional on etag, so when nothing
+        changed Basecamp answers 304 without a body. If every line on the first page is new, older pages are read
+        until a line that was already seen is reached.
+
+        Parameters:
+            last_id (int): ID of the newest line already seen. None returns the lines of the first page.
+            etag (str): ETag returned by the previous poll.
+
+        Returns:
+            tuple: The new lines, oldest first, and the ETag to pass to the next poll.
+        '''
+        get_lines_url = f"{self.__base_url}/buckets/{self.project_id}/chats/{self.campfire_id}/lines.json"
+        headers = dict(self.__headers)
+        if etag is not None:
+            headers["If-None-Match"] = etag
+        response = self.__transport.get(get_lines_url, headers=headers)
+        if response.status_code == 304:
+            return [], etag
+        if not response.ok:
+            raise Exception(f"Status code: {response.status_code}. {response.reason}. Error text: {response.text}.")
+
+        records = response_json(response)
+        lines = unseen(records, last_id)
+        next_url = next_page_url(response.headers.get("Link"))
+        if last_id is not None and next_url is not None and len(lines) == len(records):
+            older = Paginator(self.__transport, next_url, self.__headers, until=lambda line: line["id"] <= last_id)
+            lines = unseen(list(older), last_id) + lines
+        return lines, response.headers.get("ETag")
+
+    def follow(self, since_id: int = None, min_interval: float = 2.0, max_interval: float = 60.0, stop=None):
+        '''
+        Yields new campfire lines as they are posted, oldest first, polling the campfire forever.
+        Polls are conditional requests, so an idle campfire costs almost nothing, and the poll interval grows while
+        the chat is quiet and drops back to min_interval as soon as somebody writes.
+
+        Parameters:
+            since_id (int): Yield lines newer than this line ID. None yields only lines posted after the first poll.
+            min_interval (float): Seconds between polls while the chat is active.
+            max_interval (float): Longest wait between polls of a quiet chat.
+            stop (threading.Event): Optional event; the generator ends once it is set.
+        '''
+        interval = AdaptiveInterval(min_interval, max_interval)
+        last_id, etag = since_id, None
+        if last_id is None:
+            lines, etag = self.poll_lines()
+            last_id = max((line["id"] for line in lines), default=0)
+
+        while stop is None or not stop.is_set():
+            wait = interval.current
+            if stop is not None:
+                if stop.wait(wait):
+                    return
+            else:
+                time.sleep(wait)
+
+            lines, etag = self.poll_lines(last_id, etag)
+            interval.update(bool(lines))
+            for line in lines:
+                last_id = line["id"]
+                yield line
+
+    def write(self, content: str, outbox=None, key: str = None):
         '''
         Sends a message to campfire.
 
         Parameters:
             content (str): Message to be sent to campfire. Unable to send rich text, files or images from API to campfire.
+            outbox (Outbox): Queue the message in this outbox and return at once instead of sending it now.
+            key (str): With outbox, the idempotency key of the message.
+
+        Returns:
+            str: With outbox, the key of the queued message.
         '''
+        if outbox is not None:
+            write_url = f"{self.__base_url}/buckets/{self.project_id}/chats/{self.campfire_id}/lines.json"
+            return outbox.enqueue(write_url, {"content": content}, key=key)
+        response = self.__post_line(content)
+        if not response.ok:
+            raise Exception(f"Status code: {response.status_code}. {response.reason}. Error text: {response.text}.")
+        else:
+            logger.info("Sent to campfire successfully!")
+
+    def __post_line(self, content: str):
         write_url = f"{self.__base_url}/buckets/{self.project_id}/chats/{self.campfire_id}/lines.json"
 
         payload = {
             "content": content
         }
 
-        response = requests.post(write_url, headers=self.__headers, json=payload)
-        if not response.ok:
-            raise Exception(f"Status code: {response.status_code}. {response.reason}. Error text: {response.text}.")
-        else:
-            print("Sent to campfire successfully!")
\ No newline at end of file
+        return self.__transport.post(write_url, headers=self.__headers, json=payload)
+
+    def write_many(self, contents) -> list:
+        '''
+        Sends several messages to campfire, one after another so that they appear in the given order.
+        A failed message does not stop the remaining ones and nothing is printed.
+
+        Parameters:
+            contents (iterable): Messages to be sent to campfire.
+
+        Returns:
+            list: One LineResult per message, in the same order as contents.
+        '''
+        results = []
+        for content in contents:
+            try:
+                response = self.__post_line(content)
+            except Exception as exc:
+                results.append(LineResult(self.project_id, self.campfire_id, content, False, None, None, str(exc)))
+                continue
+            if response.ok:
+                results.append(LineResult(self.project_id, self.campfire_id, content, True, response.status_code, response_json(response), None))
+            else:
+                error = f"Status code: {response.status_code}. {response.reason}. Error text: {response.text}."
+                results.append(LineResult(self.project_id, self.campfire_id, content, False, response.status_code, None, error))
+        return results
\ No newline at end of file
@@ -1,20 +1,53 @@
-import requests
+import logging
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 
 from ..basecamp import Basecamp
-
-class MessageBoard(Basecamp):
-
-    def __init__(self, project_id: int, message_board_id: int):
+from ..models import Comment, Message, response_json
+from ..pagination import Paginator
+from ..singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+MessageEdit = namedtuple("MessageEdit", ["message_id", "subject", "content"], defaults=(None, None))
+MessageEdit.__doc__ = '''
+Change to a message for MessageBoard.bulk_update(). subject and content are either the new text, a function that
+receives the current text and returns the new one, or None to leave the field alone.
+'''
+
+CommentEdit = namedtuple("CommentEdit", ["comment_id", "content"], defaults=(None,))
+CommentEdit.__doc__ = '''
+Change to a comment for MessageBoard.bulk_update(). content is the new text, a function of the current text, or None.
+'''
+
+EditResult = namedtuple("EditResult", ["kind", "record_id", "status", "changes", "error"])
+EditResult.__doc__ = '''
+Outcome of one record in MessageBoard.bulk_update(). status is "updated", "unchanged", "planned" (dry run) or "failed";
+changes holds the fields that were (or would be) sent.
+'''
+
+def _compact(record: dict) -> dict:
+    compact = {name: record[name] for name in ("id", "subject", "content", "created_at", "updated_at") if name in record}
+    if "creator" in record:
+        compact["creator"] = (record["creator"] or {}).get("name")
+    return compact
+
+class MessageBoard:
+
+    def __init__(self, project_id: int, message_board_id: int, session: Basecamp = None):
         '''
-        Interacts with Message Boards, Messages and Message comments.
+        Interacts with Message Boards, Messages and Message comments. No request is sent until data is actually needed.
 
         Parameters:
             project_id (int): The ID the Basecamp project containing the Message Board.
             message_board_id (int): ID of the Message Board you wish to target.
+            session (Basecamp): The session to use. Defaults to the most recently created Basecamp session.
         '''
 
-        self.__base_url = Basecamp._Basecamp__base_url
-        self.__credentials = Basecamp._Basecamp__credentials
+        self.session = session if session is not None else Basecamp.default_session()
+        self.__base_url = self.session.base_url
+        self.__credentials = self.session.credentials
+        self.__transport = self.session.transport
         self.project_id = project_id
         self.message_board_id = message_board_id
 
@@ -22,20 +55,190 @@ class MessageBoard(Basecamp):
             'Authorization': 'Bearer '+ self.__credentials['access_token'],
             "Content-Type": "application/json"
         }
+        self.__messages = None
 
-        get_all_messages_url = f"{self.__base_url}/buckets/{self.project_id}/message_boards/{self.message_board_id}/messages.json"
-        response = requests.get(get_all_messages_url, headers=self.__headers)
-        if not response.ok:
-            raise Exception(f"Status code: {response.status_code}. {response.reason}. Error text: {response.text}.")
-        else:
-            self.__messages = response.json()
+    @property
+    def messages(self) -> list:
+        '''
+        Messages posted on the Message Board. Downloaded on first access and cached until refresh() is called.
+        '''
+        if self.__messages is None:
+            get_all_messages_url = f"{self.__base_url}/buckets/{self.project_id}/message_boards/{self.message_board_id}/messages.json"
+            response = self.__transport.get(get_all_messages_url, headers=self.__headers)
+            if not response.ok:
+                raise Exception(f"Status code: {response.status_code}. {response.reason}. Error text: {response.text}.")
+            else:
+                self.__messages = response_json(response)
+        return self.__messages
+
+    def refresh(self):
+        '''
+        Discards the cached list of messages so that it is downloaded again on next access.
+        '''
+        self.__messages = None
 
     def get_all_messages(self) -> list:
         '''
         Returns:
             list: A list of all messages posted on the Message Board
         '''
-        return self.__messages
+        return self.messages
+
+    def iter_messages(self, limit: int = None, until=None, prefetch: bool = False, typed: bool = False, fields=None) -> Paginator:
+        '''
+        Lazily iterates over all messages on the Message Board, following pagination and yielding one message at a time.
+
+        Parameters:
+            limit (int): Maximum number of messages to yield. None yields every message.
+            until (callable): Iteration stops at the first message for which until(message) returns True.
+            prefetch (bool): Download the next page in the background while the current one is consumed.
+            typed (bool): Yield compact Message objects instead of dicts.
+            fields (iterable): With typed, the names of the fields to decode, e.g. ("id", "content"); the others are None.
+
+        Returns:
+            Paginator: An iterable of messages.
+        '''
+        get_all_messages_url = f"{self.__base_url}/buckets/{self.project_id}/message_boards/{self.message_board_id}/messages.json"
+        return Paginator(self.__transport, get_all_messages_url, self.__headers, limit=limit, until=until, prefetch=prefetch, model=Message if typed else None, fields=fields)
+
+    def hydrate(self, messages, max_workers: int = 8, compact: bool = True) -> list:
+        '''
+        Fetches the bodies and comments of many messages at once with a pool of worker threads.
+        Message bodies are downloaded only when the given records lack content, comments only for messages that have
+        any, and a URL requested twice is downloaded once.
+
+        Parameters:
+            messages (iterable): Message records (as returned by iter_messages) or message IDs.
+            max_workers (int): Maximum number of requests in flight at the same time.
+            compact (bool): Keep only the id, subject, content, creator name and timestamps of each record.
+                With False the full API records are returned.
+
+        Returns:
+            list: One message per input, in the same order, each with a "comments" list.
+        '''
+        messages = [message if isinstance(message, dict) else {"id": message} for message in messages]
+        # Results are kept for the whole call, so a URL is downloaded once even when its requests do not overlap.
+        flights = SingleFlight(ttl=float("inf"))
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            def fetch(url, function, *args):
+                return executor.submit(flights.do, url, function, *args)
+
+            jobs = []
+            for message in messages:
+                body = None
+                if "content" not in message:
+                    url = f"{self.__base_url}/buckets/{self.project_id}/messages/{message['id']}.json"
+                    body = fetch(url, self.get_message, message["id"])
+                comments = None
+                if message.get("comments_count", 1):
+                    url = f"{self.__base_url}/buckets/{self.project_id}/recordings/{message['id']}/comments.json"
+                    comments = fetch(url, lambda message_id: list(self.iter_comments(message_id)), message["id"])
+                jobs.append((message, body, comments))
+
+            threads = []
+            for message, body, comments in jobs:
+                if body is not None:
+                    message = body.result()
+                thread = dict(_compact(message) if compact else message)
+                thread["comments"] = [_compact(comment) if compact else comment for comment in (comments.result() if comments is not None else [])]
+                threads.append(thread)
+        return threads
+
+    def fetch_thread_tree(self, max_workers: int = 8, compact: bool = True) -> list:
+        '''
+        Returns every message on the Message Board together with its comments, fetched in parallel with hydrate().
+
+        Parameters:
+            max_workers (int): Maximum number of requests in flight at the same time.
+            compact (bool): Keep only the essential fields of each message and comment.
+
+        Returns:
+            list: The messages, each with a "comments" list.
+        '''
+        return self.hydrate(self.iter_messages(), max_workers=max_workers, compact=compact)
+
+    def bulk_update(self, edits, max_workers: int = 4, dry_run: bool = False, known=None) -> list:
+        '''
+        Applies many edits to messages and comments. Edits to the same record are merged into a single PUT, fields
+        that would not change are left out, records with nothing to change are not sent at all, and the requests run
+        in parallel within the session's rate limit. Nothing is printed.
+
+        Parameters:
+            edits (iterable): MessageEdit and CommentEdit objects, applied in the given order.
+            max_workers (int): Maximum number of requests in flight at the same time.
+            dry_run (bool): Work out the changes without sending any update.
+            known (iterable): Current message and comment records, e.g. from a Mirror or iter_recordings(), or
+                threads from hydrate(). Records with a "type" of "Comment" are comments, and so are the records in
+                the "comments" list of a thread; all others are messages. Records not given are downloaded before
+                they are compared.
+
+        Returns:
+            list: One EditResult per edited record, in the order the records first appear in edits.
+        '''
+        plans = {}
+        for edit in edits:
+            if isinstance(edit, CommentEdit):
+                key, fields = ("comment", edit.comment_id), {"content": edit.content}
+            else:
+                key, fields = ("message", edit.message_id), {"subject": edit.subject, "content": edit.content}
+            plans.setdefault(key, []).extend((name, value) for name, value in fields.items() if value is not None)
+
+        current = {}
+        for record in known or ():
+            current[("comment" if record.get("type") == "Comment" else "message", record["id"])] = record
+            # Threads from hydrate() carry their comments, which have no "type" in compact form.
+            for comment in record.get("comments") or ():
+                current[("comment", comment["id"])] = comment
+
+        def fetch(key):
+            kind, record_id = key
+            return self.get_comment(record_id) if kind == "comment" else self.get_message(record_id)
+
+        def update(key, changes):
+            kind, record_id = key
+            if kind == "comment":
+                url = f"{self.__base_url}/buckets/{self.project_id}/comments/{record_id}.json"
+            else:
+                url = f"{self.__base_url}/buckets/{self.project_id}/messages/{record_id}.json"
+            response = self.__transport.put(url, headers=self.__headers, json=changes)
+            if not response.ok:
+                raise Exception(f"Status code: {response.status_code}. {response.reason}. Error text: {response.text}.")
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            downloads = {key: executor.submit(fetch, key) for key in plans if key not in current}
+            for key, future in downloads.items():
+                try:
+                    current[key] = future.result()
+                except Exception as exc:
+                    results[key] = EditResult(key[0], key[1], "failed", None, str(exc))
+
+            updates = {}
+            for key, steps in plans.items():
+                if key in results:
+                    continue
+                record = current[key]
+                values = {}
+                for name, value in steps:
+                    previous = values.get(name, record.get(name))
+                    values[name] = value(previous) if callable(value) else value
+                changes = {name: value for name, value in values.items() if value != record.get(name)}
+                if not changes:
+                    results[key] = EditResult(key[0], key[1], "unchanged", {}, None)
+                elif dry_run:
+                    results[key] = EditResult(key[0], key[1], "planned", changes, None)
+                else:
+                    updates[key] = (changes, executor.submit(update, key, changes))
+
+            for key, (changes, future) in updates.items():
+                try:
+                    future.result()
+                    results[key] = EditResult(key[0], key[1], "updated", changes, None)
+                except Exception as exc:
+                    results[key] = EditResult(key[0], key[1], "failed", changes, str(exc))
+
+        return [results[key] for key in plans]
 
     def get_message(self, message_id: int) -> dict:
         '''
@@ -46,36 +249,44 @@ class MessageBoard(Basecamp):
         '''
         self.message_id = message_id
         get_message_url = f"{self.__base_url}/buckets/{self.project_id}/messages/{self.message_id}.json"
-        response = requests.get(get_message_url, headers=self.__headers)
+        response = self.__transport.get(get_message_url, headers=self.__headers)
         if not response.ok:
             raise Exception(f"Status code: {response.status_code}. {response.reason}. Error text: {response.text}.")
         else:
-            return response.json()
+            return response_json(response)
 
-    def create_message(self, subject: str, content: str):
+    def create_message(self, subject: str, content: str, outbox=None, key: str = None):
         '''
         Creates a new Message Board post (a new message). Messages can contain files and rich text.
 
         Parameters:
             subject (str): Message title.
             content (str): Message body.
+            outbox (Outbox): Queue the message in this outbox and return at once instead of sending it now.
+            key (str): With outbox, the idempotency key of the message.
+
+        Returns:
+            str: With outbox, the key of the queued message.
         '''
         import json
 
         create_message_url = f"{self.__base_url}/buckets/{self.project_id}/message_boards/{self.message_board_id}/messages.json"
 
+        if outbox is not None:
+            return outbox.enqueue(create_message_url, {"subject": subject, "content": content, "status": "active"}, key=key)
+
         payload = json.dumps({
             "subject": subject,
             "content": content,
             "status": "active"
         })
 
-        response = requests.post(create_message_url, headers=self.__headers, data=payload)
+        response = self.__transport.post(create_message_url, headers=self.__headers, data=payload)
 
         if not response.ok:
             raise Exception(f"Status code: {response.status_code}. {response.reason}. Error text: {response.text}.")
         else:
-            print("Message created successfully!")
+            logger.info("Message created successfully!")
 
     def update_message(self, message_id: int, subject: str, content: str):
         '''
@@ -95,12 +306,12 @@ class MessageBoard(Basecamp):
             "content": content
         })
 
-        response = requests.put(update_message_url, headers=self.__headers, data=payload)
+        response = self.__transport.put(update_message_url, headers=self.__headers, data=payload)
 
         if not response.ok:
             raise Exception(f"Status code: {response.status_code}. {response.reason}. Error text: {response.text}.")
         else:
-            print("Message updated successfully!")
+            logger.info("Message updated successfully!")
 
     def get_all_comments(self, message_id: int) -> list:
         '''
@@ -113,11 +324,29 @@ class MessageBoard(Basecamp):
             list: A list of comments on the message.
         '''
         get_all_comments_url = f"{self.__base_url}/buckets/{self.project_id}/recordings/{message_id}/comments.json"
-        response = requests.get(get_all_comments_url, headers=self.__headers)
+        response = self.__transport.get(get_all_comments_url, headers=self.__headers)
         if not response.ok:
             raise Exception(f"Status code: {response.status_code}. {response.reason}. Error text: {response.text}.")
         else:
-            return response.json()
+            return response_json(response)
+
+    def iter_comments(self, message_id: int, limit: int = None, until=None, prefetch: bool = False, typed: bool = False, fields=None) -> Paginator:
+        '''
+        Lazily iterates over all comments on a message, following pagination and yielding one comment at a time.
+
+        Parameters:
+            message_id (int): The ID of the message to return the comments for.
+            limit (int): Maximum number of comments to yield. None yields every comment.
+            until (callable): Iteration stops at the first comment for which until(comment) returns True.
+            prefetch (bool): Download the next page in the background while the current one is consumed.
+            typed (bool): Yield compact Comment objects instead of dicts.
+            fields (iterable): With typed, the names of the fields to decode, e.g. ("id", "content"); the others are None.
+
+        Returns:
+            Paginator: An iterable of comments.
+        '''
+        get_all_comments_url = f"{self.__base_url}/buckets/{self.project_id}/recordings/{message_id}/comments.json"
+        return Paginator(self.__transport, get_all_comments_url, self.__headers, limit=limit, until=until, prefetch=prefetch, model=Comment if typed else None, fields=fields)
 
     def get_comment(self, comment_id: int) -> dict:
         '''
@@ -131,33 +360,41 @@ class MessageBoard(Basecamp):
         '''
         self.comment_id = comment_id
         get_comment_url = f"{self.__base_url}/buckets/{self.project_id}/comments/{self.comment_id}.json"
-        response = requests.get(get_comment_url, headers=self.__headers)
+        response = self.__transport.get(get_comment_url, headers=self.__headers)
         if not response.ok:
             raise Exception(f"Status code: {response.status_code}. {response.reason}. Error text: {response.text}.")
         else:
-            return response.json()
+            return response_json(response)
 
-    def create_comment(self, message_id: int, content: str):
+    def create_comment(self, message_id: int, content: str, outbox=None, key: str = None):
         '''
         Creates a new comment on a message board post. Comments can contain files and rich text.
 
         Parameters:
             message_id (int): The ID of the message on Basecamp to comment on.
             content (str): The body of the comment.
+            outbox (Outbox): Queue the comment in this outbox and return at once instead of sending it now.
+            key (str): With outbox, the idempotency key of the comment.
+
+        Returns:
+            str: With outbox, the key of the queued comment.
         '''
         import json
 
         create_comment_url = f"{self.__base_url}/buckets/{self.project_id}/recordings/{message_id}/comments.json"
 
+        if outbox is not None:
+            return outbox.enqueue(create_comment_url, {"content": content}, key=key)
+
         # Use json.dumps to properly encode the content as JSON
         payload = json.dumps({"content": content})
 
-        response = requests.post(create_comment_url, headers=self.__headers, data=payload)
+        response = self.__transport.post(create_comment_url, headers=self.__headers, data=payload)
 
         if not response.ok:
             raise Exception(f"Status code: {response.status_code}. {response.reason}. Error text: {response.text}.")
         else:
-            print("Comment created successfully!")
+            logger.info("Comment created successfully!")
 
     def update_comment(self, comment_id: int, content: str):
         '''
@@ -174,9 +411,9 @@ class MessageBoard(Basecamp):
         # Use json.dumps for proper JSON encoding
         payload = json.dumps({"content": content})
 
-        response = requests.put(update_comment_url, headers=self.__headers, data=payload)
+        response = self.__transport.put(update_comment_url, headers=self.__headers, data=payload)
 
         if not response.ok:
             raise Exception(f"Status code: {response.status_code}. {response.reason}. Error text: {response.text}.")
         else:
-            print("Comment updated successfully!")
\ No newline at end of file
+            logger.info("Comment updated successfully!")
\ No newline at end of file
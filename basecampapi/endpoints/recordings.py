@@ -0,0 +1,183 @@
+import json
+import os
+from urllib.parse import urlencode
+
+from ..basecamp import Basecamp
+from ..mirror import utc_timestamp
+from ..models import Comment, Message
+from ..pagination import Paginator
+
+_MODELS = {"Message": Message, "Comment": Comment}
+
+
+class Recordings:
+
+    def __init__(self, session: Basecamp = None):
+        '''
+        Lists recordings (messages, comments, to-dos, documents, uploads...) across every project of the account.
+
+        Parameters:
+            session (Basecamp): The session to use. Defaults to the most recently created Basecamp session.
+        '''
+        self.session = session if session is not None else Basecamp.default_session()
+        self.__base_url = self.session.base_url
+        self.__transport = self.session.transport
+        self.__headers = {
+            'Authorization': 'Bearer ' + self.session.credentials['access_token'],
+            "Content-Type": "application/json"
+        }
+
+    def recordings_url(self, type: str, buckets=None, status: str = None, sort: str = "updated_at", direction: str = "desc") -> str:
+        '''
+        Returns the URL of the first page of a recordings listing.
+
+        Parameters:
+            type (str): Recording type, e.g. "Message", "Comment", "Todo", "Document" or "Upload".
+            buckets (iterable): IDs of the projects to list. Defaults to every active project.
+            status (str): "active", "archived" or "trashed". Defaults to active.
+            sort (str): "created_at" or "updated_at".
+            direction (str): "desc" or "asc".
+        '''
+        params = {"type": type}
+        if buckets is not None:
+            params["bucket"] = ",".join(str(bucket) for bucket in buckets)
+        if status is not None:
+            params["status"] = status
+        params.update(sort=sort, direction=direction)
+        return f"{self.__base_url}/projects/recordings.json?{urlencode(params, safe=',')}"
+
+    def iter_recordings(self, type: str, buckets=None, status: str = None, sort: str = "updated_at", direction: str = "desc",
+                        limit: int = None, until=None, prefetch: bool = False, typed: bool = False, fields=None) -> Paginator:
+        '''
+        Lazily iterates over the recordings of one type across projects, most recently updated first by default.
+
+        Parameters:
+            type (str): Recording type, e.g. "Message", "Comment" or "Todo".
+            buckets (iterable): IDs of the projects to list. Defaults to every active project.
+            status (str): "active", "archived" or "trashed". Defaults to active.
+            sort (str): "created_at" or "updated_at".
+            direction (str): "desc" or "asc".
+            limit (int): Maximum number of recordings to yield.
+            until (callable): Iteration stops at the first recording for which until(recording) returns True.
+            prefetch (bool): Download the next page in the background while the current one is consumed.
+            typed (bool): Yield Message or Comment objects instead of dicts. Only for those two types.
+            fields (iterable): With typed, the names of the fields to decode.
+
+        Returns:
+            Paginator: An iterable of recordings.
+        '''
+        model = _MODELS.get(type) if typed else None
+        if typed and model is None:
+            raise Exception(f"No typed model for {type} recordings. Use typed=False.")
+        url = self.recordings_url(type, buckets, status, sort, direction)
+        return Paginator(self.__transport, url, self.__headers, limit=limit, until=until, prefetch=prefetch, model=model, fields=fields)
+
+    def changes(self, types=("Message", "Comment"), cursor: str = None, buckets=None, status: str = None, typed: bool = False, fields=None):
+        '''
+        Returns a ChangeFeed of the recordings of these types that changed since the cursor was last advanced.
+
+        Parameters:
+            types (iterable): Recording types to follow.
+            cursor (str): JSON file where the position of the feed is kept between runs. None keeps it in memory.
+            buckets (iterable): IDs of the projects to follow. Defaults to every active project.
+            status (str): "active", "archived" or "trashed". Defaults to active.
+            typed (bool): Yield Message or Comment objects instead of dicts.
+            fields (iterable): With typed, the names of the fields to decode.
+        '''
+        return ChangeFeed(self, types, cursor, buckets, status, typed, fields)
+
+
+class ChangeFeed:
+
+    def __init__(self, recordings: Recordings, types, cursor: str = None, buckets=None, status: str = None, typed: bool = False, fields=None):
+        '''
+        Iterates over the recordings that were created or updated since the previous run, newest first, type by type.
+        Listings are sorted by updated_at, so a run stops at the first recording it has already seen; its cost depends
+        on how much changed, not on the size of the account.
+
+        The cursor keeps, for every type, the newest updated_at seen and the IDs updated at that instant. It moves
+        forward only once a type has been read completely. An interrupted run continues from the page it was on,
+        so records may be yielded twice but never skipped.
+
+        Use Recordings.changes() to create one.
+        '''
+        self.recordings = recordings
+        self.types = tuple(types)
+        self.path = cursor
+        self.buckets = buckets
+        self.status = status
+        self.typed = typed
+        self.fields = fields
+        self.cursor = self.__load()
+
+    def __load(self) -> dict:
+        if self.path is None or not os.path.exists(self.path):
+            return {}
+        with open(self.path) as cursor:
+            return json.load(cursor)
+
+    def __save(self):
+        if self.path is None:
+            return
+        with open(self.path + ".tmp", "w") as cursor:
+            json.dump(self.cursor, cursor)
+        os.replace(self.path + ".tmp", self.path)
+
+    def reset(self, type: str = None):
+        '''
+        Forgets the position of one type, or of every type, so that the next run lists everything again.
+        '''
+        if type is None:
+            self.cursor = {}
+        else:
+            self.cursor.pop(type, None)
+        self.__save()
+
+    def __iter__(self):
+        for type in self.types:
+            yield from self.__changes(type)
+
+    def __changes(self, type: str):
+        state = self.cursor.setdefault(type, {"updated_at": None, "ids": [], "run": None})
+        since, seen = state["updated_at"], set(state["ids"])
+        run = state["run"] or {"url": self.recordings.recordings_url(type, self.buckets, self.status), "updated_at": None, "ids": []}
+        state["run"] = run
+        model = _MODELS.get(type) if self.typed else None
+
+        paginator = Paginator(self.recordings.session.transport, run["url"], self.__headers())
+        pages = paginator.pages()
+        try:
+            for records in pages:
+                finished = False
+                for record in records:
+                    updated_at = utc_timestamp(record["updated_at"])
+                    if since is not None and (updated_at < since or (updated_at == since and record["id"] in seen)):
+                        if updated_at < since:
+                            finished = True
+                            break
+                        continue
+                    if run["updated_at"] is None or updated_at > run["updated_at"]:
+                        run["updated_at"], run["ids"] = updated_at, [record["id"]]
+                    elif updated_at == run["updated_at"]:
+                        run["ids"].append(record["id"])
+                    yield model.from_dict(record, self.fields) if model is not None else record
+                if finished or paginator.next_url is None:
+                    break
+                # Every record of the page was handed out; an interrupted run resumes on the next page.
+                run["url"] = paginator.next_url
+                self.__save()
+        finally:
+            pages.close()
+
+        if run["updated_at"] is not None and (since is None or run["updated_at"] > since):
+            state["updated_at"], state["ids"] = run["updated_at"], run["ids"]
+        elif run["updated_at"] == since and since is not None:
+            state["ids"] = sorted(seen | set(run["ids"]))
+        state["run"] = None
+        self.__save()
+
+    def __headers(self) -> dict:
+        return {
+            'Authorization': 'Bearer ' + self.recordings.session.credentials['access_token'],
+            "Content-Type": "application/json"
+        }
@@ -0,0 +1,244 @@
+import gzip
+import json
+import os
+
+from .basecamp import Basecamp
+from .pagination import Paginator
+
+KINDS = ("messages", "comments", "campfires")
+FORMATS = ("ndjson", "gzip", "parquet")
+
+# Columns of Parquet exports. NDJSON exports keep the whole record instead.
+COLUMNS = (
+    "type", "project_id", "id", "parent_id", "created_at", "updated_at",
+    "creator_id", "creator_name", "title", "content", "text",
+)
+
+
+def export_format(path: str) -> str:
+    '''
+    Guesses the export format from a file name: "parquet" for .parquet, "gzip" for .gz, "ndjson" otherwise.
+    '''
+    if path.endswith(".parquet"):
+        return "parquet"
+    if path.endswith(".gz"):
+        return "gzip"
+    return "ndjson"
+
+
+def export_row(kind: str, project_id: int, record: dict) -> dict:
+    '''
+    Flattens a record to the Parquet columns.
+    '''
+    from .mirror import plain_text
+
+    creator = record.get("creator") or {}
+    return {
+        "type": kind,
+        "project_id": project_id,
+        "id": record.get("id"),
+        "parent_id": (record.get("parent") or {}).get("id"),
+        "created_at": record.get("created_at"),
+        "updated_at": record.get("updated_at"),
+        "creator_id": creator.get("id"),
+        "creator_name": creator.get("name"),
+        "title": record.get("subject") or record.get("title"),
+        "content": record.get("content"),
+        "text": plain_text(record.get("content")),
+    }
+
+
+class _LineWriter:
+    # Writes NDJSON to one file, each chunk as its own gzip member when compressing, so that the file can be cut
+    # back to the end of the last checkpointed chunk and appended to.
+
+    def __init__(self, path: str, compress: bool, offset: int):
+        self.compress = compress
+        if offset and (not os.path.exists(path) or os.path.getsize(path) < offset):
+            # Padding the file would put bytes that were never exported before the records written next.
+            raise Exception(f"{path} is missing or shorter than its checkpoint says. Delete the checkpoint to export again from the start.")
+        self.file = open(path, "r+b" if offset else "wb")
+        self.file.truncate(offset)
+        self.file.seek(offset)
+
+    def write(self, kind: str, project_id: int, records: list) -> dict:
+        from .mirror import plain_text
+
+        data = "".join(
+            json.dumps({"type": kind, "project_id": project_id, "text": plain_text(record.get("content")), "record": record}) + "\n"
+            for record in records
+        ).encode()
+        self.file.write(gzip.compress(data) if self.compress else data)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return {"offset": self.file.tell()}
+
+    def close(self):
+        self.file.close()
+
+
+class _ParquetWriter:
+    # Writes every chunk to its own file in a directory; together they form one Parquet dataset.
+
+    def __init__(self, path: str, part: int):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("Parquet exports require pyarrow. Install it with: pip install pyarrow")
+
+        self.pyarrow = pyarrow
+        self.parquet = pyarrow.parquet
+        self.schema = pyarrow.schema([
+            (name, pyarrow.int64() if name in ("project_id", "id", "parent_id", "creator_id") else pyarrow.string())
+            for name in COLUMNS
+        ])
+        self.path = path
+        self.part = part
+        os.makedirs(path, exist_ok=True)
+
+    def write(self, kind: str, project_id: int, records: list) -> dict:
+        rows = [export_row(kind, project_id, record) for record in records]
+        table = self.pyarrow.Table.from_pylist(rows, schema=self.schema)
+        name = os.path.join(self.path, f"part-{self.part:05d}.parquet")
+        self.parquet.write_table(table, name + ".tmp")
+        os.replace(name + ".tmp", name)
+        self.part += 1
+        return {"part": self.part}
+
+    def close(self):
+        pass
+
+
+class Export:
+
+    def __init__(self, project_id: int, path: str, format: str = None, include=KINDS, checkpoint: str = None, chunk_size: int = 1000, session: Basecamp = None):
+        '''
+        Streams the messages, message comments and campfire lines of a project to a file, page by page, so that
+        memory use stays constant however large the project is.
+
+        Records are written in chunks of about chunk_size records. After each chunk, the position in the file and
+        the URL of the next page are saved to the checkpoint file; an interrupted export that is started again with
+        the same checkpoint continues from there.
+
+        Parameters:
+            project_id (int): ID of the project to export.
+            path (str): File to write. For Parquet, a directory that receives one file per chunk.
+            format (str): "ndjson", "gzip" (gzip-compressed NDJSON) or "parquet" (requires pyarrow). Defaults to the
+                          format that matches the extension of path.
+            include (iterable): Which of "messages", "comments" and "campfires" to export.
+            checkpoint (str): File where progress is saved. Defaults to path with ".checkpoint" appended.
+            chunk_size (int): Number of records written between two checkpoints.
+            session (Basecamp): The session to use. Defaults to the most recently created Basecamp session.
+        '''
+        self.format = format if format is not None else export_format(path)
+        if self.format not in FORMATS:
+            raise Exception(f"Unknown export format: {self.format}. Use {', '.join(FORMATS)}.")
+        unknown = set(include) - set(KINDS)
+        if unknown:
+            raise Exception(f"Unknown record types: {', '.join(sorted(unknown))}. Use {', '.join(KINDS)}.")
+        self.project_id = project_id
+        self.path = path
+        self.include = tuple(include)
+        self.checkpoint = checkpoint if checkpoint is not None else path.rstrip(os.sep) + ".checkpoint"
+        self.chunk_size = chunk_size
+        self.session = session if session is not None else Basecamp.default_session()
+        self.__headers = {
+            'Authorization': 'Bearer ' + self.session.credentials['access_token'],
+            "Content-Type": "application/json",
+        }
+
+    def sources(self) -> list:
+        '''
+        Returns:
+            list: (kind, URL of the first page) of every list that is exported, in export order.
+        '''
+        base_url = self.session.base_url
+        recordings = f"{base_url}/projects/recordings.json?bucket={self.project_id}&sort=created_at&direction=asc&type="
+        sources = []
+        if "messages" in self.include:
+            sources.append(("message", recordings + "Message"))
+        if "comments" in self.include:
+            sources.append(("comment", recordings + "Comment"))
+        if "campfires" in self.include:
+            response = self.session.transport.get(f"{base_url}/projects/{self.project_id}.json", headers=self.__headers)
+            if not response.ok:
+                raise Exception(f"Status code: {response.status_code}. {response.reason}. Error text: {response.text}.")
+            for tool in response.json().get("dock") or []:
+                if tool["name"] == "chat" and tool.get("enabled", True):
+                    sources.append(("campfire_line", f"{base_url}/buckets/{self.project_id}/chats/{tool['id']}/lines.json"))
+        return sources
+
+    def load_checkpoint(self) -> dict:
+        '''
+        Returns:
+            dict: The saved progress, or None when the export has not started.
+        '''
+        if not os.path.exists(self.checkpoint):
+            return None
+        with open(self.checkpoint) as checkpoint:
+            return json.load(checkpoint)
+
+    def __save(self, state: dict):
+        with open(self.checkpoint + ".tmp", "w") as checkpoint:
+            json.dump(state, checkpoint)
+        os.replace(self.checkpoint + ".tmp", self.checkpoint)
+
+    def run(self) -> dict:
+        '''
+        Runs the export, or resumes it from its checkpoint.
+
+        Returns:
+            dict: Number of records of each type written by this and earlier runs of the export.
+        '''
+        state = self.load_checkpoint()
+        if state is None:
+            state = {"sources": self.sources(), "source": 0, "url": None, "last_id": None, "offset": 0, "part": 0, "counts": {}, "done": False}
+        if state["done"]:
+            return state["counts"]
+
+        if self.format == "parquet":
+            writer = _ParquetWriter(self.path, state["part"])
+        else:
+            writer = _LineWriter(self.path, self.format == "gzip", state["offset"])
+        try:
+            while state["source"] < len(state["sources"]):
+                index = state["source"]
+                kind, first_url = state["sources"][index]
+                self.__export_source(writer, state, kind, state["url"] or first_url)
+                if state["source"] == index:
+                    # Nothing was left to write after the last checkpoint.
+                    state.update(source=index + 1, url=None, last_id=None)
+                    self.__save(state)
+        finally:
+            writer.close()
+        state["done"] = True
+        self.__save(state)
+        return state["counts"]
+
+    def __export_source(self, writer, state: dict, kind: str, url: str):
+        paginator = Paginator(self.session.transport, url, self.__headers)
+        last_id = state["last_id"]
+        chunk = []
+        for records in paginator.pages():
+            if kind == "comment":
+                # Comments on to-dos, documents and other recordings are not part of message boards.
+                records = [record for record in records if (record.get("parent") or {}).get("type") == "Message"]
+            if kind == "campfire_line" and last_id is not None:
+                # Lines are listed newest first; lines posted since the checkpoint shift older ones onto this page.
+                records = [record for record in records if record["id"] < last_id]
+            chunk.extend(records)
+            if chunk and (len(chunk) >= self.chunk_size or paginator.next_url is None):
+                self.__flush(writer, state, kind, chunk, paginator.next_url)
+                last_id = state["last_id"]
+                chunk = []
+
+    def __flush(self, writer, state: dict, kind: str, records: list, next_url: str):
+        state.update(writer.write(kind, self.project_id, records))
+        state["counts"][kind] = state["counts"].get(kind, 0) + len(records)
+        if next_url is None:
+            state.update(source=state["source"] + 1, url=None, last_id=None)
+        else:
+            state.update(url=next_url, last_id=records[-1]["id"])
+        # The chunk is on disk before the checkpoint that covers it is saved.
+        self.__save(state)
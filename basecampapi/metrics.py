@@ -0,0 +1,225 @@
+import logging
+import re
+import threading
+from collections import namedtuple
+from urllib.parse import urlsplit
+
+_NUMBER = re.compile(r"/\d+(?=/|\.json$|$)")
+
+# Upper bounds, in seconds, of the latency histogram buckets.
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+RequestEvent = namedtuple("RequestEvent", [
+    "kind", "method", "endpoint", "url", "status_code", "duration", "bytes_sent", "bytes_received",
+    "attempt", "from_cache", "in_flight", "pool_size", "error", "started_at",
+])
+RequestEvent.__doc__ = '''
+Passed to every hook after each attempt of a request. kind is "response", "retry" (the response will be retried)
+or "error" (the connection failed). endpoint is the URL path with IDs replaced by {id}, e.g.
+"/{id}/buckets/{id}/chats/{id}/lines.json". duration is in seconds; started_at is a time.time() timestamp.
+in_flight is the number of requests that were being sent at the same time, pool_size the number of pooled connections.
+'''
+
+
+def endpoint_name(url: str) -> str:
+    '''
+    Returns the path of a URL with numeric IDs replaced by {id}, so that requests to the same endpoint are grouped.
+    '''
+    return _NUMBER.sub("/{id}", urlsplit(url).path)
+
+
+def body_size(body) -> int:
+    '''
+    Returns the size in bytes of a request body, or None when it cannot be known without reading it.
+    '''
+    if body is None:
+        return 0
+    if isinstance(body, str):
+        return len(body.encode())
+    if isinstance(body, (bytes, bytearray)):
+        return len(body)
+    if isinstance(body, memoryview):
+        return body.nbytes
+    size = getattr(body, "len", None)
+    return size if isinstance(size, int) else None
+
+
+def emit(hooks, event: RequestEvent):
+    '''
+    Calls every hook with the event. A failing hook is logged and never breaks the request.
+    '''
+    for hook in hooks:
+        try:
+            hook(event)
+        except Exception:
+            logging.getLogger(__name__).exception("Request hook %r failed", hook)
+
+
+class Metrics:
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        '''
+        Hook that aggregates request events in memory: latency histograms and counts per endpoint and status,
+        bytes sent and received, retries, 429 responses, cache hits and connection pool utilization.
+        Pass it in the hooks of a Basecamp or AsyncBasecamp session.
+
+        Parameters:
+            buckets (tuple): Upper bounds in seconds of the latency histogram buckets.
+        '''
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self.requests = {}
+        self.histograms = {}
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.retries = 0
+        self.throttled = 0
+        self.errors = 0
+        self.cache_hits = 0
+        self.cacheable = 0
+        self.in_flight_peak = 0
+        self.pool_size = None
+
+    def __call__(self, event: RequestEvent):
+        with self._lock:
+            if event.status_code == 429:
+                self.throttled += 1
+            if event.kind == "retry":
+                self.retries += 1
+            elif event.kind == "error":
+                self.errors += 1
+                return
+
+            key = (event.method, event.endpoint, event.status_code)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            histogram = self.histograms.setdefault((event.method, event.endpoint), [0] * (len(self.buckets) + 1) + [0.0])
+            index = next((position for position, bound in enumerate(self.buckets) if event.duration <= bound), len(self.buckets))
+            histogram[index] += 1
+            histogram[-1] += event.duration
+
+            self.bytes_sent += event.bytes_sent or 0
+            self.bytes_received += event.bytes_received or 0
+            if event.method == "GET":
+                self.cacheable += 1
+                self.cache_hits += bool(event.from_cache)
+            self.in_flight_peak = max(self.in_flight_peak, event.in_flight or 0)
+            self.pool_size = event.pool_size
+
+    def snapshot(self) -> dict:
+        '''
+        Returns the aggregated values as a plain dict, e.g. for logging or JSON export.
+        '''
+        with self._lock:
+            endpoints = {}
+            for (method, endpoint), histogram in self.histograms.items():
+                count = sum(histogram[:-1])
+                endpoints[f"{method} {endpoint}"] = {
+                    "count": count,
+                    "mean_seconds": histogram[-1] / count if count else 0.0,
+                    "buckets": dict(zip(self.buckets + (float("inf"),), histogram[:-1])),
+                }
+            return {
+                "endpoints": endpoints,
+                "statuses": {f"{method} {endpoint} {status}": count for (method, endpoint, status), count in self.requests.items()},
+                "bytes_sent": self.bytes_sent,
+                "bytes_received": self.bytes_received,
+                "retries": self.retries,
+                "throttled": self.throttled,
+                "errors": self.errors,
+                "cache_hit_rate": self.cache_hits / self.cacheable if self.cacheable else 0.0,
+                "pool_utilization": self.in_flight_peak / self.pool_size if self.pool_size else 0.0,
+            }
+
+    def prometheus(self) -> str:
+        '''
+        Returns the metrics in the Prometheus text exposition format.
+        '''
+        lines = [
+            "# HELP basecamp_request_duration_seconds Latency of Basecamp API requests.",
+            "# TYPE basecamp_request_duration_seconds histogram",
+        ]
+        with self._lock:
+            for (method, endpoint), histogram in sorted(self.histograms.items()):
+                labels = f'method="{method}",endpoint="{endpoint}"'
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), histogram[:-1]):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'basecamp_request_duration_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+                lines.append(f"basecamp_request_duration_seconds_sum{{{labels}}} {histogram[-1]}")
+                lines.append(f"basecamp_request_duration_seconds_count{{{labels}}} {cumulative}")
+
+            lines.append("# TYPE basecamp_requests_total counter")
+            for (method, endpoint, status), count in sorted(self.requests.items(), key=str):
+                lines.append(f'basecamp_requests_total{{method="{method}",endpoint="{endpoint}",status="{status}"}} {count}')
+
+            for name, value, kind in (
+                ("basecamp_sent_bytes_total", self.bytes_sent, "counter"),
+                ("basecamp_received_bytes_total", self.bytes_received, "counter"),
+                ("basecamp_retries_total", self.retries, "counter"),
+                ("basecamp_throttled_total", self.throttled, "counter"),
+                ("basecamp_connection_errors_total", self.errors, "counter"),
+                ("basecamp_cache_hits_total", self.cache_hits, "counter"),
+                ("basecamp_in_flight_peak", self.in_flight_peak, "gauge"),
+            ):
+                lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+class LoggingHook:
+
+    def __init__(self, logger: logging.Logger = None, level: int = logging.DEBUG):
+        '''
+        Hook that logs every request attempt. The event's fields are also attached to the log record as extra
+        attributes (prefixed with "basecamp_"), so that structured log handlers can index them.
+
+        Parameters:
+            logger (logging.Logger): Logger to write to. Defaults to the "basecampapi.requests" logger.
+            level (int): Level of successful requests. Retries are logged as warnings, failed connections as errors.
+        '''
+        self.logger = logger if logger is not None else logging.getLogger("basecampapi.requests")
+        self.level = level
+
+    def __call__(self, event: RequestEvent):
+        level = {"retry": logging.WARNING, "error": logging.ERROR}.get(event.kind, self.level)
+        if not self.logger.isEnabledFor(level):
+            return
+        extra = {f"basecamp_{name}": value for name, value in event._asdict().items()}
+        if event.kind == "error":
+            self.logger.log(level, "%s %s failed after %.3fs: %s", event.method, event.endpoint, event.duration, event.error, extra=extra)
+        else:
+            self.logger.log(level, "%s %s %s in %.3fs%s", event.method, event.endpoint, event.status_code, event.duration,
+                            " (retrying)" if event.kind == "retry" else "", extra=extra)
+
+
+class OpenTelemetryHook:
+
+    def __init__(self, tracer=None):
+        '''
+        Hook that records every request attempt as an OpenTelemetry client span. Requires opentelemetry-api.
+
+        Parameters:
+            tracer: Tracer to use. Defaults to the tracer of the globally configured provider.
+        '''
+        try:
+            from opentelemetry import trace
+        except ImportError:
+            raise ImportError("OpenTelemetryHook requires opentelemetry-api. Install it with: pip install opentelemetry-api")
+
+        self.tracer = tracer if tracer is not None else trace.get_tracer("basecampapi")
+        self.kind = trace.SpanKind.CLIENT
+        self.error_status = trace.Status(trace.StatusCode.ERROR)
+
+    def __call__(self, event: RequestEvent):
+        start = int(event.started_at * 1e9)
+        span = self.tracer.start_span(f"{event.method} {event.endpoint}", kind=self.kind, start_time=start, attributes={
+            "http.request.method": event.method,
+            "url.full": event.url,
+            "http.response.status_code": event.status_code or 0,
+            "basecamp.attempt": event.attempt,
+            "basecamp.from_cache": bool(event.from_cache),
+        })
+        if event.kind == "error" or (event.status_code or 0) in range(500, 600):
+            span.set_status(self.error_status)
+        span.end(end_time=start + int(event.duration * 1e9))
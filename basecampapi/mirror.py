@@ -0,0 +1,296 @@
+import html
+import json
+import re
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+from .basecamp import Basecamp
+
+_TAGS = re.compile(r"<[^>]+>")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    project_id INTEGER,
+    board_id INTEGER,
+    subject TEXT,
+    author_id INTEGER,
+    author_name TEXT,
+    created_at TEXT,
+    updated_at TEXT,
+    raw TEXT
+);
+CREATE INDEX IF NOT EXISTS messages_board ON messages (project_id, board_id, created_at);
+CREATE INDEX IF NOT EXISTS messages_author ON messages (author_id, created_at);
+CREATE INDEX IF NOT EXISTS messages_created_at ON messages (created_at);
+
+CREATE TABLE IF NOT EXISTS comments (
+    id INTEGER PRIMARY KEY,
+    project_id INTEGER,
+    message_id INTEGER,
+    author_id INTEGER,
+    author_name TEXT,
+    created_at TEXT,
+    updated_at TEXT,
+    raw TEXT
+);
+CREATE INDEX IF NOT EXISTS comments_message ON comments (message_id, created_at);
+CREATE INDEX IF NOT EXISTS comments_author ON comments (author_id, created_at);
+CREATE INDEX IF NOT EXISTS comments_created_at ON comments (created_at);
+
+CREATE TABLE IF NOT EXISTS watermarks (
+    scope TEXT PRIMARY KEY,
+    updated_at TEXT,
+    ids TEXT
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS search USING fts5 (title, body);
+"""
+
+
+def utc_timestamp(value) -> str:
+    '''
+    Normalises a Basecamp timestamp, or a datetime, to a UTC ISO 8601 string that sorts chronologically.
+    Naive datetimes are taken to be in UTC.
+    '''
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def plain_text(content: str) -> str:
+    '''
+    Strips the HTML tags of rich text content, for full-text indexing.
+    '''
+    return html.unescape(_TAGS.sub(" ", content or ""))
+
+
+class Mirror:
+
+    def __init__(self, path: str, session: Basecamp = None):
+        '''
+        Local SQLite copy of message boards and their comments. sync() downloads only what changed since the previous
+        sync, and the query methods read from disk without sending any request.
+
+        Parameters:
+            path (str): Location of the SQLite database file. It is created if it does not exist.
+            session (Basecamp): The session used to sync. Defaults to the most recently created Basecamp session.
+        '''
+        self.path = path
+        self.session = session
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        if "ids" not in [column[1] for column in self._db.execute("PRAGMA table_info(watermarks)")]:
+            # Mirrors created before the IDs at the watermark were recorded.
+            self._db.execute("ALTER TABLE watermarks ADD COLUMN ids TEXT")
+
+    def close(self):
+        self._db.close()
+
+    def watermark(self, scope: str) -> str:
+        '''
+        Returns the newest updated_at stored for a scope such as "Message:<project_id>", or None before the first sync.
+        '''
+        with self._lock:
+            row = self._db.execute("SELECT updated_at FROM watermarks WHERE scope = ?", (scope,)).fetchone()
+        return row[0] if row else None
+
+    def sync(self, project_id: int) -> dict:
+        '''
+        Brings the messages and comments of a project up to date. Changed records are listed newest first, so
+        listing stops at the first record older than the previous sync; an unchanged project costs two requests.
+
+        Records that were trashed or archived in Basecamp stay in the mirror.
+
+        Parameters:
+            project_id (int): The ID of the Basecamp project to mirror.
+
+        Returns:
+            dict: Number of messages and comments that were added or updated.
+        '''
+        return {
+            "messages": self.__sync_type(project_id, "Message"),
+            "comments": self.__sync_type(project_id, "Comment"),
+        }
+
+    def __sync_type(self, project_id: int, kind: str) -> int:
+        from .pagination import Paginator
+
+        session = self.session if self.session is not None else Basecamp.default_session()
+        scope = f"{kind}:{project_id}"
+        with self._lock:
+            row = self._db.execute("SELECT updated_at, ids FROM watermarks WHERE scope = ?", (scope,)).fetchone()
+        # The records updated exactly at the watermark were stored by the previous sync; only others are new.
+        since, seen = (row[0], set(json.loads(row[1] or "[]"))) if row else (None, set())
+        newest, newest_ids = since, set(seen)
+        changed = 0
+
+        url = f"{session.base_url}/projects/recordings.json?type={kind}&bucket={project_id}&sort=updated_at&direction=desc"
+        headers = {
+            'Authorization': 'Bearer ' + session.credentials['access_token'],
+            "Content-Type": "application/json",
+        }
+        pages = Paginator(session.transport, url, headers).pages()
+        try:
+            for records in pages:
+                fresh = []
+                finished = False
+                for record in records:
+                    updated_at = utc_timestamp(record["updated_at"])
+                    if since is not None and updated_at < since:
+                        finished = True
+                        break
+                    if updated_at == since and record["id"] in seen:
+                        continue
+                    fresh.append(record)
+                    if newest is None or updated_at > newest:
+                        newest, newest_ids = updated_at, {record["id"]}
+                    elif updated_at == newest:
+                        newest_ids.add(record["id"])
+                # Comments on to-dos, documents and other recordings are not mirrored.
+                wanted = [record for record in fresh if kind == "Message" or (record.get("parent") or {}).get("type") == "Message"]
+                with self._lock, self._db:
+                    for record in wanted:
+                        self.__store(project_id, kind, record)
+                changed += len(wanted)
+                if finished:
+                    break
+        finally:
+            pages.close()
+
+        if newest is not None:
+            with self._lock, self._db:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO watermarks (scope, updated_at, ids) VALUES (?, ?, ?)",
+                    (scope, newest, json.dumps(sorted(newest_ids))),
+                )
+        return changed
+
+    def store(self, record: dict) -> bool:
+        '''
+        Adds or updates one message or comment without contacting Basecamp, e.g. one received from a webhook.
+        As with sync(), comments on anything other than a message are not stored.
+
+        Parameters:
+            record (dict): The message or comment, as returned by the API.
+
+        Returns:
+            bool: True if the record was stored.
+        '''
+        kind = record.get("type")
+        if kind not in ("Message", "Comment") or (kind == "Comment" and (record.get("parent") or {}).get("type") != "Message"):
+            return False
+        with self._lock, self._db:
+            self.__store((record.get("bucket") or {}).get("id"), kind, record)
+        return True
+
+    def __store(self, project_id: int, kind: str, record: dict):
+        creator = record.get("creator") or {}
+        parent = record.get("parent") or {}
+        values = (
+            record["id"], project_id, parent.get("id"), creator.get("id"), creator.get("name"),
+            utc_timestamp(record.get("created_at")), utc_timestamp(record.get("updated_at")), json.dumps(record),
+        )
+        if kind == "Message":
+            self._db.execute(
+                "INSERT OR REPLACE INTO messages (id, project_id, board_id, author_id, author_name, created_at, updated_at, raw, subject) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                values + (record.get("subject"),),
+            )
+            title = record.get("subject")
+        else:
+            self._db.execute(
+                "INSERT OR REPLACE INTO comments (id, project_id, message_id, author_id, author_name, created_at, updated_at, raw) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                values,
+            )
+            title = None
+        self._db.execute("DELETE FROM search WHERE rowid = ?", (record["id"],))
+        self._db.execute("INSERT INTO search (rowid, title, body) VALUES (?, ?, ?)", (record["id"], title, plain_text(record.get("content"))))
+
+    def __select(self, table: str, filters: list, limit: int) -> list:
+        clauses = [f"{column} {operator} ?" for column, operator, value in filters if value is not None]
+        params = [value for column, operator, value in filters if value is not None]
+        query = f"SELECT raw FROM {table}"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY created_at DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            return [json.loads(row[0]) for row in self._db.execute(query, params)]
+
+    def messages(self, project_id: int = None, board_id: int = None, author_id: int = None, since=None, until=None, limit: int = None) -> list:
+        '''
+        Returns mirrored messages, newest first, without contacting Basecamp.
+
+        Parameters:
+            project_id (int): Only messages of this project.
+            board_id (int): Only messages of this Message Board.
+            author_id (int): Only messages written by this person.
+            since (datetime or str): Only messages created at or after this time.
+            until (datetime or str): Only messages created before this time.
+            limit (int): Maximum number of messages returned.
+
+        Returns:
+            list: The messages, as returned by the API.
+        '''
+        return self.__select("messages", [
+            ("project_id", "=", project_id),
+            ("board_id", "=", board_id),
+            ("author_id", "=", author_id),
+            ("created_at", ">=", utc_timestamp(since)),
+            ("created_at", "<", utc_timestamp(until)),
+        ], limit)
+
+    def comments(self, message_id: int = None, project_id: int = None, author_id: int = None, since=None, until=None, limit: int = None) -> list:
+        '''
+        Returns mirrored comments, newest first, without contacting Basecamp.
+
+        Parameters:
+            message_id (int): Only comments on this message.
+            project_id (int): Only comments in this project.
+            author_id (int): Only comments written by this person.
+            since (datetime or str): Only comments created at or after this time.
+            until (datetime or str): Only comments created before this time.
+            limit (int): Maximum number of comments returned.
+
+        Returns:
+            list: The comments, as returned by the API.
+        '''
+        return self.__select("comments", [
+            ("message_id", "=", message_id),
+            ("project_id", "=", project_id),
+            ("author_id", "=", author_id),
+            ("created_at", ">=", utc_timestamp(since)),
+            ("created_at", "<", utc_timestamp(until)),
+        ], limit)
+
+    def search(self, query: str, limit: int = 50) -> list:
+        '''
+        Full-text search over the subjects and contents of mirrored messages and comments, best matches first.
+
+        Parameters:
+            query (str): An SQLite FTS5 query, e.g. 'release AND "new pricing"'.
+            limit (int): Maximum number of results.
+
+        Returns:
+            list: The matching messages and comments, as returned by the API.
+        '''
+        sql = (
+            "SELECT COALESCE(messages.raw, comments.raw) FROM search "
+            "LEFT JOIN messages ON messages.id = search.rowid "
+            "LEFT JOIN comments ON comments.id = search.rowid "
+            "WHERE search MATCH ? ORDER BY rank LIMIT ?"
+        )
+        with self._lock:
+            return [json.loads(row[0]) for row in self._db.execute(sql, (query, limit))]
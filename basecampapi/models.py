@@ -0,0 +1,131 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+# loads() decodes JSON with the fastest backend installed: orjson, then msgspec, then the standard library.
+if orjson is not None:
+    JSON_BACKEND = "orjson"
+    loads = orjson.loads
+elif msgspec is not None:
+    JSON_BACKEND = "msgspec"
+    loads = msgspec.json.decode
+else:
+    JSON_BACKEND = "json"
+    loads = json.loads
+
+
+def response_json(response):
+    '''
+    Decodes the body of a response with the fast JSON backend.
+    '''
+    content = response.content
+    if isinstance(content, (bytes, bytearray, memoryview, str)):
+        return loads(content)
+    return response.json()
+
+
+class Record:
+    '''
+    Base class of the typed response models. Every field is a slot, nested objects such as the creator and the
+    bucket are flattened to the few values that are kept, and fields that were not selected are None.
+    '''
+
+    __slots__ = ()
+    # Maps each field to the path of keys it is read from in the API record.
+    _source = {}
+
+    def __init__(self, **values):
+        for name in self.__slots__:
+            setattr(self, name, values.get(name))
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._paths = tuple((name, cls._source.get(name, (name,))) for name in cls.__slots__)
+
+    @classmethod
+    def from_dict(cls, data: dict, fields=None):
+        '''
+        Builds a model from an API record.
+
+        Parameters:
+            data (dict): The record as returned by the API.
+            fields (iterable): Names of the fields to keep. None keeps every field.
+        '''
+        record = cls.__new__(cls)
+        for name, path in cls._paths:
+            if fields is not None and name not in fields:
+                value = None
+            elif len(path) == 1:
+                value = data.get(path[0])
+            else:
+                value = data.get(path[0])
+                for key in path[1:]:
+                    value = value.get(key) if isinstance(value, dict) else None
+            setattr(record, name, value)
+        return record
+
+    @classmethod
+    def decode(cls, content, fields=None):
+        '''
+        Decodes a JSON document holding one record or a list of records straight into models.
+
+        Parameters:
+            content (bytes): The JSON document, e.g. response.content.
+            fields (iterable): Names of the fields to keep. None keeps every field.
+        '''
+        data = loads(content)
+        if isinstance(data, list):
+            return [cls.from_dict(item, fields) for item in data]
+        return cls.from_dict(data, fields)
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __eq__(self, other):
+        return type(other) is type(self) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        values = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__ if getattr(self, name) is not None)
+        return f"{type(self).__name__}({values})"
+
+
+_RECORDING_SOURCE = {
+    "creator_id": ("creator", "id"),
+    "creator_name": ("creator", "name"),
+    "bucket_id": ("bucket", "id"),
+    "parent_id": ("parent", "id"),
+}
+
+
+class Message(Record):
+    __slots__ = ("id", "status", "subject", "content", "created_at", "updated_at", "comments_count",
+                 "creator_id", "creator_name", "bucket_id", "parent_id", "app_url")
+    _source = _RECORDING_SOURCE
+
+
+class Comment(Record):
+    __slots__ = ("id", "status", "content", "created_at", "updated_at",
+                 "creator_id", "creator_name", "bucket_id", "parent_id", "app_url")
+    _source = _RECORDING_SOURCE
+
+
+class CampfireLine(Record):
+    __slots__ = ("id", "content", "created_at", "updated_at",
+                 "creator_id", "creator_name", "bucket_id", "parent_id", "app_url")
+    _source = _RECORDING_SOURCE
+
+
+class Attachment(Record):
+    '''
+    An uploaded file, as kept in Attachments().files.
+    '''
+    __slots__ = ("sgid", "filename", "file_size", "content_type")
+    _source = {"content_type": ("content-type",)}
@@ -0,0 +1,438 @@
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from .basecamp import Basecamp
+from .tokens import token_key
+from .ratelimit import RETRYABLE_STATUSES, retry_after
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL UNIQUE,
+    url TEXT NOT NULL,
+    body TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    in_doubt INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    first_attempt_at REAL,
+    after_id INTEGER,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    sent_at REAL,
+    status_code INTEGER,
+    result TEXT,
+    result_id INTEGER,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS outbox_state ON outbox (state, id);
+"""
+
+# Records created this long before the first attempt still count as an earlier delivery, to allow for clock skew.
+_CLOCK_SKEW = 300.0
+
+
+def _timestamp(value: str) -> float:
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+def _same(record: dict, body: dict) -> bool:
+    # Basecamp may reformat rich text, so fields are compared as whitespace-normalised plain text.
+    from .mirror import plain_text
+
+    return all(
+        " ".join(plain_text(str(record.get(name) or "")).split()) == " ".join(plain_text(str(value or "")).split())
+        for name, value in body.items() if name != "status"
+    )
+
+
+def _same_account(session: Basecamp, url: str) -> bool:
+    return url.startswith(session.base_url + "/")
+
+
+class Outbox:
+
+    def __init__(self, path: str, session: Basecamp = None, batch_size: int = 50, max_workers: int = 4, max_pending: int = 10000,
+                 enqueue_timeout: float = 10.0, max_attempts: int = 10, backoff_factor: float = 2.0, max_backoff: float = 600.0, start: bool = True):
+        '''
+        Durable queue of Basecamp writes. Producers enqueue a write, which is committed to a SQLite file, and return
+        at once; a background worker delivers the queued writes in batches and retries them with exponential backoff.
+        Writes to the same campfire, message board or message are delivered in the order they were enqueued, while
+        different ones are delivered in parallel.
+
+        A write whose outcome is unknown, because the connection failed, Basecamp answered 5xx or the process stopped
+        while it was being sent, is only sent again after the list it was posted to shows that it was not created,
+        so that nothing is posted twice. Writes rejected with a 4xx status, or still failing after max_attempts, are
+        kept with state "failed" and can be queued again with requeue_failed().
+
+        Parameters:
+            path (str): Location of the SQLite database file. It is created if it does not exist.
+            session (Basecamp): The session writes are sent with. Defaults to the most recently created Basecamp session.
+                                Only URLs of its account can be enqueued.
+            batch_size (int): Maximum number of writes taken from the queue at a time.
+            max_workers (int): Maximum number of campfires, boards or messages written to at the same time.
+            max_pending (int): Maximum number of undelivered writes. enqueue() waits while the outbox is full.
+            enqueue_timeout (float): Seconds enqueue() waits for room before it raises an exception.
+            max_attempts (int): Attempts after which a write is given up as failed.
+            backoff_factor (float): Base delay in seconds of the exponential backoff between attempts.
+            max_backoff (float): Longest delay between two attempts.
+            start (bool): Start the background worker. Without it, writes are delivered by calling drain().
+        '''
+        self.path = path
+        self.session = session
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.enqueue_timeout = enqueue_timeout
+        self.max_attempts = max_attempts
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        columns = [column[1] for column in self._db.execute("PRAGMA table_info(outbox)")]
+        with self._db:
+            # Outboxes created before writes in doubt were matched by ID.
+            for column in ("after_id", "result_id"):
+                if column not in columns:
+                    self._db.execute(f"ALTER TABLE outbox ADD COLUMN {column} INTEGER")
+            # Left in flight by a process that stopped: they may or may not have reached Basecamp.
+            self._db.execute("UPDATE outbox SET state = 'pending', in_doubt = 1 WHERE state = 'sending'")
+        self.__changed = threading.Condition()
+        self.__wake = threading.Event()
+        self.__stopping = threading.Event()
+        self.__executor = None
+        self.__worker = None
+        self.__people = {}
+        if start:
+            self.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM outbox WHERE state IN ('pending', 'sending')").fetchone()[0]
+
+    def enqueue(self, url: str, body: dict, key: str = None, timeout: float = None) -> str:
+        '''
+        Queues a POST request that creates a record. url must also list the records it creates, newest first, as
+        the lines, messages and comments URLs do; it is read to find out whether a write in doubt was delivered.
+
+        Parameters:
+            url (str): Absolute URL the JSON body is posted to.
+            body (dict): Fields of the record.
+            key (str): Idempotency key. A write whose key is already in the outbox is not queued again, so a producer
+                       that restarts can safely enqueue the same writes with the same keys. Defaults to a random key.
+            timeout (float): Seconds to wait while the outbox is full. Defaults to enqueue_timeout.
+
+        Returns:
+            str: The key of the write, to pass to status().
+        '''
+        session = self.session if self.session is not None else Basecamp.default_session()
+        if not _same_account(session, url):
+            raise Exception(f"{url} does not belong to the account of the outbox session ({session.base_url}).")
+        key = key if key is not None else uuid.uuid4().hex
+        timeout = self.enqueue_timeout if timeout is None else timeout
+        with self.__changed:
+            if not self.__changed.wait_for(lambda: len(self) < self.max_pending, timeout):
+                raise Exception(f"Outbox is full: {self.max_pending} writes are waiting to be delivered.")
+            with self._lock, self._db:
+                self._db.execute(
+                    "INSERT OR IGNORE INTO outbox (key, url, body, created_at) VALUES (?, ?, ?, ?)",
+                    (key, url, json.dumps(body), time.time()),
+                )
+        self.__wake.set()
+        return key
+
+    def status(self, key: str) -> dict:
+        '''
+        Returns:
+            dict: State ("pending", "sending", "sent" or "failed"), attempts, status_code, error and, once sent, the
+            created record as result. None if the key is unknown.
+        '''
+        with self._lock:
+            row = self._db.execute("SELECT * FROM outbox WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        status = {name: row[name] for name in ("key", "url", "state", "attempts", "status_code", "error", "created_at", "sent_at")}
+        status["body"] = json.loads(row["body"])
+        status["result"] = json.loads(row["result"]) if row["result"] else None
+        return status
+
+    def stats(self) -> dict:
+        '''
+        Returns:
+            dict: Number of writes in each state.
+        '''
+        with self._lock:
+            rows = self._db.execute("SELECT state, COUNT(*) FROM outbox GROUP BY state").fetchall()
+        stats = {"pending": 0, "sending": 0, "sent": 0, "failed": 0}
+        stats.update({state: count for state, count in rows})
+        return stats
+
+    def requeue_failed(self) -> int:
+        '''
+        Queues every failed write again, with a fresh count of attempts.
+
+        Returns:
+            int: Number of writes queued again.
+        '''
+        with self._lock, self._db:
+            count = self._db.execute(
+                "UPDATE outbox SET state = 'pending', attempts = 0, next_attempt_at = 0 WHERE state = 'failed'"
+            ).rowcount
+        self.__wake.set()
+        return count
+
+    def purge(self, older_than: float = 7 * 24 * 60 * 60) -> int:
+        '''
+        Deletes delivered writes sent more than older_than seconds ago. Their keys are then forgotten.
+
+        Returns:
+            int: Number of writes deleted.
+        '''
+        with self._lock, self._db:
+            return self._db.execute("DELETE FROM outbox WHERE state = 'sent' AND sent_at < ?", (time.time() - older_than,)).rowcount
+
+    def start(self):
+        '''
+        Starts the background worker, if it is not running yet.
+        '''
+        if self.__worker is None:
+            self.__stopping.clear()
+            self.__worker = threading.Thread(target=self.__run, name="basecampapi-outbox", daemon=True)
+            self.__worker.start()
+
+    def flush(self, timeout: float = None) -> bool:
+        '''
+        Waits until every queued write was delivered or given up. Requires the background worker.
+
+        Returns:
+            bool: False if writes were still pending after timeout seconds.
+        '''
+        self.__wake.set()
+        with self.__changed:
+            return self.__changed.wait_for(lambda: len(self) == 0, timeout)
+
+    def close(self, timeout: float = 10.0):
+        '''
+        Stops the background worker, after the writes being sent are finished, and closes the database.
+        Undelivered writes stay in the file and are sent by the next Outbox opened on it.
+        '''
+        self.__stopping.set()
+        self.__wake.set()
+        if self.__worker is not None:
+            self.__worker.join(timeout)
+            self.__worker = None
+        if self.__executor is not None:
+            self.__executor.shutdown(wait=True)
+            self.__executor = None
+        with self._lock:
+            self._db.close()
+
+    def __run(self):
+        while not self.__stopping.is_set():
+            self.__wake.clear()
+            try:
+                self.drain()
+            except Exception:
+                logger.exception("Outbox worker failed; retrying")
+                self.__wake.wait(self.backoff_factor)
+                continue
+            self.__wake.wait(self.__next_due())
+
+    def __next_due(self) -> float:
+        with self._lock:
+            due = self._db.execute("SELECT MIN(next_attempt_at) FROM outbox WHERE state = 'pending'").fetchone()[0]
+        return None if due is None else max(0.0, due - time.time())
+
+    def drain(self) -> int:
+        '''
+        Delivers every write that is due, in batches of batch_size, and returns when none is left.
+
+        Returns:
+            int: Number of writes that were attempted.
+        '''
+        attempted = 0
+        while not self.__stopping.is_set():
+            groups = self.__claim()
+            if not groups:
+                return attempted
+            if len(groups) == 1:
+                attempted += self.__deliver(groups[0])
+            else:
+                from concurrent.futures import ThreadPoolExecutor
+
+                if self.__executor is None:
+                    self.__executor = ThreadPoolExecutor(max_workers=self.max_workers)
+                attempted += sum(self.__executor.map(self.__deliver, groups))
+        return attempted
+
+    def __claim(self) -> list:
+        # Takes due writes, at most batch_size, grouped by URL. A write is only taken when every earlier write to the
+        # same URL is taken with it, so that a write waiting for its next attempt holds back the ones behind it.
+        now = time.time()
+        groups, blocked, taken = {}, set(), 0
+        with self._lock, self._db:
+            for row in self._db.execute("SELECT * FROM outbox WHERE state IN ('pending', 'sending') ORDER BY id"):
+                if row["url"] in blocked:
+                    continue
+                if row["state"] == "sending" or row["next_attempt_at"] > now or taken >= self.batch_size:
+                    blocked.add(row["url"])
+                    continue
+                groups.setdefault(row["url"], []).append(row)
+                taken += 1
+            ids = [(now, row["id"]) for rows in groups.values() for row in rows]
+            self._db.executemany(
+                "UPDATE outbox SET state = 'sending', first_attempt_at = COALESCE(first_attempt_at, ?) WHERE id = ?", ids
+            )
+        return list(groups.values())
+
+    def __deliver(self, rows) -> int:
+        session = self.session if self.session is not None else Basecamp.default_session()
+        headers = {
+            'Authorization': 'Bearer ' + session.credentials['access_token'],
+            "Content-Type": "application/json",
+        }
+        updates = []
+        attempted = 0
+        if any(row["after_id"] is None for row in rows) and _same_account(session, rows[0]["url"]):
+            # Whatever is created by these writes gets a higher ID than the newest record listed now. The ID is stored
+            # before anything is sent, so that it is known if the process stops in the middle of a request.
+            try:
+                newest = self.__newest_id(session, headers, rows[0]["url"])
+            except Exception as exc:
+                logger.warning("Could not list %s before writing to it: %s", rows[0]["url"], exc)
+                delay = min(self.max_backoff, max(self.backoff_factor, 1.0))
+                with self._lock, self._db:
+                    self._db.executemany("UPDATE outbox SET state = 'pending', next_attempt_at = ? WHERE id = ?",
+                                         [(time.time() + delay, row["id"]) for row in rows])
+                with self.__changed:
+                    self.__changed.notify_all()
+                return 0
+            with self._lock, self._db:
+                self._db.executemany("UPDATE outbox SET after_id = ? WHERE id = ? AND after_id IS NULL",
+                                     [(newest, row["id"]) for row in rows])
+            rows = [dict(row, after_id=newest if row["after_id"] is None else row["after_id"]) for row in rows]
+        claimed = set()
+        for row in rows:
+            attempted += 1
+            update = self.__attempt(session, headers, row, claimed)
+            updates.append(update)
+            if update["state"] != "sent":
+                break
+            claimed.add(update["result_id"])
+
+        with self._lock, self._db:
+            self._db.executemany(
+                "UPDATE outbox SET state = :state, in_doubt = :in_doubt, attempts = :attempts, next_attempt_at = :next_attempt_at, "
+                "sent_at = :sent_at, status_code = :status_code, result = :result, result_id = :result_id, error = :error WHERE id = :id",
+                updates,
+            )
+            # Writes behind a failed one are handed back untouched.
+            self._db.executemany("UPDATE outbox SET state = 'pending' WHERE id = ?", [(row["id"],) for row in rows[len(updates):]])
+        with self.__changed:
+            self.__changed.notify_all()
+        return attempted
+
+    def __attempt(self, session, headers: dict, row, claimed: set) -> dict:
+        body = json.loads(row["body"])
+        update = {
+            "id": row["id"], "state": "pending", "in_doubt": row["in_doubt"], "attempts": row["attempts"] + 1,
+            "next_attempt_at": 0, "sent_at": None, "status_code": None, "result": None, "result_id": None, "error": None,
+        }
+        if not _same_account(session, row["url"]):
+            # Sending it would put the token of one account on a request to another.
+            update["error"] = f"{row['url']} does not belong to the account of the outbox session ({session.base_url})."
+            logger.warning("Write %s was not sent: %s", row["key"], update["error"])
+            return dict(update, state="failed")
+        try:
+            if row["in_doubt"]:
+                record = self.__find_delivered(session, headers, row, body, claimed)
+                if record is not None:
+                    logger.info("Write %s had already been delivered", row["key"])
+                    return dict(update, state="sent", in_doubt=0, sent_at=time.time(), result=json.dumps(record), result_id=record["id"])
+            response = session.transport.post(row["url"], headers=headers, json=body)
+        except Exception as exc:
+            update.update(in_doubt=1, error=str(exc))
+            response = None
+
+        if response is not None:
+            update["status_code"] = response.status_code
+            if response.ok:
+                record = response.json()
+                record_id = record.get("id") if isinstance(record, dict) else None
+                return dict(update, state="sent", in_doubt=0, sent_at=time.time(), result=json.dumps(record), result_id=record_id)
+            update["error"] = f"Status code: {response.status_code}. {response.reason}. Error text: {response.text}."
+            if response.status_code in RETRYABLE_STATUSES:
+                update["in_doubt"] = 1
+            elif response.status_code == 429:
+                update["in_doubt"] = 0
+            else:
+                logger.warning("Write %s was rejected: %s", row["key"], update["error"])
+                return dict(update, state="failed")
+
+        if update["attempts"] >= self.max_attempts:
+            logger.warning("Giving up on write %s after %d attempts: %s", row["key"], update["attempts"], update["error"])
+            return dict(update, state="failed")
+        delay = min(self.max_backoff, random.uniform(0, self.backoff_factor * (2 ** row["attempts"])))
+        if response is not None and response.status_code == 429:
+            delay = max(delay, retry_after(response.headers) or 0.0)
+        update["next_attempt_at"] = time.time() + delay
+        return update
+
+    @staticmethod
+    def __newest_id(session, headers: dict, url: str) -> int:
+        from .models import response_json
+
+        response = session.transport.get(url, headers=headers)
+        if not response.ok:
+            raise Exception(f"Status code: {response.status_code}. {response.reason}. Error text: {response.text}.")
+        return max((record["id"] for record in response_json(response)), default=0)
+
+    def __my_id(self, session, headers: dict) -> int:
+        # ID of the person the session acts as, to tell its records from identical ones posted by others.
+        key = token_key(session.credentials)
+        if key not in self.__people:
+            response = session.transport.get(f"{session.base_url}/my/profile.json", headers=headers)
+            if not response.ok:
+                raise Exception(f"Status code: {response.status_code}. {response.reason}. Error text: {response.text}.")
+            self.__people[key] = response.json()["id"]
+        return self.__people[key]
+
+    def __find_delivered(self, session, headers: dict, row, body: dict, claimed: set) -> dict:
+        # A write in doubt was delivered if its list holds a record with the same content, created by the session's
+        # user after the write was first attempted, that is not already the result of another write.
+        from .pagination import Paginator
+
+        me = self.__my_id(session, headers)
+        after_id = row["after_id"]
+        with self._lock:
+            taken = {result_id for (result_id,) in self._db.execute(
+                "SELECT result_id FROM outbox WHERE url = ? AND result_id IS NOT NULL AND id != ?", (row["url"], row["id"]),
+            )}
+        if after_id is not None:
+            until = lambda record: record["id"] <= after_id
+        else:
+            # Queued by an older version, before the newest ID was stored.
+            cutoff = (row["first_attempt_at"] or 0.0) - _CLOCK_SKEW
+            until = lambda record: _timestamp(record["created_at"]) < cutoff
+        for record in Paginator(session.transport, row["url"], headers, until=until):
+            if record["id"] in taken or record["id"] in claimed:
+                continue
+            if (record.get("creator") or {}).get("id") == me and _same(record, body):
+                return record
+        return None
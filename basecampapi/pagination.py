@@ -0,0 +1,109 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from .models import response_json
+
+_NEXT_LINK = re.compile(r'<([^>]+)>\s*;\s*rel="?next"?')
+
+
+def next_page_url(link_header) -> str:
+    '''
+    Extracts the URL of the next page from a Link response header.
+
+    Parameters:
+        link_header (str): Value of the Link header, e.g. '<https://...?page=2>; rel="next"'.
+
+    Returns:
+        str: URL of the next page, or None when there are no more pages.
+    '''
+    if not isinstance(link_header, str):
+        return None
+    match = _NEXT_LINK.search(link_header)
+    return match.group(1) if match else None
+
+
+class Paginator:
+
+    def __init__(self, transport, url: str, headers: dict, limit: int = None, until=None, prefetch: bool = False, model=None, fields=None):
+        '''
+        Lazily iterates over every record of a paginated Basecamp list, following the Link: rel="next" header.
+        Only one page is held in memory at a time (two when prefetching). Every iteration starts again from the first page.
+
+        Parameters:
+            transport (Transport): Transport used to send the requests.
+            url (str): URL of the first page.
+            headers (dict): Headers sent with every page request.
+            limit (int): Maximum number of records to yield. None yields everything.
+            until (callable): Stop condition. Iteration ends, without yielding it, at the first record for which until(record) is true.
+            prefetch (bool): Fetch the next page in a background thread while the current one is being consumed.
+            model (type): Optional Record subclass, e.g. Message; records are then yielded as models instead of dicts.
+            fields (iterable): With a model, the names of the fields to keep.
+        '''
+        self.transport = transport
+        self.headers = headers
+        self.limit = limit
+        self.until = until
+        self.prefetch = prefetch
+        self.model = model
+        self.fields = fields
+        self.url = url
+        self.page_url = None
+        self.next_url = url
+
+    def fetch_page(self, url: str):
+        '''
+        Downloads a single page.
+
+        Returns:
+            tuple: The list of records on the page and the URL of the next page (None on the last page).
+        '''
+        response = self.transport.get(url, headers=self.headers)
+        if not response.ok:
+            raise Exception(f"Status code: {response.status_code}. {response.reason}. Error text: {response.text}.")
+        records = response_json(response)
+        if self.model is not None:
+            records = [self.model.from_dict(record, self.fields) for record in records]
+        return records, next_page_url(response.headers.get("Link"))
+
+    def pages(self):
+        '''
+        Yields whole pages (lists of records) instead of single records, starting from the first page. While it runs,
+        page_url is the URL of the page last yielded and next_url the URL of the page after it.
+        '''
+        self.page_url = None
+        self.next_url = self.url
+        if not self.prefetch:
+            while self.next_url is not None:
+                self.page_url = self.next_url
+                records, self.next_url = self.fetch_page(self.page_url)
+                yield records
+            return
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            pending = executor.submit(self.fetch_page, self.next_url) if self.next_url else None
+            try:
+                while pending is not None:
+                    self.page_url = self.next_url
+                    records, self.next_url = pending.result()
+                    pending = executor.submit(self.fetch_page, self.next_url) if self.next_url else None
+                    yield records
+            finally:
+                if pending is not None:
+                    pending.cancel()
+
+    def __iter__(self):
+        if self.limit is not None and self.limit <= 0:
+            return
+        count = 0
+        pages = self.pages()
+        try:
+            for records in pages:
+                for record in records:
+                    if self.until is not None and self.until(record):
+                        return
+                    yield record
+                    count += 1
+                    if self.limit is not None and count >= self.limit:
+                        return
+        finally:
+            pages.close()
@@ -0,0 +1,37 @@
+class AdaptiveInterval:
+
+    def __init__(self, minimum: float = 2.0, maximum: float = 60.0, factor: float = 1.5):
+        '''
+        Poll interval that follows activity: it drops to `minimum` as soon as something new is seen and grows by
+        `factor` after every idle poll, up to `maximum`.
+
+        Parameters:
+            minimum (float): Seconds between polls while there is activity.
+            maximum (float): Longest wait between polls of an idle source.
+            factor (float): How much the interval grows after each idle poll.
+        '''
+        self.minimum = minimum
+        self.maximum = maximum
+        self.factor = factor
+        self.current = minimum
+
+    def update(self, active: bool) -> float:
+        '''
+        Records the outcome of a poll.
+
+        Returns:
+            float: Seconds to wait before the next poll.
+        '''
+        if active:
+            self.current = self.minimum
+        else:
+            self.current = min(self.maximum, self.current * self.factor)
+        return self.current
+
+
+def unseen(records, last_id) -> list:
+    '''
+    Returns the records with an id greater than last_id, oldest first. With last_id None every record is new.
+    '''
+    fresh = [record for record in records if last_id is None or record["id"] > last_id]
+    return sorted(fresh, key=lambda record: record["id"])
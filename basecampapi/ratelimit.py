@@ -0,0 +1,155 @@
+import json
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+IDEMPOTENT_METHODS = frozenset(["GET", "HEAD", "PUT", "DELETE", "OPTIONS"])
+RETRYABLE_STATUSES = (500, 502, 503, 504)
+
+
+class TokenBucket:
+
+    def __init__(self, capacity: int = 50, period: float = 10.0):
+        '''
+        Thread-safe token bucket that paces requests to a budget of `capacity` requests every `period` seconds.
+        Share one instance between sessions to make them share the budget.
+
+        Parameters:
+            capacity (int): Number of requests allowed in a burst.
+            period (float): Seconds it takes for an empty bucket to refill completely.
+        '''
+        self.capacity = capacity
+        self.period = period
+        self.rate = capacity / period
+        self._lock = threading.Lock()
+        self._tokens = float(capacity)
+        self._updated = self._now()
+        self._blocked_until = 0.0
+
+    def _now(self) -> float:
+        return time.monotonic()
+
+    def _take(self, state: dict, now: float) -> float:
+        tokens = min(self.capacity, state["tokens"] + (now - state["updated"]) * self.rate) - 1
+        state["tokens"] = tokens
+        state["updated"] = now
+        wait = -tokens / self.rate if tokens < 0 else 0.0
+        return max(wait, state["blocked_until"] - now)
+
+    def _block(self, state: dict, until: float):
+        state["blocked_until"] = max(state["blocked_until"], until)
+
+    def reserve(self) -> float:
+        '''
+        Takes a token from the bucket.
+
+        Returns:
+            float: Seconds the caller has to wait before sending its request.
+        '''
+        with self._lock:
+            state = {"tokens": self._tokens, "updated": self._updated, "blocked_until": self._blocked_until}
+            wait = self._take(state, self._now())
+            self._tokens, self._updated = state["tokens"], state["updated"]
+            return wait
+
+    def acquire(self):
+        '''
+        Blocks until a request may be sent.
+        '''
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        '''
+        Holds back every caller for the given number of seconds, e.g. after a 429 response with Retry-After.
+        '''
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, self._now() + seconds)
+
+
+class FileTokenBucket(TokenBucket):
+
+    def __init__(self, path: str, capacity: int = 50, period: float = 10.0):
+        '''
+        Token bucket whose state lives in a file, so that several processes on the same machine share one budget.
+
+        Parameters:
+            path (str): Location of the state file. It is created if it does not exist.
+            capacity (int): Number of requests allowed in a burst.
+            period (float): Seconds it takes for an empty bucket to refill completely.
+        '''
+        super().__init__(capacity=capacity, period=period)
+        self.path = path
+
+    def _now(self) -> float:
+        return time.time()
+
+    def _update(self, change):
+        import fcntl
+
+        with self._lock, open(self.path, "a+") as state_file:
+            fcntl.flock(state_file, fcntl.LOCK_EX)
+            try:
+                state_file.seek(0)
+                content = state_file.read()
+                now = self._now()
+                state = json.loads(content) if content else {"tokens": float(self.capacity), "updated": now, "blocked_until": 0.0}
+                result = change(state, now)
+                state_file.seek(0)
+                state_file.truncate()
+                json.dump(state, state_file)
+                state_file.flush()
+                os.fsync(state_file.fileno())
+                return result
+            finally:
+                fcntl.flock(state_file, fcntl.LOCK_UN)
+
+    def reserve(self) -> float:
+        return self._update(self._take)
+
+    def pause(self, seconds: float):
+        self._update(lambda state, now: self._block(state, now + seconds))
+
+
+def retry_after(headers) -> float:
+    '''
+    Parses a Retry-After header given either in seconds or as an HTTP date.
+
+    Returns:
+        float: Seconds to wait, or None if the header is missing or invalid.
+    '''
+    value = headers.get("Retry-After") if headers is not None else None
+    if not isinstance(value, str):
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_delay(method: str, status_code, headers, attempt: int, max_retries: int, backoff_factor: float) -> float:
+    '''
+    Decides whether a response should be retried.
+
+    429 responses are retried for every method, after Retry-After when given. 5xx responses are retried only for
+    idempotent methods, with full-jitter exponential backoff, so that a POST is never sent twice.
+
+    Returns:
+        float: Seconds to wait before retrying, or None if the response should be returned as it is.
+    '''
+    if attempt >= max_retries:
+        return None
+    backoff = random.uniform(0, backoff_factor * (2 ** attempt))
+    if status_code == 429:
+        delay = retry_after(headers)
+        return backoff if delay is None else delay
+    if status_code in RETRYABLE_STATUSES and method.upper() in IDEMPOTENT_METHODS:
+        return backoff
+    return None
@@ -0,0 +1,147 @@
+import threading
+import time
+from concurrent.futures import Future
+
+# Expired results are swept once the memo grows past this many entries.
+_SWEEP_SIZE = 1024
+
+
+def request_key(url: str, headers: dict = None, params=None) -> tuple:
+    '''
+    Returns the key under which identical GET requests are collapsed. The Authorization header is left out, since
+    every request of a session carries the same user's current token.
+    '''
+    return url, repr(params), tuple(sorted((name, value) for name, value in (headers or {}).items() if name != "Authorization"))
+
+
+class _Memo:
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.shared = 0
+        self._memo = {}
+
+    def _remembered(self, key):
+        entry = self._memo.get(key)
+        if entry is None:
+            return False, None
+        if entry[0] <= time.monotonic():
+            del self._memo[key]
+            return False, None
+        return True, entry[1]
+
+    def _remember(self, key, result, memoize):
+        if self.ttl <= 0 or (memoize is not None and not memoize(result)):
+            return
+        now = time.monotonic()
+        if len(self._memo) >= _SWEEP_SIZE:
+            self._memo = {other: entry for other, entry in self._memo.items() if entry[0] > now}
+        self._memo[key] = (now + self.ttl, result)
+
+    def forget(self):
+        '''
+        Drops every remembered result, e.g. after a write that may have changed them.
+        '''
+        self._memo = {}
+
+
+class SingleFlight(_Memo):
+
+    def __init__(self, ttl: float = 0.0):
+        '''
+        Collapses concurrent calls with the same key into one: the first caller runs the function while the others
+        wait for it, and all of them receive its result or exception. Thread-safe.
+
+        Parameters:
+            ttl (float): Seconds a successful result is also returned to later calls with the same key. 0 only
+                         shares results between calls that overlap.
+
+        The shared attribute counts the calls that were answered without running the function.
+        '''
+        super().__init__(ttl)
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, function, *args, memoize=None, **kwargs):
+        '''
+        Runs function(*args, **kwargs), unless a call with the same key is running or its result is remembered.
+
+        Parameters:
+            key: Hashable identity of the call.
+            function (callable): The function to run.
+            memoize (callable): Optional test of a result; only results for which it returns True are remembered.
+
+        Returns:
+            The function's result.
+        '''
+        with self._lock:
+            remembered, result = self._remembered(key)
+            if remembered:
+                self.shared += 1
+                return result
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+            else:
+                self.shared += 1
+        if not leader:
+            return future.result()
+
+        try:
+            result = function(*args, **kwargs)
+        except BaseException as exc:
+            with self._lock:
+                del self._calls[key]
+            future.set_exception(exc)
+            raise
+        with self._lock:
+            del self._calls[key]
+            self._remember(key, result, memoize)
+        future.set_result(result)
+        return result
+
+    def forget(self):
+        with self._lock:
+            super().forget()
+
+
+class AsyncSingleFlight(_Memo):
+
+    def __init__(self, ttl: float = 0.0):
+        '''
+        SingleFlight for asyncio tasks of one event loop. A waiter that is cancelled does not cancel the call it waits for.
+
+        Parameters:
+            ttl (float): Seconds a successful result is also returned to later calls with the same key.
+        '''
+        super().__init__(ttl)
+        self._calls = {}
+
+    async def do(self, key, coroutine_function, *args, memoize=None, **kwargs):
+        '''
+        Awaits coroutine_function(*args, **kwargs), unless a call with the same key is running or its result is remembered.
+
+        Returns:
+            The coroutine's result.
+        '''
+        import asyncio
+
+        remembered, result = self._remembered(key)
+        if remembered:
+            self.shared += 1
+            return result
+        task = self._calls.get(key)
+        if task is None:
+            task = self._calls[key] = asyncio.ensure_future(coroutine_function(*args, **kwargs))
+            task.add_done_callback(lambda done: self.__finish(key, done, memoize))
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    def __finish(self, key, task, memoize):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Retrieving the exception also keeps asyncio from warning when every waiter was cancelled.
+        if not task.cancelled() and task.exception() is None:
+            self._remember(key, task.result(), memoize)
@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Launchpad access tokens are valid for two weeks.
+DEFAULT_EXPIRES_IN = 14 * 24 * 60 * 60
+DEFAULT_TOKEN_CACHE = os.path.join(os.path.expanduser("~"), ".cache", "basecampapi", "tokens.json")
+
+
+def token_key(credentials: dict) -> str:
+    '''
+    Returns the key under which the access token for a set of credentials is stored.
+    The refresh token and client secret are hashed, so they never appear in the store.
+    '''
+    raw = "|".join(str(credentials.get(name, "")) for name in ("account_id", "client_id", "client_secret", "refresh_token"))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class TokenStore:
+    '''
+    Base class for access token stores. A token is a dict with "access_token" and "expires_at" (a UNIX timestamp).
+    '''
+
+    def __init__(self):
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _thread_lock(self, key: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def load(self, key: str) -> dict:
+        raise NotImplementedError
+
+    def save(self, key: str, token: dict):
+        raise NotImplementedError
+
+    @contextmanager
+    def lock(self, key: str):
+        '''
+        Held while a token is being refreshed, so that only one refresh per key happens at a time.
+        '''
+        with self._thread_lock(key):
+            yield
+
+
+class MemoryTokenStore(TokenStore):
+    '''
+    Keeps tokens in memory; share one instance between sessions of the same process.
+    '''
+
+    def __init__(self):
+        super().__init__()
+        self._tokens = {}
+
+    def load(self, key: str) -> dict:
+        return self._tokens.get(key)
+
+    def save(self, key: str, token: dict):
+        self._tokens[key] = dict(token)
+
+
+class FileTokenStore(TokenStore):
+    '''
+    Keeps tokens in a JSON file readable only by the current user, so that every process on the machine reuses them.
+    A lock file guarantees that concurrent processes refresh a token only once.
+    '''
+
+    def __init__(self, path: str = DEFAULT_TOKEN_CACHE):
+        '''
+        Parameters:
+            path (str): Location of the token file. It and its directory are created if they do not exist.
+        '''
+        super().__init__()
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path) as token_file:
+                return json.load(token_file)
+        except (OSError, ValueError):
+            return {}
+
+    def load(self, key: str) -> dict:
+        return self._read().get(key)
+
+    def save(self, key: str, token: dict):
+        tokens = self._read()
+        tokens[key] = dict(token)
+        temporary_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        descriptor = os.open(temporary_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(descriptor, "w") as token_file:
+            json.dump(tokens, token_file)
+        os.replace(temporary_path, self.path)
+
+    @contextmanager
+    def lock(self, key: str):
+        import fcntl
+
+        with self._thread_lock(key), open(f"{self.path}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def is_fresh(token: dict, margin: float) -> bool:
+    '''
+    Returns True if the token exists and does not expire within the next `margin` seconds.
+    '''
+    return bool(token) and "access_token" in token and token.get("expires_at", 0) - margin > time.time()
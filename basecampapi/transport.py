@@ -0,0 +1,209 @@
+import threading
+import time
+
+import requests
+
+from .metrics import RequestEvent, body_size, emit, endpoint_name
+from .ratelimit import retry_delay
+from .singleflight import request_key
+
+_CACHED_HEADERS = ("Link", "Content-Type", "X-Total-Count")
+
+
+class Transport:
+
+    def __init__(self, pool_size: int = 10, max_retries: int = 3, backoff_factor: float = 0.5, timeout: float = None, cache=None, rate_limiter=None, hooks=None, single_flight=None):
+        '''
+        Pooled HTTP transport shared by a Basecamp session and every endpoint object created from it.
+        Connections are kept alive between requests, so only the first call to a host pays for the TCP and TLS handshake.
+        Requests are paced by the rate limiter; 429 responses are retried after Retry-After, and 5xx responses to
+        idempotent requests are retried with jittered exponential backoff.
+
+        Parameters:
+            pool_size (int): Maximum number of connections kept open per host.
+            max_retries (int): How many times a failed connection, a 429 or a 5xx response is retried.
+            backoff_factor (float): Base delay in seconds for the exponential backoff between retries.
+            timeout (float): Default timeout in seconds for each request. None waits indefinitely.
+            cache (ResponseCache): Optional cache used to turn repeated GET requests into conditional requests.
+            rate_limiter (TokenBucket): Optional limiter every request waits on before it is sent.
+            hooks (list): Callables called with a RequestEvent after every attempt, e.g. Metrics or LoggingHook objects.
+            single_flight (SingleFlight): Optional; identical GET requests sent at the same time from several threads
+                then share one network call and its response. Any other request drops the results it remembers.
+
+        The `auth` attribute may be set to an object with access_token() and reauthenticate(token) methods, such as a
+        Basecamp session; requests that carry an Authorization header then always use its current token and are
+        retried once after a 401 response.
+        '''
+        from requests.adapters import HTTPAdapter, Retry
+
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.timeout = timeout
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.auth = None
+        self.hooks = list(hooks or ())
+        self.single_flight = single_flight
+        self.in_flight = 0
+        self.__in_flight_lock = threading.Lock()
+        self.session = requests.Session()
+
+        # Only connection failures are retried at this level; status codes are handled in request().
+        retries = Retry(total=max_retries, backoff_factor=backoff_factor, respect_retry_after_header=False, raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def request(self, method: str, url: str, **kwargs):
+        '''
+        Sends a request through the pooled session.
+
+        Parameters:
+            method (str): HTTP method, e.g. "GET" or "POST".
+            url (str): Absolute URL of the request.
+            **kwargs: Any additional arguments accepted by requests.Session.request.
+
+        Returns:
+            requests.Response: The response received from the server.
+        '''
+        if self.single_flight is None or kwargs.get("stream"):
+            return self._request(method, url, **kwargs)
+        if method.upper() != "GET":
+            try:
+                return self._request(method, url, **kwargs)
+            finally:
+                self.single_flight.forget()
+        key = request_key(url, kwargs.get("headers"), kwargs.get("params"))
+        return self.single_flight.do(key, self._request, method, url, memoize=lambda response: response.ok, **kwargs)
+
+    def _request(self, method: str, url: str, **kwargs):
+        if self.timeout is not None:
+            kwargs.setdefault("timeout", self.timeout)
+
+        body = kwargs.get("data")
+        body_position = body.tell() if hasattr(body, "seek") and hasattr(body, "tell") else None
+        authorized = self.auth is not None and "Authorization" in (kwargs.get("headers") or {})
+        reauthenticated = False
+        attempt = 0
+        while True:
+            if authorized:
+                token = self.auth.access_token()
+                kwargs["headers"] = dict(kwargs["headers"], Authorization="Bearer " + token)
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            if self.hooks:
+                response, report = self._observed_send(method, url, attempt, **kwargs)
+            else:
+                response, report = self._send(method, url, **kwargs), None
+
+            if response.status_code == 401 and authorized and not reauthenticated and self._rewind(body, body_position):
+                if report is not None:
+                    report("retry")
+                response.close()
+                self.auth.reauthenticate(token)
+                reauthenticated = True
+                continue
+
+            delay = retry_delay(method, response.status_code, response.headers, attempt, self.max_retries, self.backoff_factor)
+            if delay is None or not self._rewind(body, body_position):
+                if report is not None:
+                    report("response")
+                return response
+            if report is not None:
+                report("retry")
+            if response.status_code == 429 and self.rate_limiter is not None:
+                self.rate_limiter.pause(delay)
+            response.close()
+            time.sleep(delay)
+            attempt += 1
+
+    def _observed_send(self, method: str, url: str, attempt: int, **kwargs):
+        with self.__in_flight_lock:
+            self.in_flight += 1
+            in_flight = self.in_flight
+        started_at = time.time()
+        start = time.perf_counter()
+        try:
+            response = self._send(method, url, **kwargs)
+        except Exception as exc:
+            event = RequestEvent("error", method, endpoint_name(url), url, None, time.perf_counter() - start, None, 0,
+                                 attempt, False, in_flight, self.pool_size, str(exc), started_at)
+            emit(self.hooks, event)
+            raise
+        finally:
+            with self.__in_flight_lock:
+                self.in_flight -= 1
+        duration = time.perf_counter() - start
+
+        def report(kind: str):
+            content = getattr(response, "_content", None)
+            # The prepared request knows the encoded size of json= bodies and of files.
+            length = getattr(getattr(response, "request", None), "headers", {}).get("Content-Length")
+            sent = int(length) if isinstance(length, str) and length.isdigit() else body_size(kwargs.get("data"))
+            event = RequestEvent(kind, method, endpoint_name(url), url, response.status_code, duration, sent,
+                                 len(content) if isinstance(content, bytes) else None, attempt,
+                                 getattr(response, "from_cache", False) is True, in_flight, self.pool_size, None, started_at)
+            emit(self.hooks, event)
+
+        return response, report
+
+    @staticmethod
+    def _rewind(body, position) -> bool:
+        if body is None or isinstance(body, (bytes, bytearray, str, dict, list, tuple)):
+            return True
+        if position is not None:
+            try:
+                body.seek(position)
+            except OSError:
+                return False
+            return True
+        return False
+
+    def _send(self, method: str, url: str, **kwargs):
+        if self.cache is not None and method == "GET" and not kwargs.get("params"):
+            return self._conditional_get(url, **kwargs)
+        return self.session.request(method, url, **kwargs)
+
+    def _conditional_get(self, url: str, **kwargs):
+        entry = self.cache.get(url)
+        if entry is not None:
+            headers = dict(kwargs.get("headers") or {})
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+            kwargs["headers"] = headers
+
+        response = self.session.request("GET", url, **kwargs)
+
+        if response.status_code == 304 and entry is not None:
+            self.cache.record_not_modified()
+            response.status_code = 200
+            response.reason = "OK"
+            response._content = entry.body
+            for name, value in entry.headers.items():
+                response.headers.setdefault(name, value)
+            response.from_cache = True
+        elif response.status_code == 200:
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            if etag or last_modified:
+                headers = {name: response.headers[name] for name in _CACHED_HEADERS if name in response.headers}
+                self.cache.set(url, etag, last_modified, response.content, headers)
+        return response
+
+    def get(self, url: str, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url: str, **kwargs):
+        return self.request("PUT", url, **kwargs)
+
+    def close(self):
+        '''
+        Closes every pooled connection.
+        '''
+        self.session.close()
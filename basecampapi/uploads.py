@@ -0,0 +1,251 @@
+import hashlib
+import io
+import sqlite3
+import threading
+import time
+from mimetypes import MimeTypes
+
+import filetype
+
+# filetype needs at most this many bytes from the start of a file to recognise it.
+SNIFF_SIZE = 261
+CHUNK_SIZE = 64 * 1024
+
+
+def sniff_mime(head: bytes, name: str = None) -> str:
+    '''
+    Guesses the MIME type of an upload from its first bytes, falling back to its name.
+
+    Parameters:
+        head (bytes): The first bytes of the content. SNIFF_SIZE bytes are enough.
+        name (str): File name used when the content is not recognised.
+
+    Returns:
+        str: The MIME type, "application/octet-stream" when nothing matches.
+    '''
+    kind = filetype.guess(bytes(head[:SNIFF_SIZE])) if head else None
+    if kind is not None:
+        return kind.mime
+    if name:
+        guessed = MimeTypes().guess_type(name)[0]
+        if guessed:
+            return guessed
+    return "application/octet-stream"
+
+
+def file_mime(path: str) -> str:
+    '''
+    Guesses the MIME type of a file from its extension, falling back to its first bytes.
+
+    Returns:
+        str: The MIME type, "application/octet-stream" when nothing matches.
+    '''
+    mime = MimeTypes().guess_type(path)[0]
+    if mime is not None:
+        return mime
+    with open(path, "rb") as file_bytes:
+        return sniff_mime(file_bytes.read(SNIFF_SIZE))
+
+
+class UploadBody:
+
+    def __init__(self, source, size: int = None, progress=None, chunk_size: int = CHUNK_SIZE, digest=None):
+        '''
+        File-like request body that streams an upload from a buffer, a file object or an iterable of byte chunks
+        without reading all of it into memory.
+
+        Parameters:
+            source: bytes, bytearray, memoryview, a binary file object, or an iterable yielding bytes.
+            size (int): Total size in bytes. Determined automatically for buffers and seekable files; when it stays
+                unknown the body is sent with chunked transfer encoding.
+            progress (callable): Called as progress(bytes_sent, total_bytes) after every chunk; total_bytes may be None.
+            chunk_size (int): Number of bytes handed to the connection at a time.
+            digest: Optional hashlib object updated with every byte sent.
+        '''
+        self.progress = progress
+        self.digest = digest
+        self.chunk_size = chunk_size
+        self._pending = b""
+        self._sent = 0
+        self._view = None
+        self._file = None
+        self._chunks = None
+        self._start = 0
+
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            self._view = memoryview(source).cast("B")
+            size = len(self._view)
+        elif hasattr(source, "read"):
+            self._file = source
+            if size is None and self._seekable():
+                self._start = source.tell()
+                size = source.seek(0, io.SEEK_END) - self._start
+                source.seek(self._start)
+        else:
+            self._chunks = iter(source)
+        self.len = size
+
+    def _seekable(self) -> bool:
+        try:
+            return self._file.seekable()
+        except AttributeError:
+            return False
+
+    def _read_source(self, size: int) -> bytes:
+        if self._view is not None:
+            position = self._sent + len(self._pending)
+            return bytes(self._view[position:position + size])
+        if self._file is not None:
+            return self._file.read(size)
+        try:
+            return bytes(next(self._chunks))
+        except StopIteration:
+            return b""
+
+    def peek(self, size: int = SNIFF_SIZE) -> bytes:
+        '''
+        Returns up to `size` bytes from the current position without consuming them.
+        '''
+        while len(self._pending) < size:
+            chunk = self._read_source(size - len(self._pending))
+            if not chunk:
+                break
+            self._pending += chunk
+        return self._pending[:size]
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = self.chunk_size
+        if self._pending:
+            data, self._pending = self._pending[:size], self._pending[size:]
+        else:
+            data = self._read_source(size)
+            if len(data) > size:
+                data, self._pending = data[:size], data[size:]
+        if data:
+            if self.digest is not None:
+                self.digest.update(data)
+            self._sent += len(data)
+            if self.progress is not None:
+                self.progress(self._sent, self.len)
+        return data
+
+    def __iter__(self):
+        while True:
+            chunk = self.read(self.chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    def tell(self) -> int:
+        return self._sent
+
+    def seek(self, position: int, whence: int = io.SEEK_SET) -> int:
+        '''
+        Rewinds the body so that a request can be retried. Only possible for buffers and seekable files.
+        '''
+        if whence != io.SEEK_SET or (self._view is None and not (self._file is not None and self._seekable())):
+            raise io.UnsupportedOperation("This upload source cannot be rewound.")
+        if self._file is not None:
+            self._file.seek(self._start + position)
+        if self.digest is not None and position != self._sent:
+            self.digest = hashlib.blake2b(digest_size=32) if position == 0 else None
+        self._pending = b""
+        self._sent = position
+        return position
+
+
+def content_digest(source, chunk_size: int = CHUNK_SIZE) -> str:
+    '''
+    Computes the BLAKE2b digest of a buffer, a path or a seekable binary file, reading files in chunks.
+    A file is rewound to where it was, so it can be uploaded afterwards.
+
+    Parameters:
+        source: bytes, bytearray, memoryview, a path (str) or a seekable binary file object.
+
+    Returns:
+        str: The hex digest.
+    '''
+    digest = hashlib.blake2b(digest_size=32)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        digest.update(memoryview(source).cast("B"))
+    elif isinstance(source, str):
+        with open(source, "rb") as file_bytes:
+            for chunk in iter(lambda: file_bytes.read(chunk_size), b""):
+                digest.update(chunk)
+    else:
+        position = source.tell()
+        for chunk in iter(lambda: source.read(chunk_size), b""):
+            digest.update(chunk)
+        source.seek(position)
+    return digest.hexdigest()
+
+
+class UploadCache:
+
+    def __init__(self, path: str = ":memory:", max_entries: int = 10000):
+        '''
+        Persistent map from uploaded content to its attachable sgid, so identical files are uploaded only once.
+        Entries are keyed by account, content digest and upload name; the least recently used ones are evicted first.
+
+        Parameters:
+            path (str): Location of the SQLite database file. The default keeps the cache in memory only.
+            max_entries (int): Maximum number of sgids kept.
+        '''
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS uploads ("
+            "account_id TEXT, digest TEXT, name TEXT, sgid TEXT, file_size INTEGER, content_type TEXT, used_at REAL, "
+            "PRIMARY KEY (account_id, digest, name))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS uploads_used_at ON uploads (used_at)")
+
+    @property
+    def stats(self) -> dict:
+        '''
+        Counters for monitoring: hits (uploads skipped), misses (uploads sent) and hit_rate.
+        '''
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / lookups if lookups else 0.0}
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM uploads").fetchone()[0]
+
+    def get(self, account_id, digest: str, name: str) -> dict:
+        '''
+        Returns the stored upload as a dict with sgid, file_size and content_type, or None.
+        '''
+        with self._lock:
+            row = self._db.execute(
+                "SELECT sgid, file_size, content_type FROM uploads WHERE account_id = ? AND digest = ? AND name = ?",
+                (str(account_id), digest, name),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._db.execute(
+                "UPDATE uploads SET used_at = ? WHERE account_id = ? AND digest = ? AND name = ?",
+                (time.time(), str(account_id), digest, name),
+            )
+            return {"sgid": row[0], "file_size": row[1], "content_type": row[2]}
+
+    def put(self, account_id, digest: str, name: str, sgid: str, file_size: int, content_type: str):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO uploads (account_id, digest, name, sgid, file_size, content_type, used_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (str(account_id), digest, name, sgid, file_size, content_type, time.time()),
+            )
+            self._db.execute(
+                "DELETE FROM uploads WHERE rowid IN (SELECT rowid FROM uploads ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def close(self):
+        self._db.close()
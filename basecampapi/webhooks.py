@@ -0,0 +1,245 @@
+import fnmatch
+import hmac
+import json
+import logging
+import queue
+import threading
+from collections import namedtuple
+from urllib.parse import parse_qs
+
+from .models import CampfireLine, Comment, Message, loads
+
+logger = logging.getLogger(__name__)
+
+WebhookEvent = namedtuple("WebhookEvent", ["id", "kind", "type", "project_id", "recording", "creator_name", "created_at", "raw"])
+WebhookEvent.__doc__ = '''
+A webhook delivered by Basecamp. kind is the event, e.g. "message_created", "comment_created" or
+"chat_line_created"; type is the recording type, e.g. "Message". recording is a Message, Comment or CampfireLine
+(the same objects iter_messages(typed=True) returns), or the recording dict for other types. raw is the whole payload.
+'''
+
+_MODELS = {"Message": Message, "Comment": Comment}
+
+# Path segment of each list a recording type appears in, under its parent's URL.
+_LISTS = {"Message": "messages.json", "Chat::Lines::Text": "lines.json", "Chat::Lines::RichText": "lines.json"}
+
+
+def parse_event(body) -> WebhookEvent:
+    '''
+    Parses the body of a Basecamp webhook request.
+
+    Parameters:
+        body (bytes, str or dict): The JSON payload.
+
+    Returns:
+        WebhookEvent: The event, with the recording converted to its typed model.
+    '''
+    payload = loads(body) if isinstance(body, (bytes, bytearray, str)) else body
+    if not isinstance(payload, dict) or not isinstance(payload.get("kind"), str) or not isinstance(payload.get("recording"), dict):
+        raise ValueError("Not a Basecamp webhook payload.")
+    recording = payload["recording"]
+    kind = recording.get("type")
+    model = CampfireLine if isinstance(kind, str) and kind.startswith("Chat::Lines") else _MODELS.get(kind)
+    return WebhookEvent(
+        payload.get("id"),
+        payload["kind"],
+        kind,
+        (recording.get("bucket") or {}).get("id"),
+        model.from_dict(recording) if model is not None else recording,
+        (payload.get("creator") or {}).get("name"),
+        payload.get("created_at"),
+        payload,
+    )
+
+
+def stale_urls(recording: dict) -> list:
+    '''
+    Returns the API URLs whose responses change when a recording is created, changed or trashed: the recording
+    itself and the first page of the list it appears in.
+    '''
+    urls = [recording["url"]] if recording.get("url") else []
+    parent = recording.get("parent") or {}
+    if recording.get("type") == "Comment" and recording.get("url") and parent.get("id"):
+        account_url = recording["url"].split("/buckets/")[0]
+        urls.append(f"{account_url}/buckets/{(recording.get('bucket') or {}).get('id')}/recordings/{parent['id']}/comments.json")
+    elif recording.get("type") in _LISTS and parent.get("url", "").endswith(".json"):
+        urls.append(parent["url"][:-len(".json")] + "/" + _LISTS[recording["type"]])
+    return urls
+
+
+class WebhookReceiver:
+
+    def __init__(self, secret: str = None, cache=None, mirror=None, workers: int = 2, queue_size: int = 1000, start: bool = True):
+        '''
+        Receives Basecamp webhooks. It is a WSGI application, and its asgi attribute is the same receiver as an ASGI
+        application. Accepted events are put on a bounded queue and answered at once; worker threads then drop the
+        affected responses from the cache, update the mirror and call the registered handlers.
+
+        Basecamp does not sign webhook requests, so the secret is checked against the token query parameter of the
+        payload URL: register the webhook as https://example.com/basecamp?token=<secret>.
+
+        Parameters:
+            secret (str): Token every request must carry. None accepts every request.
+            cache (ResponseCache): Cache whose entries for changed recordings are dropped.
+            mirror (Mirror): Mirror that changed messages and comments are written to.
+            workers (int): Number of threads that process events.
+            queue_size (int): Maximum number of events waiting to be processed. When the queue is full, requests are
+                answered with 503 and Basecamp delivers them again later.
+            start (bool): Start the worker threads. Without it, events are processed by calling process().
+        '''
+        self.secret = secret
+        self.cache = cache
+        self.mirror = mirror
+        self.workers = workers
+        self.handlers = []
+        self.events = queue.Queue(maxsize=queue_size)
+        self.__threads = []
+        if start:
+            self.start()
+
+    def on(self, *kinds):
+        '''
+        Decorator that registers a handler, called with every WebhookEvent whose kind matches one of the patterns,
+        e.g. @receiver.on("message_created", "comment_*"). Without patterns, the handler receives every event.
+        '''
+        def decorator(handler):
+            self.handlers.append((kinds, handler))
+            return handler
+        return decorator
+
+    def receive(self, body: bytes, token: str = None) -> int:
+        '''
+        Verifies, parses and queues one webhook request.
+
+        Returns:
+            int: The HTTP status to answer with.
+        '''
+        if self.secret is not None and not hmac.compare_digest((token or "").encode(), self.secret.encode()):
+            return 403
+        try:
+            event = parse_event(body)
+        except ValueError:
+            return 400
+        try:
+            self.events.put_nowait(event)
+        except queue.Full:
+            logger.warning("Webhook queue is full; Basecamp will deliver event %s again", event.id)
+            return 503
+        return 200
+
+    def process(self, event: WebhookEvent):
+        '''
+        Applies one event to the cache and the mirror, then calls the matching handlers. A failing handler is logged.
+        '''
+        recording = event.raw["recording"]
+        if self.cache is not None:
+            for url in stale_urls(recording):
+                self.cache.delete(url)
+        if self.mirror is not None:
+            self.mirror.store(recording)
+        for kinds, handler in self.handlers:
+            if not kinds or any(fnmatch.fnmatchcase(event.kind, pattern) for pattern in kinds):
+                try:
+                    handler(event)
+                except Exception:
+                    logger.exception("Webhook handler %r failed on event %s", handler, event.id)
+
+    def start(self):
+        '''
+        Starts the worker threads, if they are not running yet.
+        '''
+        while len(self.__threads) < self.workers:
+            thread = threading.Thread(target=self.__work, name="basecampapi-webhooks", daemon=True)
+            thread.start()
+            self.__threads.append(thread)
+
+    def close(self, timeout: float = 10.0):
+        '''
+        Processes the events still queued, then stops the worker threads.
+        '''
+        for _ in self.__threads:
+            self.events.put(None)
+        for thread in self.__threads:
+            thread.join(timeout)
+        self.__threads = []
+
+    def __work(self):
+        while True:
+            event = self.events.get()
+            try:
+                if event is None:
+                    return
+                self.process(event)
+            except Exception:
+                logger.exception("Processing webhook event %s failed", event.id)
+            finally:
+                self.events.task_done()
+
+    def __call__(self, environ, start_response):
+        if environ.get("REQUEST_METHOD") != "POST":
+            status = 405
+        else:
+            length = int(environ.get("CONTENT_LENGTH") or 0)
+            body = environ["wsgi.input"].read(length) if length else b""
+            status = self.receive(body, self.__token(environ.get("QUERY_STRING", "")))
+        reply = json.dumps({"status": status}).encode()
+        start_response(f"{status} {_REASONS[status]}", [("Content-Type", "application/json"), ("Content-Length", str(len(reply)))])
+        return [reply]
+
+    async def asgi(self, scope, receive, send):
+        '''
+        The receiver as an ASGI application, e.g. for uvicorn: uvicorn module:receiver.asgi
+        '''
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+
+        if scope["method"] != "POST":
+            status = 405
+        else:
+            body = b""
+            while True:
+                message = await receive()
+                body += message.get("body", b"")
+                if not message.get("more_body"):
+                    break
+            query = scope.get("query_string", b"").decode("latin-1")
+            status = self.receive(body, self.__token(query))
+        reply = json.dumps({"status": status}).encode()
+        await send({"type": "http.response.start", "status": status, "headers": [
+            (b"content-type", b"application/json"), (b"content-length", str(len(reply)).encode()),
+        ]})
+        await send({"type": "http.response.body", "body": reply})
+
+    @staticmethod
+    def __token(query: str) -> str:
+        return (parse_qs(query).get("token") or [None])[0]
+
+
+_REASONS = {200: "OK", 400: "Bad Request", 403: "Forbidden", 405: "Method Not Allowed", 503: "Service Unavailable"}
+
+
+def serve(receiver: WebhookReceiver, host: str = "127.0.0.1", port: int = 8080):
+    '''
+    Serves a receiver with the standard library's WSGI server, one thread per request, until interrupted.
+    '''
+    from socketserver import ThreadingMixIn
+    from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+    class Server(ThreadingMixIn, WSGIServer):
+        daemon_threads = True
+
+    class Handler(WSGIRequestHandler):
+        def log_message(self, format, *args):
+            logger.debug("%s - " + format, self.address_string(), *args)
+
+    with make_server(host, port, receiver, server_class=Server, handler_class=Handler) as server:
+        logger.info("Receiving webhooks on http://%s:%d", host, server.server_port)
+        server.serve_forever()
@@ -0,0 +1,73 @@
+"""
+Compares decode time and memory of plain dicts (stdlib json) against the fast JSON backend and the typed models.
+
+Run with:
+    python -m benchmarks.bench_models [records]
+"""
+import gc
+import json
+import sys
+import time
+import tracemalloc
+
+from basecampapi.models import JSON_BACKEND, Message, loads
+
+
+def sample(count: int) -> bytes:
+    records = []
+    for index in range(count):
+        records.append({
+            "id": 1000000 + index,
+            "status": "active",
+            "visible_to_clients": False,
+            "created_at": "2024-01-01T10:00:00.000Z",
+            "updated_at": "2024-01-02T10:00:00.000Z",
+            "title": f"Weekly update {index}",
+            "inherits_status": True,
+            "type": "Message",
+            "url": f"https://3.basecampapi.com/99/buckets/1/messages/{index}.json",
+            "app_url": f"https://3.basecamp.com/99/buckets/1/messages/{index}",
+            "comments_count": index % 7,
+            "comments_url": f"https://3.basecampapi.com/99/buckets/1/recordings/{index}/comments.json",
+            "parent": {"id": 2, "title": "Message Board", "type": "Message::Board", "url": "https://3.basecampapi.com/99/buckets/1/message_boards/2.json"},
+            "bucket": {"id": 1, "name": "The Leto Laptop", "type": "Project"},
+            "creator": {
+                "id": 1049715913, "attachable_sgid": "BAh7CEkiCGdpZAY6BkVU", "name": "Victor Cooper",
+                "email_address": "victor@honchodesign.com", "personable_type": "User", "title": "Chief Strategist",
+                "avatar_url": "https://3.basecamp.com/99/people/avatar", "company": {"id": 1033447817, "name": "Honcho Design"},
+            },
+            "subject": f"Weekly update {index}",
+            "content": "<div>Here is what happened this week. " * 5 + "</div>",
+        })
+    return json.dumps(records).encode()
+
+
+def measure(name: str, decode, payload: bytes, repeat: int = 3):
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        decode(payload)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    gc.collect()
+    tracemalloc.start()
+    result = decode(payload)
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    print(f"{name:<34} decode {best * 1000:8.1f} ms   held {held / 1024 / 1024:7.1f} MiB")
+
+
+def main(count: int = 20000):
+    payload = sample(count)
+    print(f"{count} messages, {len(payload) / 1024 / 1024:.1f} MiB of JSON, fast backend: {JSON_BACKEND}")
+    measure("json.loads (dicts)", json.loads, payload)
+    measure(f"{JSON_BACKEND}.loads (dicts)", loads, payload)
+    measure("Message models", Message.decode, payload)
+    measure("Message models, 3 fields", lambda data: Message.decode(data, fields=("id", "subject", "creator_name")), payload)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,48 @@
+"""
+Compares per-request latency of module-level requests calls against the pooled Transport.
+
+Run with:
+    python -m benchmarks.bench_transport [iterations]
+"""
+import statistics
+import sys
+import time
+
+import requests
+
+from basecampapi.transport import Transport
+
+from .stub_server import StubServer
+
+
+def measure(send, url: str, iterations: int) -> list:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        send(url).raise_for_status()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(name: str, timings: list):
+    timings = sorted(timings)
+    p50 = statistics.median(timings)
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    print(f"{name:<24} mean {statistics.mean(timings):7.3f} ms   p50 {p50:7.3f} ms   p99 {p99:7.3f} ms")
+
+
+def main(iterations: int = 500):
+    with StubServer() as server:
+        url = f"{server.url}/99/buckets/1/chats/2/lines.json"
+
+        report("requests.get", measure(requests.get, url, iterations))
+
+        transport = Transport()
+        try:
+            report("Transport.get (pooled)", measure(transport.get, url, iterations))
+        finally:
+            transport.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
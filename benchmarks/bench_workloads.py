@@ -0,0 +1,158 @@
+"""
+Runs representative client workloads against the local stub server and reports throughput, request latency
+percentiles and peak memory, so that regressions in the client's hot paths show up without a Basecamp account.
+
+Workloads:
+    post      bulk posting of campfire lines with Basecamp.post_lines
+    crawl     board crawl with MessageBoard.fetch_thread_tree (paginated messages and comments)
+    upload    upload fan-out with Attachments.upload_many
+    poll      conditional polling of an idle campfire (ETag / 304)
+    throttle  bulk posting while the server answers every 10th request with 429
+
+Run with:
+    python -m benchmarks.bench_workloads [--scale N] [--latency MS] [--json] [workload ...]
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from basecampapi import Basecamp
+from basecampapi.ratelimit import TokenBucket
+from basecampapi.tokens import MemoryTokenStore
+
+from .stub_server import StubServer, StubState
+
+CREDENTIALS = {
+    "account_id": 99,
+    "client_id": "bench",
+    "client_secret": "bench",
+    "redirect_uri": "http://localhost",
+    "refresh_token": "bench",
+}
+
+
+def session(server: StubServer, timings: list, **kwargs) -> Basecamp:
+    # The budget is raised so that the client, not the rate limiter, is measured.
+    kwargs.setdefault("rate_limiter", TokenBucket(capacity=1000000, period=1))
+    return Basecamp(
+        credentials=dict(CREDENTIALS),
+        token_store=MemoryTokenStore(),
+        hooks=[lambda event: timings.append(event.duration)],
+        api_url=server.url,
+        launchpad_url=server.url,
+        **kwargs,
+    )
+
+
+def post(server: StubServer, bc: Basecamp, scale: int) -> int:
+    lines = [(1, chat, f"line {index}") for index in range(scale * 20) for chat in (1, 2, 3, 4)]
+    results = bc.post_lines(lines, max_workers=4)
+    assert all(result.ok for result in results)
+    return len(lines)
+
+
+def crawl(server: StubServer, bc: Basecamp, scale: int) -> int:
+    threads = bc.message_board(project_id=1, message_board_id=1).fetch_thread_tree(max_workers=8)
+    assert len(threads) == len(server.state.messages)
+    return len(threads) + sum(len(thread["comments"]) for thread in threads)
+
+
+def upload(server: StubServer, bc: Basecamp, scale: int) -> int:
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for index in range(scale * 8):
+            path = os.path.join(directory, f"file{index}.bin")
+            with open(path, "wb") as handle:
+                handle.write(os.urandom(256 * 1024))
+            paths.append(path)
+        sgids = bc.attachments().upload_many(paths, max_workers=4)
+        assert len(set(sgids)) == len(paths)
+        return len(paths)
+
+
+def poll(server: StubServer, bc: Basecamp, scale: int) -> int:
+    campfire = bc.campfire(project_id=1, campfire_id=9)
+    lines, etag = campfire.poll_lines()
+    last_id = lines[-1]["id"]
+    for _ in range(scale * 50):
+        lines, etag = campfire.poll_lines(last_id, etag)
+        assert not lines
+    return scale * 50
+
+
+WORKLOADS = {
+    "post": (post, {}, {}),
+    "crawl": (crawl, {"messages": 60, "comments_per_message": 5}, {}),
+    "upload": (upload, {}, {}),
+    "poll": (poll, {"lines": 20}, {}),
+    "throttle": (post, {"throttle_every": 10}, {"max_retries": 5}),
+}
+
+
+def execute(name: str, scale: int, latency: float, trace_memory: bool) -> dict:
+    workload, state_options, session_options = WORKLOADS[name]
+    state_options = dict(state_options)
+    if name == "crawl":
+        state_options["messages"] *= scale
+    timings = []
+    with StubServer(state=StubState(latency=latency, **state_options)) as server:
+        bc = session(server, timings, **session_options)
+        timings.clear()
+        if trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        operations = workload(server, bc, scale)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else 0
+        if trace_memory:
+            tracemalloc.stop()
+        bc.close()
+        throttled = server.state.throttled
+    return {"operations": operations, "seconds": elapsed, "timings": sorted(timings), "peak": peak, "throttled": throttled}
+
+
+def run(name: str, scale: int, latency: float) -> dict:
+    # tracemalloc slows every allocation down, so memory is measured in a second, untimed run.
+    timed = execute(name, scale, latency, trace_memory=False)
+    traced = execute(name, scale, latency, trace_memory=True)
+    timings = timed["timings"]
+    return {
+        "workload": name,
+        "operations": timed["operations"],
+        "requests": len(timings),
+        "seconds": timed["seconds"],
+        "operations_per_second": timed["operations"] / timed["seconds"],
+        "p50_ms": statistics.median(timings) * 1000 if timings else 0.0,
+        "p99_ms": timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1000 if timings else 0.0,
+        "peak_memory_mib": traced["peak"] / 1024 / 1024,
+        "throttled": timed["throttled"],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("workloads", nargs="*", help=f"Workloads to run: {', '.join(WORKLOADS)} (default: all).")
+    parser.add_argument("--scale", type=int, default=1, help="Multiplies the size of every workload.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Milliseconds the stub server waits before each response.")
+    parser.add_argument("--json", action="store_true", help="Print one JSON object per workload, e.g. to compare runs.")
+    args = parser.parse_args(argv)
+    unknown = sorted(set(args.workloads) - set(WORKLOADS))
+    if unknown:
+        parser.error(f"unknown workload: {', '.join(unknown)}")
+
+    for name in args.workloads or list(WORKLOADS):
+        result = run(name, args.scale, args.latency / 1000)
+        if args.json:
+            print(json.dumps(result))
+        else:
+            print(f"{name:<9} {result['operations']:6d} ops in {result['seconds']:6.2f} s  {result['operations_per_second']:8.1f} ops/s  "
+                  f"{result['requests']:5d} requests  p50 {result['p50_ms']:7.2f} ms  p99 {result['p99_ms']:7.2f} ms  "
+                  f"peak {result['peak_memory_mib']:6.1f} MiB  429s {result['throttled']}")
+
+
+if __name__ == "__main__":
+    main()
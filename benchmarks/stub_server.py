@@ -0,0 +1,219 @@
+"""
+Local HTTP server that answers like the Basecamp 3 API, used by the benchmarks.
+
+It serves the endpoints used by Campfire, MessageBoard and Attachments from an in-memory store, with paginated
+lists (Link headers), ETags and 304 responses, optional 429 throttling and an optional delay on every response.
+"""
+import hashlib
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+_LINES = re.compile(r"^/\d+/buckets/\d+/chats/(\d+)/lines\.json$")
+_MESSAGES = re.compile(r"^/\d+/buckets/\d+/message_boards/(\d+)/messages\.json$")
+_MESSAGE = re.compile(r"^/\d+/buckets/\d+/messages/(\d+)\.json$")
+_COMMENTS = re.compile(r"^/\d+/buckets/\d+/recordings/(\d+)/comments\.json$")
+_COMMENT = re.compile(r"^/\d+/buckets/\d+/comments/(\d+)\.json$")
+_CREATOR = {"id": 1049715913, "name": "Victor Cooper", "email_address": "victor@honchodesign.com", "personable_type": "User"}
+
+
+class StubState:
+
+    def __init__(self, messages: int = 0, comments_per_message: int = 0, lines: int = 1, page_size: int = 15,
+                 latency: float = 0.0, throttle_every: int = 0, retry_after: float = 0.0):
+        '''
+        Data and behaviour of a stub server.
+
+        Parameters:
+            messages (int): Number of messages on every message board.
+            comments_per_message (int): Number of comments on every message.
+            lines (int): Number of lines already in every campfire.
+            page_size (int): Records per page of every list.
+            latency (float): Seconds every response is delayed by.
+            throttle_every (int): Answer every Nth API request with 429. 0 never throttles.
+            retry_after (float): Value of the Retry-After header of 429 responses.
+        '''
+        self.page_size = page_size
+        self.latency = latency
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.throttled = 0
+        self.next_id = 1
+        self.lines = {}
+        self.messages = {}
+        self.comments = {}
+        self.initial_lines = lines
+        for _ in range(messages):
+            message = self.new_record("Message", subject="Weekly update", content="<div>" + "Status report. " * 20 + "</div>")
+            message["comments_count"] = comments_per_message
+            self.messages[message["id"]] = message
+            self.comments[message["id"]] = [self.new_record("Comment", content="<div>Thanks!</div>") for _ in range(comments_per_message)]
+
+    def new_record(self, kind: str, **fields) -> dict:
+        record_id = self.next_id
+        self.next_id += 1
+        record = {
+            "id": record_id, "status": "active", "type": kind,
+            "created_at": "2024-01-01T10:00:00.000Z", "updated_at": "2024-01-01T10:00:00.000Z",
+            "creator": _CREATOR, "bucket": {"id": 1, "name": "Stub project", "type": "Project"},
+        }
+        record.update(fields)
+        return record
+
+    def campfire(self, chat_id: int) -> list:
+        if chat_id not in self.lines:
+            self.lines[chat_id] = [self.new_record("Chat::Lines::Text", content="hello") for _ in range(self.initial_lines)]
+        return self.lines[chat_id]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def state(self) -> StubState:
+        return self.server.state
+
+    def _reply(self, status: int, body=None, headers=None):
+        payload = b"" if body is None else json.dumps(body).encode()
+        if self.state.latency:
+            time.sleep(self.state.latency)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _reply_page(self, records: list):
+        parts = urlsplit(self.path)
+        page = int(parse_qs(parts.query).get("page", ["1"])[0])
+        size = self.state.page_size
+        # Basecamp lists newest records first.
+        ordered = records[::-1]
+        chunk = ordered[(page - 1) * size:page * size]
+        etag = '"' + hashlib.md5(json.dumps([record["id"] for record in chunk]).encode() + str(page).encode()).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self._reply(304, headers={"ETag": etag})
+            return
+        headers = {"ETag": etag}
+        if page * size < len(ordered):
+            headers["Link"] = f'<http://{self.headers["Host"]}{parts.path}?page={page + 1}>; rel="next"'
+        self._reply(200, chunk, headers)
+
+    def _read_body(self) -> bytes:
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            body = b""
+            while True:
+                size = int(self.rfile.readline().strip(), 16)
+                if size == 0:
+                    self.rfile.readline()
+                    return body
+                body += self.rfile.read(size)
+                self.rfile.readline()
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _throttled(self) -> bool:
+        with self.state.lock:
+            self.state.requests += 1
+            throttle = self.state.throttle_every and self.state.requests % self.state.throttle_every == 0
+            if throttle:
+                self.state.throttled += 1
+        if throttle:
+            self._reply(429, {"error": "Too many requests"}, {"Retry-After": str(self.state.retry_after)})
+        return bool(throttle)
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if self._throttled():
+            return
+        with self.state.lock:
+            match = _LINES.match(path)
+            if match:
+                records = list(self.state.campfire(int(match.group(1))))
+            elif _MESSAGES.match(path):
+                records = list(self.state.messages.values())
+            elif _COMMENTS.match(path):
+                records = list(self.state.comments.get(int(_COMMENTS.match(path).group(1)), []))
+            elif _MESSAGE.match(path):
+                self._reply(200, self.state.messages.get(int(_MESSAGE.match(path).group(1)), {"id": 1}))
+                return
+            else:
+                self._reply(200, {"id": 1, "title": "stub"})
+                return
+        self._reply_page(records)
+
+    def do_POST(self):
+        body = self._read_body()
+        path = urlsplit(self.path).path
+        if "/authorization/token" in path:
+            self._reply(200, {"access_token": "stub-token", "refresh_token": "stub-refresh", "expires_in": 1209600})
+            return
+        if self._throttled():
+            return
+        if path.endswith("/attachments.json"):
+            self._reply(200, {"attachable_sgid": "stub-sgid-" + hashlib.md5(body).hexdigest()})
+            return
+        match = _LINES.match(path)
+        if match:
+            content = json.loads(body or b"{}").get("content")
+            with self.state.lock:
+                line = self.state.new_record("Chat::Lines::Text", content=content)
+                self.state.campfire(int(match.group(1))).append(line)
+            self._reply(201, line)
+        else:
+            self._reply(201, {"id": 1})
+
+    def do_PUT(self):
+        changes = json.loads(self._read_body() or b"{}")
+        if self._throttled():
+            return
+        path = urlsplit(self.path).path
+        with self.state.lock:
+            match = _MESSAGE.match(path)
+            record = self.state.messages.get(int(match.group(1))) if match else None
+            if record is not None:
+                record.update(changes)
+        self._reply(200, record or {"id": 1})
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class StubServer:
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, handler=StubHandler, state: StubState = None):
+        '''
+        Runs a threaded stub server in the background.
+
+        Parameters:
+            host (str): Interface to bind to.
+            port (int): Port to bind to. 0 picks a free port.
+            handler: The BaseHTTPRequestHandler subclass that answers requests.
+            state (StubState): Data and behaviour of the server. Defaults to an empty store without delays or throttling.
+        '''
+        self.httpd = _Server((host, port), handler)
+        self.httpd.state = state if state is not None else StubState()
+        self.state = self.httpd.state
+        self.url = f"http://{host}:{self.httpd.server_address[1]}"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
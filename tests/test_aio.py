@@ -0,0 +1,261 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+from basecampapi import AsyncBasecamp
+from basecampapi.aio import follow_many
+from basecampapi.metrics import Metrics
+from basecampapi.models import Message
+from basecampapi.tokens import FileTokenStore, MemoryTokenStore
+
+
+CREDS = {
+    'account_id': '5',
+    'client_id': 'cid',
+    'client_secret': 'secret',
+    'redirect_uri': 'uri',
+    'refresh_token': 'ref',
+}
+
+
+@unittest.skipUnless(httpx, "httpx is not installed")
+class TestAsyncBasecamp(unittest.TestCase):
+    def make_session(self, handler, **kwargs):
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return AsyncBasecamp(credentials=CREDS, client=client, **kwargs)
+
+    def test_write_authenticates_once(self):
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            if request.url.host == 'launchpad.37signals.com':
+                return httpx.Response(200, json={'access_token': 'tok'})
+            return httpx.Response(201, json={})
+
+        async def run():
+            async with self.make_session(handler) as bc:
+                campfire = bc.campfire(project_id=1, campfire_id=2)
+                await asyncio.gather(campfire.write('a'), campfire.write('b'))
+
+        asyncio.run(run())
+
+        self.assertEqual(len(calls), 3)
+        posted = calls[1:]
+        self.assertEqual(str(posted[0].url), 'https://3.basecampapi.com/5/buckets/1/chats/2/lines.json')
+        self.assertEqual(posted[0].headers['Authorization'], 'Bearer tok')
+        self.assertEqual(sorted(json.loads(r.content)['content'] for r in posted), ['a', 'b'])
+
+    def test_concurrency_limit(self):
+        state = {'active': 0, 'peak': 0}
+
+        async def handler(request):
+            if request.url.host == 'launchpad.37signals.com':
+                return httpx.Response(200, json={'access_token': 'tok'})
+            state['active'] += 1
+            state['peak'] = max(state['peak'], state['active'])
+            await asyncio.sleep(0.01)
+            state['active'] -= 1
+            return httpx.Response(200, json={'id': 1})
+
+        async def run():
+            async with self.make_session(handler, concurrency=3) as bc:
+                board = bc.message_board(project_id=1, message_board_id=2)
+                return await asyncio.gather(*(board.get_message(i) for i in range(10)))
+
+        results = asyncio.run(run())
+
+        self.assertEqual(len(results), 10)
+        self.assertEqual(state['peak'], 3)
+
+    def test_iter_messages_follows_links(self):
+        def handler(request):
+            if request.url.host == 'launchpad.37signals.com':
+                return httpx.Response(200, json={'access_token': 'tok'})
+            if request.url.params.get('page') == '2':
+                return httpx.Response(200, json=[{'id': 3}])
+            return httpx.Response(200, json=[{'id': 1}, {'id': 2}], headers={'Link': f'<{request.url}?page=2>; rel="next"'})
+
+        async def run():
+            async with self.make_session(handler) as bc:
+                board = bc.message_board(project_id=1, message_board_id=2)
+                everything = [m['id'] async for m in board.iter_messages(prefetch=True)]
+                limited = [m['id'] async for m in board.iter_messages(limit=2)]
+                return everything, limited
+
+        self.assertEqual(asyncio.run(run()), ([1, 2, 3], [1, 2]))
+
+    def test_iter_messages_typed(self):
+        def handler(request):
+            if request.url.host == 'launchpad.37signals.com':
+                return httpx.Response(200, json={'access_token': 'tok'})
+            return httpx.Response(200, json=[{'id': 1, 'subject': 'Hi', 'creator': {'id': 7, 'name': 'Ann'}}])
+
+        async def run():
+            async with self.make_session(handler) as bc:
+                board = bc.message_board(project_id=1, message_board_id=2)
+                return [m async for m in board.iter_messages(typed=True, fields=('id', 'creator_name'))], await board.get_message(1)
+
+        messages, single = asyncio.run(run())
+        self.assertEqual(messages, [Message(id=1, creator_name='Ann')])
+        self.assertEqual(single, [{'id': 1, 'subject': 'Hi', 'creator': {'id': 7, 'name': 'Ann'}}])
+
+    def test_error_response_raises(self):
+        def handler(request):
+            if request.url.host == 'launchpad.37signals.com':
+                return httpx.Response(200, json={'access_token': 'tok'})
+            return httpx.Response(404, text='missing')
+
+        async def run():
+            async with self.make_session(handler) as bc:
+                await bc.message_board(project_id=1, message_board_id=2).get_comment(3)
+
+        with self.assertRaises(Exception) as ctx:
+            asyncio.run(run())
+        self.assertIn('Status code: 404', str(ctx.exception))
+
+    def test_follow_many_yields_new_lines(self):
+        chats = {'2': [{'id': 10}], '3': [{'id': 20}]}
+        polls = []
+
+        def handler(request):
+            if request.url.host == 'launchpad.37signals.com':
+                return httpx.Response(200, json={'access_token': 'tok'})
+            chat = request.url.path.split('/')[-2]
+            polls.append((chat, request.headers.get('If-None-Match')))
+            lines = chats[chat]
+            etag = f'"{chat}-{len(lines)}"'
+            if request.headers.get('If-None-Match') == etag:
+                if chat == '2' and len(lines) == 1:
+                    lines.insert(0, {'id': 11})
+                return httpx.Response(304)
+            return httpx.Response(200, json=list(lines), headers={'ETag': etag})
+
+        async def run():
+            async with self.make_session(handler) as bc:
+                campfires = [bc.campfire(1, 2), bc.campfire(1, 3)]
+                stream = follow_many(campfires, min_interval=0, max_interval=0)
+                campfire, line = await stream.__anext__()
+                await stream.aclose()
+                return campfire.campfire_id, line
+
+        self.assertEqual(asyncio.run(run()), (2, {'id': 11}))
+        self.assertIn(('2', '"2-1"'), polls)
+
+
+    def test_fetch_thread_tree(self):
+        requested = []
+
+        def handler(request):
+            if request.url.host == 'launchpad.37signals.com':
+                return httpx.Response(200, json={'access_token': 'tok'})
+            requested.append(request.url.path)
+            if request.url.path.endswith('/messages.json'):
+                return httpx.Response(200, json=[{'id': 10, 'subject': 'A', 'content': 'a', 'comments_count': 2}, {'id': 11, 'subject': 'B', 'content': 'b', 'comments_count': 0}])
+            return httpx.Response(200, json=[{'id': 20, 'content': 'x', 'creator': {'name': 'Ann'}}])
+
+        async def run():
+            async with self.make_session(handler) as bc:
+                return await bc.message_board(project_id=1, message_board_id=2).fetch_thread_tree()
+
+        self.assertEqual(asyncio.run(run()), [
+            {'id': 10, 'subject': 'A', 'content': 'a', 'comments': [{'id': 20, 'content': 'x', 'creator': 'Ann'}]},
+            {'id': 11, 'subject': 'B', 'content': 'b', 'comments': []},
+        ])
+        self.assertEqual(len(requested), 2)
+
+    def test_hooks_receive_events(self):
+        def handler(request):
+            if request.url.host == 'launchpad.37signals.com':
+                return httpx.Response(200, json={'access_token': 'tok'})
+            return httpx.Response(201, json={'id': 1})
+
+        metrics = Metrics()
+
+        async def run():
+            async with self.make_session(handler, hooks=[metrics]) as bc:
+                await bc.campfire(project_id=1, campfire_id=2).write('hello')
+
+        asyncio.run(run())
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot['statuses'], {'POST /{id}/buckets/{id}/chats/{id}/lines.json 201': 1})
+        self.assertEqual(snapshot['bytes_sent'], len(b'{"content":"hello"}'))
+
+    def test_sessions_sharing_a_token_store_refresh_once(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for store in (MemoryTokenStore(), FileTokenStore(os.path.join(directory, 'tokens.json'))):
+                refreshes = []
+
+                async def handler(request):
+                    refreshes.append(request)
+                    await asyncio.sleep(0.05)
+                    return httpx.Response(200, json={'access_token': 'tok', 'expires_in': 3600})
+
+                async def run():
+                    sessions = [self.make_session(handler, token_store=store, refresh_margin=0) for _ in range(3)]
+                    await asyncio.gather(*(session.authenticate() for session in sessions))
+                    for session in sessions:
+                        await session.aclose()
+                    return [session.credentials['access_token'] for session in sessions]
+
+                self.assertEqual(asyncio.run(run()), ['tok'] * 3)
+                self.assertEqual(len(refreshes), 1)
+
+    def test_refresh_does_not_depend_on_the_default_executor(self):
+        refreshes = []
+
+        async def handler(request):
+            refreshes.append(request)
+            await asyncio.sleep(0.01)
+            return httpx.Response(200, json={'access_token': f'tok{len(refreshes)}', 'expires_in': 3600})
+
+        async def run(store):
+            asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=1))
+            sessions = [self.make_session(handler, token_store=store, refresh_margin=0) for _ in range(4)]
+            await asyncio.wait_for(asyncio.gather(*(session.authenticate() for session in sessions)), timeout=5)
+            # A rejected token is replaced once, however many tasks saw it rejected.
+            await asyncio.wait_for(asyncio.gather(*(session.authenticate(rejected_token='tok1') for session in sessions)), timeout=5)
+            for session in sessions:
+                await session.aclose()
+
+        with tempfile.TemporaryDirectory() as directory:
+            asyncio.run(run(FileTokenStore(os.path.join(directory, 'tokens.json'))))
+        self.assertEqual(len(refreshes), 2)
+
+    def test_upload_file_with_unknown_extension(self):
+        uploads = []
+
+        async def handler(request):
+            if request.url.host == 'launchpad.37signals.com':
+                return httpx.Response(200, json={'access_token': 'tok'})
+            uploads.append((request.headers['Content-Type'], await request.aread()))
+            return httpx.Response(200, json={'attachable_sgid': 'sgid'})
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'data.weirdext')
+            with open(path, 'wb') as file:
+                file.write(b'some bytes')
+
+            async def run():
+                async with self.make_session(handler) as bc:
+                    attachments = bc.attachments()
+                    sgid = await attachments.upload_file(path, 'data.weirdext')
+                    return sgid, attachments.files, attachments.attachment('data.weirdext')
+
+            sgid, files, attachment = asyncio.run(run())
+
+        self.assertEqual(sgid, 'sgid')
+        self.assertEqual(uploads, [('application/octet-stream', b'some bytes')])
+        self.assertEqual(files['data.weirdext']['content-type'], 'application/octet-stream')
+        self.assertEqual(attachment.content_type, 'application/octet-stream')
+
+if __name__ == '__main__':
+    unittest.main()
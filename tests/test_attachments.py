@@ -7,7 +7,17 @@ import types
 requests_stub = types.ModuleType('requests')
 requests_stub.post = lambda *args, **kwargs: None
 requests_stub.get = lambda *args, **kwargs: None
+requests_stub.Session = type('Session', (), {
+    'mount': lambda self, *args: None,
+    'request': lambda self, *args, **kwargs: None,
+    'close': lambda self: None,
+})
+requests_adapters_stub = types.ModuleType('requests.adapters')
+requests_adapters_stub.HTTPAdapter = MagicMock
+requests_adapters_stub.Retry = MagicMock
+requests_stub.adapters = requests_adapters_stub
 sys.modules.setdefault('requests', requests_stub)
+sys.modules.setdefault('requests.adapters', requests_adapters_stub)
 
 filetype_stub = types.ModuleType('filetype')
 filetype_stub.guess = lambda *args, **kwargs: None
@@ -17,7 +27,7 @@ from basecampapi import Basecamp, Attachments
 
 class TestAttachments(unittest.TestCase):
     @patch('filetype.guess')
-    @patch('requests.post')
+    @patch('requests.Session.request')
     def test_upload_from_bytes(self, mock_post, mock_guess):
         # mock responses for Basecamp.__get_access and Attachments.upload_from_bytes
         access_resp = MagicMock()
@@ -50,7 +60,7 @@ class TestAttachments(unittest.TestCase):
         info = att.files['img.png']
         self.assertEqual(info['filename'], 'img.png')
         self.assertEqual(info['sgid'], 'sgid123')
-        mock_post.assert_called_with(f"https://3.basecampapi.com/2/attachments.json?name=img.png", headers={'Authorization': 'Bearer tok', 'Content-Type': 'image/png', 'Content-Length': '4'}, data=b'data')
+        mock_post.assert_called_with("POST", f"https://3.basecampapi.com/2/attachments.json?name=img.png", headers={'Authorization': 'Bearer tok', 'Content-Type': 'image/png', 'Content-Length': '4'}, data=b'data')
 
 if __name__ == '__main__':
     unittest.main()
@@ -7,12 +7,22 @@ import types
 requests_stub = types.ModuleType('requests')
 requests_stub.post = lambda *args, **kwargs: None
 requests_stub.get = lambda *args, **kwargs: None
+requests_stub.Session = type('Session', (), {
+    'mount': lambda self, *args: None,
+    'request': lambda self, *args, **kwargs: None,
+    'close': lambda self: None,
+})
+requests_adapters_stub = types.ModuleType('requests.adapters')
+requests_adapters_stub.HTTPAdapter = MagicMock
+requests_adapters_stub.Retry = MagicMock
+requests_stub.adapters = requests_adapters_stub
 sys.modules.setdefault('requests', requests_stub)
+sys.modules.setdefault('requests.adapters', requests_adapters_stub)
 
 from basecampapi import Basecamp
 
 class TestBasecamp(unittest.TestCase):
-    @patch('requests.post')
+    @patch('requests.Session.request')
     def test_init_with_refresh_token(self, mock_post):
         # mock access token response
         mock_response = MagicMock()
@@ -28,13 +38,45 @@ class TestBasecamp(unittest.TestCase):
             'refresh_token': 'ref',
         }
 
-        Basecamp(credentials=creds)
+        bc = Basecamp(credentials=creds)
 
-        self.assertEqual(Basecamp._Basecamp__base_url, 'https://3.basecampapi.com/99')
-        self.assertEqual(Basecamp._Basecamp__credentials['access_token'], 'token123')
+        self.assertEqual(bc.base_url, 'https://3.basecampapi.com/99')
+        self.assertEqual(bc.credentials['access_token'], 'token123')
+        self.assertIs(Basecamp.default_session(), bc)
         mock_post.assert_called_once()
 
-    @patch('requests.post')
+    @patch('requests.Session.request')
+    def test_sessions_are_independent(self, mock_request):
+        def token_response(token):
+            resp = MagicMock()
+            resp.ok = True
+            resp.json.return_value = {'access_token': token}
+            return resp
+
+        lines = MagicMock()
+        lines.ok = True
+        lines.json.return_value = []
+        mock_request.side_effect = [token_response('tok-a'), token_response('tok-b'), lines, lines]
+
+        creds = {
+            'client_id': 'cid',
+            'client_secret': 'secret',
+            'redirect_uri': 'uri',
+            'refresh_token': 'ref',
+        }
+        first = Basecamp(credentials=dict(creds, account_id='1'))
+        second = Basecamp(credentials=dict(creds, account_id='2'))
+
+        first.campfire(project_id=10, campfire_id=20).get_lines()
+        self.assertEqual(mock_request.call_args.args[1], 'https://3.basecampapi.com/1/buckets/10/chats/20/lines.json')
+        self.assertEqual(mock_request.call_args.kwargs['headers']['Authorization'], 'Bearer tok-a')
+
+        second.campfire(project_id=10, campfire_id=20).get_lines()
+        self.assertEqual(mock_request.call_args.args[1], 'https://3.basecampapi.com/2/buckets/10/chats/20/lines.json')
+        self.assertEqual(mock_request.call_args.kwargs['headers']['Authorization'], 'Bearer tok-b')
+        self.assertIsNot(first.transport, second.transport)
+
+    @patch('requests.Session.request')
     def test_init_missing_refresh_token_raises(self, mock_post):
         creds = {
             'account_id': '1',
@@ -48,5 +90,18 @@ class TestBasecamp(unittest.TestCase):
         self.assertIn('Access denied', str(ctx.exception))
         self.assertTrue(mock_post.called is False)
 
+    @patch('requests.Session.request')
+    def test_custom_urls(self, mock_request):
+        resp = MagicMock()
+        resp.ok = True
+        resp.json.return_value = {'access_token': 'tok'}
+        mock_request.return_value = resp
+        creds = {'account_id': '4', 'client_id': 'cid', 'client_secret': 'secret', 'redirect_uri': 'uri', 'refresh_token': 'ref'}
+
+        bc = Basecamp(credentials=creds, api_url='http://127.0.0.1:8000', launchpad_url='http://127.0.0.1:8001')
+
+        self.assertTrue(mock_request.call_args.args[1].startswith('http://127.0.0.1:8001/authorization/token?type=refresh'))
+        self.assertEqual(bc.campfire(1, 2).session.base_url, 'http://127.0.0.1:8000/4')
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,69 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from basecampapi.cache import MemoryCache, SQLiteCache
+from basecampapi.transport import Transport
+
+
+def response(status_code, body=b'', headers=None):
+    resp = MagicMock()
+    resp.status_code = status_code
+    resp.content = body
+    resp.headers = dict(headers or {})
+    return resp
+
+
+class TestResponseCache(unittest.TestCase):
+    def test_memory_cache_lru_and_ttl(self):
+        cache = MemoryCache(maxsize=2)
+        cache.set('a', '"1"', None, b'a')
+        cache.set('b', '"2"', None, b'b')
+        cache.get('a')
+        cache.set('c', '"3"', None, b'c')
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a').body, b'a')
+
+        expiring = MemoryCache(ttl=0)
+        expiring.set('a', '"1"', None, b'a')
+        self.assertIsNone(expiring.get('a'))
+
+    def test_sqlite_cache_persists(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'cache.db')
+            cache = SQLiteCache(path, maxsize=2)
+            cache.set('a', '"1"', None, b'a', {'Link': '<next>; rel="next"'})
+            cache.set('b', '"2"', None, b'b')
+            cache.set('c', '"3"', None, b'c')
+            cache.close()
+
+            reopened = SQLiteCache(path)
+            self.assertEqual(len(reopened), 2)
+            self.assertIsNone(reopened.get('a'))
+            self.assertEqual(reopened.get('c').body, b'c')
+            reopened.close()
+
+    @patch('requests.Session.request')
+    def test_transport_conditional_get(self, mock_request):
+        cache = MemoryCache()
+        transport = Transport(cache=cache)
+        url = 'https://3.basecampapi.com/1/buckets/2/messages/3.json'
+
+        mock_request.return_value = response(200, b'{"id": 3}', {'ETag': '"abc"', 'Link': '<p2>; rel="next"'})
+        transport.get(url, headers={'Authorization': 'Bearer tok'})
+        self.assertEqual(mock_request.call_args.kwargs['headers'], {'Authorization': 'Bearer tok'})
+
+        mock_request.return_value = response(304)
+        cached = transport.get(url, headers={'Authorization': 'Bearer tok'})
+        self.assertEqual(mock_request.call_args.kwargs['headers'], {'Authorization': 'Bearer tok', 'If-None-Match': '"abc"'})
+        self.assertEqual(cached.status_code, 200)
+        self.assertEqual(cached._content, b'{"id": 3}')
+        self.assertEqual(cached.headers['Link'], '<p2>; rel="next"')
+        self.assertEqual(cache.stats, {'hits': 1, 'misses': 1, 'not_modified': 1, 'hit_rate': 0.5})
+
+        transport.post(url, json={})
+        self.assertEqual(cache.stats['misses'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,147 @@
+import threading
+import unittest
+from unittest.mock import patch, MagicMock
+import sys
+import types
+
+# Provide minimal stubs for external dependencies
+requests_stub = types.ModuleType('requests')
+requests_stub.post = lambda *args, **kwargs: None
+requests_stub.get = lambda *args, **kwargs: None
+requests_stub.Session = type('Session', (), {
+    'mount': lambda self, *args: None,
+    'request': lambda self, *args, **kwargs: None,
+    'close': lambda self: None,
+})
+requests_adapters_stub = types.ModuleType('requests.adapters')
+requests_adapters_stub.HTTPAdapter = MagicMock
+requests_adapters_stub.Retry = MagicMock
+requests_stub.adapters = requests_adapters_stub
+sys.modules.setdefault('requests', requests_stub)
+sys.modules.setdefault('requests.adapters', requests_adapters_stub)
+
+from basecampapi import Basecamp
+
+CREDS = {
+    'account_id': '7',
+    'client_id': 'cid',
+    'client_secret': 'secret',
+    'redirect_uri': 'uri',
+    'refresh_token': 'ref',
+}
+
+
+class FakeServer:
+    def __init__(self):
+        self.posted = []
+        self.lock = threading.Lock()
+
+    def __call__(self, method, url, **kwargs):
+        resp = MagicMock()
+        if 'launchpad' in url:
+            resp.ok = True
+            resp.json.return_value = {'access_token': 'tok'}
+            return resp
+        content = kwargs['json']['content']
+        with self.lock:
+            self.posted.append((url, content))
+        resp.ok = content != 'bad'
+        resp.status_code = 201 if resp.ok else 422
+        resp.reason = 'Unprocessable'
+        resp.text = 'invalid'
+        resp.json.return_value = {'content': content}
+        return resp
+
+
+class TestCampfireBulk(unittest.TestCase):
+    @patch('requests.Session.request')
+    def test_write_many_reports_each_line(self, mock_request):
+        server = FakeServer()
+        mock_request.side_effect = server
+        campfire = Basecamp(credentials=dict(CREDS)).campfire(project_id=1, campfire_id=2)
+
+        results = campfire.write_many(['one', 'bad', 'three'])
+
+        self.assertEqual([r.ok for r in results], [True, False, True])
+        self.assertEqual(results[0].line, {'content': 'one'})
+        self.assertIn('Status code: 422', results[1].error)
+        self.assertEqual([content for _, content in server.posted], ['one', 'bad', 'three'])
+
+    @patch('requests.Session.request')
+    def test_post_lines_keeps_order_per_chat(self, mock_request):
+        server = FakeServer()
+        mock_request.side_effect = server
+        bc = Basecamp(credentials=dict(CREDS))
+
+        lines = [(1, chat, f'{chat}-{n}') for n in range(5) for chat in (10, 20, 30)]
+        results = bc.post_lines(lines, max_workers=3)
+
+        self.assertEqual([(r.campfire_id, r.content) for r in results], [(chat, content) for _, chat, content in lines])
+        self.assertTrue(all(r.ok for r in results))
+        for chat in (10, 20, 30):
+            sent = [content for url, content in server.posted if f'/chats/{chat}/' in url]
+            self.assertEqual(sent, [f'{chat}-{n}' for n in range(5)])
+
+
+class TestCampfireFollow(unittest.TestCase):
+    @patch('requests.Session.request')
+    def test_follow_yields_only_new_lines(self, mock_request):
+        pages = [
+            [{'id': 2}, {'id': 1}],
+            None,
+            [{'id': 4}, {'id': 3}, {'id': 2}],
+        ]
+        seen_headers = []
+
+        def server(method, url, **kwargs):
+            resp = MagicMock()
+            resp.ok = True
+            if 'launchpad' in url:
+                resp.json.return_value = {'access_token': 'tok'}
+                return resp
+            seen_headers.append(kwargs['headers'].get('If-None-Match'))
+            page = pages.pop(0)
+            if page is None:
+                resp.status_code = 304
+                resp.ok = False
+            else:
+                resp.status_code = 200
+                resp.json.return_value = page
+                resp.headers = {'ETag': f'"{len(page)}"'}
+            return resp
+
+        mock_request.side_effect = server
+        campfire = Basecamp(credentials=dict(CREDS)).campfire(project_id=1, campfire_id=2)
+
+        with patch('basecampapi.endpoints.camprife.time.sleep') as mock_sleep:
+            follow = campfire.follow(min_interval=1, max_interval=10)
+            self.assertEqual([next(follow), next(follow)], [{'id': 3}, {'id': 4}])
+
+        self.assertEqual(seen_headers, [None, '"2"', '"2"'])
+        self.assertEqual([c.args[0] for c in mock_sleep.call_args_list], [1, 1.5])
+
+    @patch('requests.Session.request')
+    def test_poll_reads_older_pages_when_all_lines_are_new(self, mock_request):
+        def server(method, url, **kwargs):
+            resp = MagicMock()
+            resp.ok = True
+            resp.status_code = 200
+            if 'launchpad' in url:
+                resp.json.return_value = {'access_token': 'tok'}
+            elif 'page=2' in url:
+                resp.json.return_value = [{'id': 7}, {'id': 6}, {'id': 5}]
+                resp.headers = {}
+            else:
+                resp.json.return_value = [{'id': 9}, {'id': 8}]
+                resp.headers = {'Link': f'<{url}?page=2>; rel="next"', 'ETag': '"x"'}
+            return resp
+
+        mock_request.side_effect = server
+        campfire = Basecamp(credentials=dict(CREDS)).campfire(project_id=1, campfire_id=2)
+
+        lines, etag = campfire.poll_lines(last_id=6)
+        self.assertEqual([line['id'] for line in lines], [7, 8, 9])
+        self.assertEqual(etag, '"x"')
+
+if __name__ == '__main__':
+    unittest.main()
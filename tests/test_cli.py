@@ -13,6 +13,8 @@ filetype = types.ModuleType("filetype")
 filetype.guess = lambda x: types.SimpleNamespace(mime="text/plain")
 sys.modules.setdefault("filetype", filetype)
 typer_stub.echo = lambda *a, **k: None
+typer_stub.Option = lambda default=None, *a, **k: default
+typer_stub.Argument = lambda default=None, *a, **k: default
 
 class DummyCliRunner:
     def invoke(self, app, args=None):
@@ -25,6 +27,8 @@ class DummyApp:
         def decorator(fn):
             return fn
         return decorator
+    def add_typer(self, *a, **k):
+        pass
     def __call__(self, *a, **k):
         pass
 
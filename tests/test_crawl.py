@@ -0,0 +1,96 @@
+import json
+import unittest
+from unittest.mock import MagicMock, patch
+import sys
+import types
+
+# Provide minimal stubs for external dependencies
+requests_stub = types.ModuleType('requests')
+requests_stub.post = lambda *args, **kwargs: None
+requests_stub.get = lambda *args, **kwargs: None
+requests_stub.Session = type('Session', (), {
+    'mount': lambda self, *args: None,
+    'request': lambda self, *args, **kwargs: None,
+    'close': lambda self: None,
+})
+requests_adapters_stub = types.ModuleType('requests.adapters')
+requests_adapters_stub.HTTPAdapter = MagicMock
+requests_adapters_stub.Retry = MagicMock
+requests_stub.adapters = requests_adapters_stub
+sys.modules.setdefault('requests', requests_stub)
+sys.modules.setdefault('requests.adapters', requests_adapters_stub)
+
+from basecampapi.crawl import Crawl, crawl_project
+
+BASE_URL = 'https://3.basecampapi.com/9'
+PAGES = {
+    '/projects/1.json': {'id': 1, 'dock': [
+        {'name': 'message_board', 'id': 5, 'enabled': True},
+        {'name': 'chat', 'id': 6, 'enabled': True},
+        {'name': 'todoset', 'id': 7, 'enabled': True},
+    ]},
+    '/buckets/1/message_boards/5/messages.json': [
+        {'id': 10, 'subject': 'Hi', 'content': '<div>Hello <b>team</b></div>', 'comments_count': 1},
+        {'id': 11, 'subject': 'Quiet', 'content': '<div>No replies</div>', 'comments_count': 0},
+    ],
+    '/buckets/1/recordings/10/comments.json': [{'id': 20, 'content': '<div>Thanks</div>'}],
+    '/buckets/1/chats/6/lines.json': [{'id': 30, 'content': 'hey'}],
+}
+
+
+def fake_get(url, headers=None, **kwargs):
+    body = PAGES.get(url[len(BASE_URL):])
+    response = MagicMock()
+    response.ok = body is not None
+    response.status_code = 200 if body is not None else 404
+    response.reason = 'Not Found'
+    response.text = ''
+    response.headers = {}
+    response.content = json.dumps(body).encode()
+    response.json.return_value = body
+    return response
+
+
+def fake_session():
+    session = MagicMock()
+    session.base_url = BASE_URL
+    session.credentials = {'access_token': 'token'}
+    session.transport.get.side_effect = fake_get
+    return session
+
+
+class CrawlProjectTestCase(unittest.TestCase):
+    def test_records_are_encoded_per_page(self):
+        session = fake_session()
+        pages = list(crawl_project(session, 1))
+        records = [json.loads(line) for page in pages for line in page]
+        self.assertEqual([(record['type'], record['record']['id']) for record in records], [
+            ('message', 10), ('message', 11), ('comment', 20), ('campfire_line', 30),
+        ])
+        self.assertEqual(records[0]['text'].split(), ['Hello', 'team'])
+        self.assertEqual(records[0]['project_id'], 1)
+        # Messages without comments are not asked for them.
+        requested = [call.args[0] for call in session.transport.get.call_args_list]
+        self.assertNotIn(BASE_URL + '/buckets/1/recordings/11/comments.json', requested)
+
+    def test_include_selects_record_types(self):
+        pages = list(crawl_project(fake_session(), 1, include=('campfires',)))
+        self.assertEqual([json.loads(line)['type'] for page in pages for line in page], ['campfire_line'])
+
+
+class CrawlTestCase(unittest.TestCase):
+    def test_inline_crawl_counts_and_errors(self):
+        with patch('basecampapi.crawl._open_session', return_value=fake_session()):
+            crawl = Crawl({'account_id': 9}, projects=[1, 2], processes=0)
+            lines = list(crawl)
+        self.assertEqual(len(lines), 4)
+        self.assertEqual(crawl.counts, {1: 4, 2: 0})
+        self.assertIn('404', crawl.errors[2])
+
+    def test_unknown_record_type(self):
+        with self.assertRaises(Exception):
+            Crawl({'account_id': 9}, include=('todos',))
+
+
+if __name__ == "__main__":
+    unittest.main()
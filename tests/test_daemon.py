@@ -0,0 +1,100 @@
+import os
+import socket
+import tempfile
+import threading
+import types
+import unittest
+from unittest import mock
+
+from basecampapi.daemon import bind, execute, forward
+
+CREDENTIALS = {
+    'account_id': 1,
+    'client_id': 'cid',
+    'client_secret': 'secret',
+    'redirect_uri': 'https://example.com',
+    'refresh_token': 'refresh',
+}
+
+
+@unittest.skipUnless(hasattr(socket, "AF_UNIX"), "Unix sockets are not available")
+class DaemonTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.directory.name, "daemon.sock")
+        self.bc = mock.MagicMock()
+        self.bc.credentials = dict(CREDENTIALS, access_token="token")
+        result = types.SimpleNamespace(content="hello", ok=True, error=None)
+        self.bc.campfire.return_value.write_many.return_value = [result]
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def start(self):
+        server = bind(self.bc, self.socket_path)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+
+        def stop():
+            server.shutdown()
+            server.server_close()
+            thread.join()
+        self.addCleanup(stop)
+        return server
+
+    def test_forward_without_daemon(self):
+        self.assertEqual(forward(CREDENTIALS, "ping", {}, self.socket_path), (False, None))
+
+    def test_forward_runs_command_on_daemon_session(self):
+        self.start()
+        self.assertEqual(os.stat(self.socket_path).st_mode & 0o777, 0o600)
+        arguments = {"project_id": 2, "campfire_id": 3, "contents": ["hello"]}
+        handled, result = forward(CREDENTIALS, "campfire_send", arguments, self.socket_path)
+        self.assertTrue(handled)
+        self.assertEqual(result, [{"content": "hello", "ok": True, "error": None}])
+        self.bc.campfire.assert_called_once_with(project_id=2, campfire_id=3)
+
+    def test_other_credentials_are_declined(self):
+        self.start()
+        other = dict(CREDENTIALS, refresh_token="someone-else")
+        self.assertEqual(forward(other, "ping", {}, self.socket_path), (False, None))
+
+    def test_errors_are_raised_by_client(self):
+        self.start()
+        self.bc.message_board.return_value.create_message.side_effect = Exception("Status code: 422")
+        arguments = {"project_id": 2, "message_board_id": 3, "subject": "s", "content": "c"}
+        with self.assertRaises(Exception) as context:
+            forward(CREDENTIALS, "message_create", arguments, self.socket_path)
+        self.assertIn("422", str(context.exception))
+
+    def test_silent_daemon_raises_instead_of_falling_back(self):
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(self.socket_path)
+        listener.listen(1)
+        self.addCleanup(listener.close)
+        received = []
+
+        def accept_and_close():
+            connection, _ = listener.accept()
+            received.append(connection.makefile("rb").readline())
+            connection.close()
+        thread = threading.Thread(target=accept_and_close, daemon=True)
+        thread.start()
+        with self.assertRaises(Exception):
+            forward(CREDENTIALS, "ping", {}, self.socket_path, timeout=5)
+        thread.join()
+        self.assertEqual(len(received), 1)
+
+        # A daemon that accepts but never answers in time.
+        thread = threading.Thread(target=lambda: received.append(listener.accept()), daemon=True)
+        thread.start()
+        with self.assertRaises(Exception):
+            forward(CREDENTIALS, "ping", {}, self.socket_path, timeout=0.2)
+
+    def test_unknown_command(self):
+        with self.assertRaises(Exception):
+            execute(self.bc, "delete_everything", {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+import sys
+import types
+
+# Provide minimal stubs for external dependencies
+requests_stub = types.ModuleType('requests')
+requests_stub.post = lambda *args, **kwargs: None
+requests_stub.get = lambda *args, **kwargs: None
+requests_stub.Session = type('Session', (), {
+    'mount': lambda self, *args: None,
+    'request': lambda self, *args, **kwargs: None,
+    'close': lambda self: None,
+})
+requests_adapters_stub = types.ModuleType('requests.adapters')
+requests_adapters_stub.HTTPAdapter = MagicMock
+requests_adapters_stub.Retry = MagicMock
+requests_stub.adapters = requests_adapters_stub
+sys.modules.setdefault('requests', requests_stub)
+sys.modules.setdefault('requests.adapters', requests_adapters_stub)
+
+from basecampapi.export import Export
+
+BASE_URL = 'https://3.basecampapi.com/9'
+RECORDINGS = BASE_URL + '/projects/recordings.json?bucket=1&sort=created_at&direction=asc&type='
+LINES = BASE_URL + '/buckets/1/chats/6/lines.json'
+
+
+def pages(url, records, size=2):
+    # Splits records into linked pages keyed by URL.
+    result = {}
+    for start in range(0, len(records), size):
+        page_url = url if start == 0 else f'{url}&page={start // size + 1}'
+        next_url = f'{url}&page={start // size + 2}' if start + size < len(records) else None
+        result[page_url] = (records[start:start + size], next_url)
+    return result
+
+
+class FakeAccount:
+    def __init__(self):
+        self.failing = set()
+        self.pages = {BASE_URL + '/projects/1.json': ({'id': 1, 'dock': [{'name': 'chat', 'id': 6, 'enabled': True}]}, None)}
+        self.pages.update(pages(RECORDINGS + 'Message', [{'id': n, 'subject': f'S{n}', 'content': '<div>Hi</div>'} for n in range(1, 6)]))
+        comments = [{'id': n, 'content': 'ok', 'parent': {'id': 1, 'type': 'Message' if n % 2 else 'Todo'}} for n in range(10, 16)]
+        self.pages.update(pages(RECORDINGS + 'Comment', comments))
+        self.pages.update(pages(LINES + '?', [{'id': n, 'content': 'line'} for n in range(30, 25, -1)]))
+        self.pages[LINES] = self.pages.pop(LINES + '?')
+
+    def get(self, url, headers=None, **kwargs):
+        if url in self.failing:
+            raise Exception('connection reset')
+        body, next_url = self.pages[url]
+        response = MagicMock()
+        response.ok = True
+        response.status_code = 200
+        response.content = json.dumps(body).encode()
+        response.json.return_value = body
+        response.headers = {'Link': f'<{next_url}>; rel="next"'} if next_url else {}
+        return response
+
+
+class ExportTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.account = FakeAccount()
+        self.session = MagicMock()
+        self.session.base_url = BASE_URL
+        self.session.credentials = {'access_token': 'token'}
+        self.session.transport.get.side_effect = self.account.get
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def read(self, path, opener=open):
+        with opener(path, 'rt') as export:
+            return [json.loads(line) for line in export]
+
+    def test_ndjson_export(self):
+        path = os.path.join(self.directory.name, 'project.ndjson')
+        counts = Export(1, path, chunk_size=2, session=self.session).run()
+        self.assertEqual(counts, {'message': 5, 'comment': 3, 'campfire_line': 5})
+        records = self.read(path)
+        self.assertEqual([record['record']['id'] for record in records if record['type'] == 'comment'], [11, 13, 15])
+        self.assertEqual(records[0]['text'], ' Hi ')
+
+    def test_gzip_export_resumes_without_duplicates(self):
+        path = os.path.join(self.directory.name, 'project.ndjson.gz')
+        self.account.failing.add(RECORDINGS + 'Comment&page=2')
+        with self.assertRaises(Exception):
+            Export(1, path, chunk_size=1, session=self.session).run()
+        self.assertEqual(len(self.read(path, gzip.open)), 6)
+
+        self.account.failing.clear()
+        # A line posted during the interruption shifts older lines onto later pages.
+        self.account.pages[LINES][0].insert(0, {'id': 31, 'content': 'new'})
+        counts = Export(1, path, chunk_size=1, session=self.session).run()
+        ids = [(record['type'], record['record']['id']) for record in self.read(path, gzip.open)]
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(counts['message'], 5)
+        self.assertEqual(counts['comment'], 3)
+
+        # A finished export is not run again.
+        self.session.transport.get.reset_mock()
+        Export(1, path, session=self.session).run()
+        self.session.transport.get.assert_not_called()
+
+    def test_resume_without_the_exported_file_raises(self):
+        path = os.path.join(self.directory.name, 'project.ndjson')
+        self.account.failing.add(RECORDINGS + 'Comment&page=2')
+        with self.assertRaises(Exception):
+            Export(1, path, chunk_size=1, session=self.session).run()
+        self.account.failing.clear()
+
+        with open(path, 'r+b') as export:
+            export.truncate(10)
+        with self.assertRaises(Exception) as context:
+            Export(1, path, chunk_size=1, session=self.session).run()
+        self.assertIn('checkpoint', str(context.exception))
+        self.assertEqual(os.path.getsize(path), 10)
+
+        os.remove(path)
+        with self.assertRaises(Exception):
+            Export(1, path, chunk_size=1, session=self.session).run()
+        self.assertFalse(os.path.exists(path))
+
+    def test_unknown_format(self):
+        with self.assertRaises(Exception):
+            Export(1, 'out.csv', format='csv', session=self.session)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,28 +7,32 @@ import types
 requests_stub = types.ModuleType('requests')
 requests_stub.post = lambda *args, **kwargs: None
 requests_stub.get = lambda *args, **kwargs: None
+requests_stub.Session = type('Session', (), {
+    'mount': lambda self, *args: None,
+    'request': lambda self, *args, **kwargs: None,
+    'close': lambda self: None,
+})
+requests_adapters_stub = types.ModuleType('requests.adapters')
+requests_adapters_stub.HTTPAdapter = MagicMock
+requests_adapters_stub.Retry = MagicMock
+requests_stub.adapters = requests_adapters_stub
 sys.modules.setdefault('requests', requests_stub)
+sys.modules.setdefault('requests.adapters', requests_adapters_stub)
 
 from basecampapi import Basecamp, MessageBoard
+from basecampapi.endpoints.messageboard import CommentEdit, MessageEdit
 
 class TestMessageBoard(unittest.TestCase):
-    @patch('requests.post')
-    @patch('requests.get')
-    def test_create_message(self, mock_get, mock_post):
+    @patch('requests.Session.request')
+    def test_create_message(self, mock_request):
         # first post for access token then create message
         access_resp = MagicMock()
         access_resp.ok = True
         access_resp.json.return_value = {'access_token': 'tok'}
 
-        # GET request for initialization of MessageBoard
-        get_resp = MagicMock()
-        get_resp.ok = True
-        get_resp.json.return_value = []
-        mock_get.return_value = get_resp
-
         post_resp = MagicMock()
         post_resp.ok = True
-        mock_post.side_effect = [access_resp, post_resp]
+        mock_request.side_effect = [access_resp, post_resp]
 
         creds = {
             'account_id': '3',
@@ -42,11 +46,142 @@ class TestMessageBoard(unittest.TestCase):
         board = MessageBoard(project_id=1, message_board_id=2)
         board.create_message('subj', 'body')
 
-        mock_post.assert_called_with(
+        mock_request.assert_called_with(
+            'POST',
             'https://3.basecampapi.com/3/buckets/1/message_boards/2/messages.json',
             headers={'Authorization': 'Bearer tok', 'Content-Type': 'application/json'},
             data='{"subject": "subj", "content": "body", "status": "active"}'
         )
+        self.assertEqual(mock_request.call_count, 2)
+
+    @patch('requests.Session.request')
+    def test_messages_are_loaded_lazily(self, mock_request):
+        access_resp = MagicMock()
+        access_resp.ok = True
+        access_resp.json.return_value = {'access_token': 'tok'}
+
+        first = MagicMock()
+        first.ok = True
+        first.json.return_value = [{'id': 1}]
+        second = MagicMock()
+        second.ok = True
+        second.json.return_value = [{'id': 1}, {'id': 2}]
+        mock_request.side_effect = [access_resp, first, second]
+
+        creds = {
+            'account_id': '3',
+            'client_id': 'cid',
+            'client_secret': 'secret',
+            'redirect_uri': 'uri',
+            'refresh_token': 'ref',
+        }
+
+        Basecamp(credentials=creds)
+        board = MessageBoard(project_id=1, message_board_id=2)
+        self.assertEqual(mock_request.call_count, 1)
+
+        self.assertEqual(board.get_all_messages(), [{'id': 1}])
+        self.assertEqual(board.messages, [{'id': 1}])
+        self.assertEqual(mock_request.call_count, 2)
+
+        board.refresh()
+        self.assertEqual(board.get_all_messages(), [{'id': 1}, {'id': 2}])
+        self.assertEqual(mock_request.call_count, 3)
+
+    @patch('requests.Session.request')
+    def test_fetch_thread_tree(self, mock_request):
+        requested = []
+
+        def server(method, url, **kwargs):
+            resp = MagicMock()
+            resp.ok = True
+            resp.headers = {}
+            if 'launchpad' in url:
+                resp.json.return_value = {'access_token': 'tok'}
+                return resp
+            requested.append(url)
+            if url.endswith('/message_boards/2/messages.json'):
+                resp.json.return_value = [
+                    {'id': 10, 'subject': 'A', 'content': 'a', 'comments_count': 1, 'creator': {'id': 1, 'name': 'Ann'}},
+                    {'id': 11, 'subject': 'B', 'content': 'b', 'comments_count': 0, 'creator': {'id': 2, 'name': 'Bob'}},
+                ]
+            elif url.endswith('/recordings/10/comments.json'):
+                resp.json.return_value = [{'id': 20, 'content': 'c', 'creator': {'name': 'Bob'}, 'parent': {'id': 10}}]
+            elif url.endswith('/messages/12.json'):
+                resp.json.return_value = {'id': 12, 'subject': 'C', 'content': 'c'}
+            elif url.endswith('/recordings/12/comments.json'):
+                resp.json.return_value = []
+            return resp
+
+        mock_request.side_effect = server
+        board = Basecamp(credentials={
+            'account_id': '3', 'client_id': 'cid', 'client_secret': 'secret', 'redirect_uri': 'uri', 'refresh_token': 'ref',
+        }).message_board(project_id=1, message_board_id=2)
+
+        tree = board.fetch_thread_tree(max_workers=4)
+        self.assertEqual(tree, [
+            {'id': 10, 'subject': 'A', 'content': 'a', 'creator': 'Ann', 'comments': [{'id': 20, 'content': 'c', 'creator': 'Bob'}]},
+            {'id': 11, 'subject': 'B', 'content': 'b', 'creator': 'Bob', 'comments': []},
+        ])
+        self.assertEqual(len(requested), 2)
+
+        requested.clear()
+        threads = board.hydrate([12, 12], compact=False)
+        self.assertEqual(threads, [{'id': 12, 'subject': 'C', 'content': 'c', 'comments': []}] * 2)
+        self.assertEqual(len(requested), 2)
+
+    @patch('requests.Session.request')
+    def test_bulk_update_coalesces_and_skips_noops(self, mock_request):
+        records = {
+            '/messages/10.json': {'id': 10, 'type': 'Message', 'subject': 'Old', 'content': 'see http://old'},
+            '/comments/30.json': {'id': 30, 'type': 'Comment', 'content': 'fine'},
+        }
+        puts = []
+
+        def server(method, url, **kwargs):
+            resp = MagicMock()
+            resp.ok = True
+            if 'launchpad' in url:
+                resp.json.return_value = {'access_token': 'tok'}
+            elif method == 'PUT':
+                puts.append((url, kwargs['json']))
+                resp.ok = not url.endswith('/messages/12.json')
+                resp.status_code, resp.reason, resp.text = 422, 'Unprocessable', 'invalid'
+            else:
+                resp.json.return_value = next(record for path, record in records.items() if url.endswith(path))
+            return resp
+
+        mock_request.side_effect = server
+        board = Basecamp(credentials={
+            'account_id': '3', 'client_id': 'cid', 'client_secret': 'secret', 'redirect_uri': 'uri', 'refresh_token': 'ref',
+        }).message_board(project_id=1, message_board_id=2)
+
+        rewrite = lambda text: text.replace('http://old', 'https://new')
+        edits = [
+            MessageEdit(10, content=rewrite),
+            CommentEdit(30, content='fine'),
+            MessageEdit(10, subject='New'),
+            MessageEdit(11, subject='Same'),
+            MessageEdit(12, content='x'),
+        ]
+        known = [{'id': 11, 'type': 'Message', 'subject': 'Same', 'content': ''}, {'id': 12, 'type': 'Message', 'content': ''}]
+
+        planned = board.bulk_update(edits, dry_run=True, known=known)
+        self.assertEqual([(r.record_id, r.status) for r in planned], [(10, 'planned'), (30, 'unchanged'), (11, 'unchanged'), (12, 'planned')])
+        self.assertEqual(planned[0].changes, {'content': 'see https://new', 'subject': 'New'})
+        self.assertEqual(puts, [])
+
+        results = board.bulk_update(edits, known=known)
+        self.assertEqual([r.status for r in results], ['updated', 'unchanged', 'unchanged', 'failed'])
+        self.assertIn('Status code: 422', results[3].error)
+        self.assertEqual(sorted(url.rsplit('/', 1)[1] for url, _ in puts), ['10.json', '12.json'])
+
+        # Compact threads from hydrate() hold their comments untyped.
+        threads = [{'id': 10, 'subject': 'New', 'content': 'see https://new', 'comments': [{'id': 30, 'content': 'fine'}]}]
+        mock_request.reset_mock()
+        planned = board.bulk_update([CommentEdit(30, content='fine'), MessageEdit(10, subject='New')], dry_run=True, known=threads)
+        self.assertEqual([(r.kind, r.record_id, r.status) for r in planned], [('comment', 30, 'unchanged'), ('message', 10, 'unchanged')])
+        mock_request.assert_not_called()
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,80 @@
+import logging
+import unittest
+from unittest.mock import patch, MagicMock
+import sys
+import types
+
+# Provide minimal stubs for external dependencies
+requests_stub = types.ModuleType('requests')
+requests_stub.post = lambda *args, **kwargs: None
+requests_stub.get = lambda *args, **kwargs: None
+requests_stub.Session = type('Session', (), {
+    'mount': lambda self, *args: None,
+    'request': lambda self, *args, **kwargs: None,
+    'close': lambda self: None,
+})
+requests_adapters_stub = types.ModuleType('requests.adapters')
+requests_adapters_stub.HTTPAdapter = MagicMock
+requests_adapters_stub.Retry = MagicMock
+requests_stub.adapters = requests_adapters_stub
+sys.modules.setdefault('requests', requests_stub)
+sys.modules.setdefault('requests.adapters', requests_adapters_stub)
+
+from basecampapi.metrics import LoggingHook, Metrics, endpoint_name
+from basecampapi.transport import Transport
+
+
+def response(status, content=b'[]', headers=None):
+    resp = MagicMock()
+    resp.status_code = status
+    resp.ok = status == 200
+    resp._content = content
+    resp.headers = headers or {}
+    resp.from_cache = False
+    return resp
+
+
+class TestMetrics(unittest.TestCase):
+    def test_endpoint_name(self):
+        self.assertEqual(endpoint_name('https://3.basecampapi.com/99/buckets/1/chats/2/lines.json?page=2'), '/{id}/buckets/{id}/chats/{id}/lines.json')
+        self.assertEqual(endpoint_name('https://3.basecampapi.com/99/buckets/1/messages/5.json'), '/{id}/buckets/{id}/messages/{id}.json')
+
+    @patch('time.sleep')
+    @patch('requests.Session.request')
+    def test_transport_reports_requests_and_retries(self, mock_request, mock_sleep):
+        mock_request.side_effect = [response(429, b'', {'Retry-After': '1'}), response(200, b'[1, 2]'), response(200, b'{}')]
+        metrics = Metrics()
+        events = []
+        transport = Transport(pool_size=4, hooks=[metrics, events.append])
+
+        transport.get('https://3.basecampapi.com/99/buckets/1/chats/2/lines.json')
+        transport.post('https://3.basecampapi.com/99/buckets/1/chats/2/lines.json', data=b'{"content": "hi"}')
+
+        self.assertEqual([event.kind for event in events], ['retry', 'response', 'response'])
+        self.assertEqual(transport.in_flight, 0)
+        snapshot = metrics.snapshot()
+        self.assertEqual((snapshot['retries'], snapshot['throttled'], snapshot['bytes_received'], snapshot['bytes_sent']), (1, 1, 8, 17))
+        self.assertEqual(snapshot['pool_utilization'], 0.25)
+        self.assertEqual(snapshot['endpoints']['GET /{id}/buckets/{id}/chats/{id}/lines.json']['count'], 2)
+
+        text = metrics.prometheus()
+        self.assertIn('basecamp_requests_total{method="GET",endpoint="/{id}/buckets/{id}/chats/{id}/lines.json",status="429"} 1', text)
+        self.assertIn('basecamp_request_duration_seconds_bucket{method="POST",endpoint="/{id}/buckets/{id}/chats/{id}/lines.json",le="+Inf"} 1', text)
+        self.assertIn('basecamp_retries_total 1', text)
+
+    @patch('requests.Session.request')
+    def test_failing_hook_and_logging(self, mock_request):
+        mock_request.return_value = response(200)
+
+        def broken(event):
+            raise RuntimeError('boom')
+
+        transport = Transport(hooks=[broken, LoggingHook(level=logging.INFO)])
+        with self.assertLogs('basecampapi', level='INFO') as logs:
+            transport.get('https://3.basecampapi.com/99/projects.json')
+        self.assertTrue(any('Request hook' in line for line in logs.output))
+        self.assertTrue(any('GET /{id}/projects.json 200' in line for line in logs.output))
+        self.assertEqual(logs.records[-1].basecamp_status_code, 200)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from unittest.mock import patch, MagicMock
+import sys
+import types
+
+# Provide minimal stubs for external dependencies
+requests_stub = types.ModuleType('requests')
+requests_stub.post = lambda *args, **kwargs: None
+requests_stub.get = lambda *args, **kwargs: None
+requests_stub.Session = type('Session', (), {
+    'mount': lambda self, *args: None,
+    'request': lambda self, *args, **kwargs: None,
+    'close': lambda self: None,
+})
+requests_adapters_stub = types.ModuleType('requests.adapters')
+requests_adapters_stub.HTTPAdapter = MagicMock
+requests_adapters_stub.Retry = MagicMock
+requests_stub.adapters = requests_adapters_stub
+sys.modules.setdefault('requests', requests_stub)
+sys.modules.setdefault('requests.adapters', requests_adapters_stub)
+
+from basecampapi import Basecamp, Mirror
+from basecampapi.mirror import utc_timestamp
+
+CREDS = {
+    'account_id': '9',
+    'client_id': 'cid',
+    'client_secret': 'secret',
+    'redirect_uri': 'uri',
+    'refresh_token': 'ref',
+}
+
+
+def message(record_id, updated_at, author=1, subject='Hello', content='<div>Weekly update</div>'):
+    return {
+        'id': record_id, 'subject': subject, 'content': content,
+        'created_at': updated_at, 'updated_at': updated_at,
+        'creator': {'id': author, 'name': f'Person {author}'},
+        'parent': {'id': 50, 'type': 'Message::Board'},
+    }
+
+
+def comment(record_id, updated_at, parent_id=100, parent_type='Message', content='<div>Looks good</div>'):
+    return {
+        'id': record_id, 'content': content,
+        'created_at': updated_at, 'updated_at': updated_at,
+        'creator': {'id': 2, 'name': 'Person 2'},
+        'parent': {'id': parent_id, 'type': parent_type},
+    }
+
+
+class FakeRecordings:
+    def __init__(self):
+        self.records = {'Message': [], 'Comment': []}
+        self.requests = []
+
+    def __call__(self, method, url, **kwargs):
+        resp = MagicMock()
+        resp.ok = True
+        resp.status_code = 200
+        if 'launchpad' in url:
+            resp.json.return_value = {'access_token': 'tok'}
+            return resp
+        self.requests.append(url)
+        kind = 'Message' if 'type=Message' in url else 'Comment'
+        records = sorted(self.records[kind], key=lambda r: r['updated_at'], reverse=True)
+        if 'page=2' in url:
+            resp.json.return_value = records[2:]
+            resp.headers = {}
+        else:
+            resp.json.return_value = records[:2]
+            resp.headers = {'Link': f'<{url}&page=2>; rel="next"'} if len(records) > 2 else {}
+        return resp
+
+
+class TestMirror(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'mirror.db')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    @patch('requests.Session.request')
+    def test_incremental_sync_and_queries(self, mock_request):
+        server = FakeRecordings()
+        mock_request.side_effect = server
+        server.records['Message'] = [
+            message(100, '2024-01-01T10:00:00.000Z'),
+            message(101, '2024-01-02T10:00:00.000Z', author=3, subject='Pricing', content='<p>New pricing plan</p>'),
+            message(102, '2024-01-03T10:00:00.000-05:00'),
+        ]
+        server.records['Comment'] = [comment(200, '2024-01-04T10:00:00.000Z'), comment(201, '2024-01-04T11:00:00.000Z', parent_type='Todo')]
+        mirror = Mirror(self.path, session=Basecamp(credentials=dict(CREDS)))
+
+        self.assertEqual(mirror.sync(1), {'messages': 3, 'comments': 1})
+        self.assertEqual(mirror.watermark('Message:1'), '2024-01-03T15:00:00.000000Z')
+        self.assertIn('/projects/recordings.json?type=Message&bucket=1&sort=updated_at&direction=desc', server.requests[0])
+
+        server.requests.clear()
+        self.assertEqual(mirror.sync(1), {'messages': 0, 'comments': 0})
+        self.assertEqual(len(server.requests), 2)
+
+        server.records['Message'].append(message(103, '2024-02-01T00:00:00Z', subject='Launch'))
+        self.assertEqual(mirror.sync(1)['messages'], 1)
+        # A record updated at the same instant as the watermark is still picked up, once.
+        server.records['Message'].append(dict(message(104, '2024-02-01T00:00:00Z', author=3), created_at='2024-01-15T00:00:00Z'))
+        self.assertEqual(mirror.sync(1)['messages'], 1)
+        self.assertEqual(mirror.sync(1)['messages'], 0)
+
+        self.assertEqual([m['id'] for m in mirror.messages(author_id=1)], [103, 102, 100])
+        self.assertEqual([m['id'] for m in mirror.messages(since=datetime(2024, 1, 2), until='2024-01-03T00:00:00Z')], [101])
+        self.assertEqual([m['id'] for m in mirror.messages(board_id=50, limit=1)], [103])
+        self.assertEqual([c['id'] for c in mirror.comments(message_id=100)], [200])
+        self.assertEqual([r['id'] for r in mirror.search('pricing')], [101])
+        self.assertEqual([r['id'] for r in mirror.search('good')], [200])
+        mirror.close()
+
+    def test_utc_timestamp(self):
+        self.assertEqual(utc_timestamp('2024-01-01T00:00:00+01:00'), '2023-12-31T23:00:00.000000Z')
+        self.assertIsNone(utc_timestamp(None))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import json
+import unittest
+from unittest.mock import MagicMock
+
+from basecampapi.models import Attachment, CampfireLine, Message, loads, response_json
+from basecampapi.pagination import Paginator
+
+RECORD = {
+    'id': 1, 'status': 'active', 'subject': 'Hi', 'content': '<div>Hello</div>',
+    'created_at': '2024-01-01T00:00:00Z', 'updated_at': '2024-01-02T00:00:00Z', 'comments_count': 2,
+    'creator': {'id': 7, 'name': 'Ann', 'avatar_url': 'https://example.com/a.png'},
+    'bucket': {'id': 3, 'name': 'Project', 'type': 'Project'},
+    'parent': {'id': 4, 'type': 'Message::Board'},
+}
+
+
+class TestModels(unittest.TestCase):
+    def test_from_dict_flattens_nested_objects(self):
+        message = Message.from_dict(RECORD)
+        self.assertEqual((message.creator_name, message.bucket_id, message.parent_id), ('Ann', 3, 4))
+        self.assertFalse(hasattr(message, '__dict__'))
+        self.assertEqual(message.to_dict()['comments_count'], 2)
+
+    def test_selected_fields(self):
+        lines = CampfireLine.decode(json.dumps([RECORD, {'id': 2}]).encode(), fields=('id', 'creator_name'))
+        self.assertEqual([(line.id, line.creator_name, line.content) for line in lines], [(1, 'Ann', None), (2, None, None)])
+
+    def test_attachment_from_files_entry(self):
+        attachment = Attachment.from_dict({'filename': 'a.png', 'file_size': '3', 'content-type': 'image/png', 'sgid': 's'})
+        self.assertEqual(attachment, Attachment(sgid='s', filename='a.png', file_size='3', content_type='image/png'))
+
+    def test_response_json_and_paginator_models(self):
+        response = MagicMock()
+        response.ok = True
+        response.content = json.dumps([RECORD]).encode()
+        response.headers = {}
+        self.assertEqual(response_json(response), loads(response.content))
+
+        transport = MagicMock()
+        transport.get.return_value = response
+        messages = list(Paginator(transport, 'https://example.com/messages.json', {}, model=Message, fields=('id',)))
+        self.assertEqual(messages, [Message(id=1)])
+
+if __name__ == '__main__':
+    unittest.main()
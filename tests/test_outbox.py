@@ -0,0 +1,217 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+import sys
+import types
+
+# Provide minimal stubs for external dependencies
+requests_stub = types.ModuleType('requests')
+requests_stub.post = lambda *args, **kwargs: None
+requests_stub.get = lambda *args, **kwargs: None
+requests_stub.Session = type('Session', (), {
+    'mount': lambda self, *args: None,
+    'request': lambda self, *args, **kwargs: None,
+    'close': lambda self: None,
+})
+requests_adapters_stub = types.ModuleType('requests.adapters')
+requests_adapters_stub.HTTPAdapter = MagicMock
+requests_adapters_stub.Retry = MagicMock
+requests_stub.adapters = requests_adapters_stub
+sys.modules.setdefault('requests', requests_stub)
+sys.modules.setdefault('requests.adapters', requests_adapters_stub)
+
+from basecampapi import Outbox
+from basecampapi.endpoints.camprife import Campfire
+
+LINES_URL = 'https://3.basecampapi.com/9/buckets/1/chats/2/lines.json'
+ME = 42
+
+
+def response(status_code, body=None, headers=None):
+    result = MagicMock()
+    result.status_code = status_code
+    result.ok = status_code < 400
+    result.reason = 'reason'
+    result.text = 'text'
+    result.content = None
+    result.json.return_value = body
+    result.headers = headers or {}
+    return result
+
+
+class OutboxTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'outbox.db')
+        self.session = MagicMock()
+        self.session.base_url = 'https://3.basecampapi.com/9'
+        self.session.credentials = {'access_token': 'token'}
+        self.posted = []
+        # The chat's lines, newest first.
+        self.lines = [{'id': 3, 'content': 'earlier', 'creator': {'id': ME}}]
+
+        def post(url, headers=None, json=None):
+            self.posted.append(json['content'])
+            return response(201, self.add_line(json['content']))
+        self.session.transport.post.side_effect = post
+
+        def get(url, headers=None):
+            if url.endswith('/my/profile.json'):
+                return response(200, {'id': ME})
+            return response(200, list(self.lines))
+        self.session.transport.get.side_effect = get
+
+    def add_line(self, content, creator=ME):
+        line = {'id': self.lines[0]['id'] + 1, 'content': content, 'creator': {'id': creator}}
+        self.lines.insert(0, line)
+        return line
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def open(self, **kwargs):
+        kwargs.setdefault('backoff_factor', 0)
+        outbox = Outbox(self.path, session=self.session, start=False, **kwargs)
+        self.addCleanup(outbox.close)
+        return outbox
+
+    def test_write_is_queued_and_delivered_in_order(self):
+        outbox = self.open()
+        campfire = Campfire(1, 2, session=self.session)
+        keys = [campfire.write(f'line {number}', outbox=outbox) for number in range(3)]
+        self.session.transport.post.assert_not_called()
+        self.assertEqual(len(outbox), 3)
+
+        self.assertEqual(outbox.drain(), 3)
+        self.assertEqual(self.posted, ['line 0', 'line 1', 'line 2'])
+        self.assertEqual(outbox.status(keys[2])['state'], 'sent')
+        self.assertEqual(outbox.status(keys[2])['result'], {'id': 6, 'content': 'line 2', 'creator': {'id': ME}})
+        self.assertEqual(outbox.stats()['sent'], 3)
+
+    def test_duplicate_key_is_queued_once(self):
+        outbox = self.open()
+        outbox.enqueue(LINES_URL, {'content': 'hello'}, key='deploy-42')
+        outbox.enqueue(LINES_URL, {'content': 'hello'}, key='deploy-42')
+        outbox.drain()
+        outbox.enqueue(LINES_URL, {'content': 'hello'}, key='deploy-42')
+        outbox.drain()
+        self.assertEqual(self.posted, ['hello'])
+
+    def test_failed_write_holds_back_later_writes_to_same_url(self):
+        outbox = self.open(max_attempts=3)
+        replies = [response(429, headers={}), None, None]
+        post = self.session.transport.post.side_effect
+
+        def flaky(url, headers=None, json=None):
+            reply = replies.pop(0) if replies else None
+            return reply if reply is not None else post(url, headers=headers, json=json)
+        self.session.transport.post.side_effect = flaky
+
+        first = outbox.enqueue(LINES_URL, {'content': 'first'})
+        outbox.enqueue(LINES_URL, {'content': 'second'})
+        outbox.drain()
+        self.assertEqual(outbox.status(first)['attempts'], 2)
+        self.assertEqual(self.posted, ['first', 'second'])
+
+    def test_rejected_write_is_failed_without_retry(self):
+        outbox = self.open()
+        self.session.transport.post.side_effect = lambda *args, **kwargs: response(422)
+        key = outbox.enqueue(LINES_URL, {'content': 'bad'})
+        outbox.drain()
+        self.assertEqual(outbox.status(key)['state'], 'failed')
+        self.assertEqual(self.session.transport.post.call_count, 1)
+        self.assertEqual(outbox.requeue_failed(), 1)
+        self.assertEqual(outbox.status(key)['state'], 'pending')
+
+    def test_write_in_doubt_is_not_posted_twice(self):
+        outbox = self.open(max_attempts=1)
+        self.session.transport.post.side_effect = lambda *args, **kwargs: response(502)
+        key = outbox.enqueue(LINES_URL, {'content': 'deployed'})
+        outbox.drain()
+        self.assertEqual(outbox.status(key)['state'], 'failed')
+        outbox.requeue_failed()
+
+        # The 502 came from a proxy after Basecamp had created the line.
+        line = self.add_line('deployed')
+        self.session.transport.post.reset_mock()
+        outbox.drain()
+        self.session.transport.post.assert_not_called()
+        self.assertEqual(outbox.status(key)['state'], 'sent')
+        self.assertEqual(outbox.status(key)['result']['id'], line['id'])
+
+    def test_identical_writes_in_doubt_match_one_line_each(self):
+        outbox = self.open(max_attempts=1)
+        self.add_line('deployed')
+        self.session.transport.post.side_effect = lambda *args, **kwargs: response(502)
+        first = outbox.enqueue(LINES_URL, {'content': 'deployed'})
+        second = outbox.enqueue(LINES_URL, {'content': 'deployed'})
+        outbox.drain()
+        outbox.drain()
+        outbox.requeue_failed()
+
+        # Only the first write reached Basecamp; the line posted before either write does not count.
+        line = self.add_line('deployed')
+        self.session.transport.post.side_effect = lambda *args, **kwargs: response(201, self.add_line('deployed'))
+        outbox.drain()
+        self.assertEqual(outbox.status(first)['result']['id'], line['id'])
+        self.assertEqual(outbox.status(second)['state'], 'sent')
+        self.assertEqual(outbox.status(second)['result']['id'], line['id'] + 1)
+        self.assertEqual(self.session.transport.post.call_count, 1 + 2)
+
+    def test_identical_line_by_someone_else_is_not_taken_for_a_write_in_doubt(self):
+        outbox = self.open(max_attempts=1)
+        self.session.transport.post.side_effect = lambda *args, **kwargs: response(502)
+        key = outbox.enqueue(LINES_URL, {'content': 'deployed'})
+        outbox.drain()
+        outbox.requeue_failed()
+
+        self.add_line('deployed', creator=ME + 1)
+        self.session.transport.post.side_effect = None
+        self.session.transport.post.return_value = response(201, {'id': 99, 'content': 'deployed'})
+        outbox.drain()
+        self.assertEqual(outbox.status(key)['result']['id'], 99)
+
+    def test_write_to_another_account_is_rejected(self):
+        outbox = self.open()
+        other = MagicMock()
+        other.base_url = 'https://3.basecampapi.com/8'
+        with self.assertRaises(Exception):
+            Campfire(1, 2, session=other).write('hello', outbox=outbox)
+        self.assertEqual(len(outbox), 0)
+
+        # A write queued before the session switched accounts is not sent with the other account's token.
+        earlier = outbox.enqueue(LINES_URL, {'content': 'hello'})
+        self.session.base_url = 'https://3.basecampapi.com/8'
+        key = outbox.enqueue('https://3.basecampapi.com/8/buckets/1/chats/2/lines.json', {'content': 'hi'})
+        outbox.drain()
+        self.assertEqual(self.posted, ['hi'])
+        self.assertEqual(outbox.status(key)['state'], 'sent')
+        self.assertEqual(outbox.status(earlier)['state'], 'failed')
+
+    def test_writes_survive_restart(self):
+        outbox = Outbox(self.path, session=self.session, start=False)
+        key = outbox.enqueue(LINES_URL, {'content': 'hello'})
+        outbox.close()
+
+        reopened = self.open()
+        reopened.drain()
+        self.assertEqual(reopened.status(key)['state'], 'sent')
+        self.assertEqual(self.posted, ['hello'])
+
+    def test_full_outbox_rejects_writes(self):
+        outbox = self.open(max_pending=1)
+        outbox.enqueue(LINES_URL, {'content': 'one'})
+        with self.assertRaises(Exception):
+            outbox.enqueue(LINES_URL, {'content': 'two'}, timeout=0)
+
+    def test_background_worker_delivers(self):
+        outbox = Outbox(self.path, session=self.session)
+        self.addCleanup(outbox.close)
+        outbox.enqueue(LINES_URL, {'content': 'hello'})
+        self.assertTrue(outbox.flush(timeout=5))
+        self.assertEqual(self.posted, ['hello'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+from unittest.mock import MagicMock
+
+from basecampapi.pagination import Paginator, next_page_url
+
+
+def page(records, next_url=None):
+    response = MagicMock()
+    response.ok = True
+    response.json.return_value = records
+    response.headers = {'Link': f'<{next_url}>; rel="next"'} if next_url else {}
+    return response
+
+
+class TestPagination(unittest.TestCase):
+    def setUp(self):
+        self.pages = {
+            'https://x/lines.json': page([{'id': 1}, {'id': 2}], 'https://x/lines.json?page=2'),
+            'https://x/lines.json?page=2': page([{'id': 3}, {'id': 4}], 'https://x/lines.json?page=3'),
+            'https://x/lines.json?page=3': page([{'id': 5}]),
+        }
+        self.transport = MagicMock()
+        self.transport.get.side_effect = lambda url, headers: self.pages[url]
+
+    def test_next_page_url(self):
+        header = '<https://3.basecampapi.com/1/buckets/2/chats/3/lines.json?page=4>; rel="next"'
+        self.assertEqual(next_page_url(header), 'https://3.basecampapi.com/1/buckets/2/chats/3/lines.json?page=4')
+        self.assertIsNone(next_page_url(None))
+        self.assertIsNone(next_page_url('<https://x?page=1>; rel="prev"'))
+
+    def test_follows_links_lazily(self):
+        paginator = Paginator(self.transport, 'https://x/lines.json', {})
+        iterator = iter(paginator)
+        self.assertEqual(next(iterator), {'id': 1})
+        self.assertEqual(self.transport.get.call_count, 1)
+        self.assertEqual([r['id'] for r in iterator], [2, 3, 4, 5])
+        self.assertEqual(self.transport.get.call_count, 3)
+
+    def test_limit_and_until(self):
+        self.assertEqual([r['id'] for r in Paginator(self.transport, 'https://x/lines.json', {}, limit=3)], [1, 2, 3])
+        self.assertEqual(self.transport.get.call_count, 2)
+
+        until = lambda record: record['id'] == 3
+        self.assertEqual([r['id'] for r in Paginator(self.transport, 'https://x/lines.json', {}, until=until)], [1, 2])
+
+    def test_prefetch(self):
+        paginator = Paginator(self.transport, 'https://x/lines.json', {}, prefetch=True)
+        self.assertEqual([r['id'] for r in paginator], [1, 2, 3, 4, 5])
+        self.assertEqual(self.transport.get.call_count, 3)
+
+    def test_iterating_again_starts_from_the_first_page(self):
+        for prefetch in (False, True):
+            paginator = Paginator(self.transport, 'https://x/lines.json', {}, limit=2, prefetch=prefetch)
+            self.assertEqual([r['id'] for r in paginator], [1, 2])
+            paginator.limit = None
+            self.assertEqual([r['id'] for r in paginator], [1, 2, 3, 4, 5])
+            self.assertEqual([len(records) for records in paginator.pages()], [2, 2, 1])
+
+    def test_error_raises(self):
+        response = MagicMock()
+        response.ok = False
+        response.status_code = 500
+        self.transport.get.side_effect = None
+        self.transport.get.return_value = response
+        with self.assertRaises(Exception):
+            list(Paginator(self.transport, 'https://x/lines.json', {}))
+
+if __name__ == '__main__':
+    unittest.main()
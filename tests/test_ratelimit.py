@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from basecampapi.ratelimit import FileTokenBucket, TokenBucket, retry_after, retry_delay
+from basecampapi.transport import Transport
+
+
+def response(status_code, headers=None):
+    resp = MagicMock()
+    resp.status_code = status_code
+    resp.headers = dict(headers or {})
+    return resp
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_paces_after_burst(self):
+        bucket = TokenBucket(capacity=2, period=1)
+        self.assertEqual(bucket.reserve(), 0)
+        self.assertEqual(bucket.reserve(), 0)
+        self.assertAlmostEqual(bucket.reserve(), 0.5, places=2)
+
+    def test_pause(self):
+        bucket = TokenBucket(capacity=10, period=1)
+        bucket.pause(3)
+        self.assertAlmostEqual(bucket.reserve(), 3, places=2)
+
+    def test_file_bucket_is_shared(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'bucket.json')
+            first = FileTokenBucket(path, capacity=1, period=1)
+            second = FileTokenBucket(path, capacity=1, period=1)
+            self.assertEqual(first.reserve(), 0)
+            self.assertAlmostEqual(second.reserve(), 1, places=1)
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_retry_after(self):
+        self.assertEqual(retry_after({'Retry-After': '7'}), 7)
+        self.assertIsNone(retry_after({}))
+        self.assertEqual(retry_after({'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'}), 0)
+
+    def test_retry_delay(self):
+        self.assertEqual(retry_delay('POST', 429, {'Retry-After': '2'}, 0, 3, 0.5), 2)
+        self.assertLessEqual(retry_delay('GET', 503, {}, 2, 3, 0.5), 2)
+        self.assertIsNone(retry_delay('POST', 503, {}, 0, 3, 0.5))
+        self.assertIsNone(retry_delay('GET', 404, {}, 0, 3, 0.5))
+        self.assertIsNone(retry_delay('GET', 503, {}, 3, 3, 0.5))
+
+    @patch('time.sleep')
+    @patch('requests.Session.request')
+    def test_transport_retries_429(self, mock_request, mock_sleep):
+        limiter = TokenBucket()
+        ok = response(200)
+        mock_request.side_effect = [response(429, {'Retry-After': '4'}), ok]
+
+        result = Transport(rate_limiter=limiter).post('https://x', json={'content': 'hi'})
+
+        self.assertIs(result, ok)
+        self.assertEqual(mock_request.call_count, 2)
+        mock_sleep.assert_any_call(4.0)
+        self.assertGreater(limiter.reserve(), 3)
+
+    @patch('time.sleep')
+    @patch('requests.Session.request')
+    def test_transport_does_not_repost_on_5xx(self, mock_request, mock_sleep):
+        mock_request.return_value = response(500)
+        Transport().post('https://x', json={})
+        self.assertEqual(mock_request.call_count, 1)
+
+        Transport(max_retries=2).get('https://x')
+        self.assertEqual(mock_request.call_count, 4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+import sys
+import types
+
+# Provide minimal stubs for external dependencies
+requests_stub = types.ModuleType('requests')
+requests_stub.post = lambda *args, **kwargs: None
+requests_stub.get = lambda *args, **kwargs: None
+requests_stub.Session = type('Session', (), {
+    'mount': lambda self, *args: None,
+    'request': lambda self, *args, **kwargs: None,
+    'close': lambda self: None,
+})
+requests_adapters_stub = types.ModuleType('requests.adapters')
+requests_adapters_stub.HTTPAdapter = MagicMock
+requests_adapters_stub.Retry = MagicMock
+requests_stub.adapters = requests_adapters_stub
+sys.modules.setdefault('requests', requests_stub)
+sys.modules.setdefault('requests.adapters', requests_adapters_stub)
+
+from basecampapi import Recordings
+from basecampapi.models import Message
+
+BASE_URL = 'https://3.basecampapi.com/9'
+
+
+def record(record_id, updated_at, kind='Message'):
+    return {'id': record_id, 'type': kind, 'subject': f'S{record_id}', 'updated_at': updated_at}
+
+
+class FakeListing:
+    # Serves recordings newest first, two per page, like /projects/recordings.json.
+    def __init__(self):
+        self.records = {'Message': [], 'Comment': []}
+        self.requests = []
+        self.failing = None
+
+    def get(self, url, headers=None, **kwargs):
+        self.requests.append(url)
+        if self.failing and self.failing in url:
+            raise Exception('connection reset')
+        kind = 'Comment' if 'type=Comment' in url else 'Message'
+        page = int(url.split('&page=')[1]) if '&page=' in url else 1
+        ordered = sorted(self.records[kind], key=lambda item: item['updated_at'], reverse=True)
+        body = ordered[(page - 1) * 2:page * 2]
+        response = MagicMock()
+        response.ok = True
+        response.content = json.dumps(body).encode()
+        response.headers = {}
+        if page * 2 < len(ordered):
+            response.headers['Link'] = f'<{url.split("&page=")[0]}&page={page + 1}>; rel="next"'
+        return response
+
+
+class RecordingsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cursor = os.path.join(self.directory.name, 'cursor.json')
+        self.listing = FakeListing()
+        session = MagicMock()
+        session.base_url = BASE_URL
+        session.credentials = {'access_token': 'token'}
+        session.transport.get.side_effect = self.listing.get
+        self.recordings = Recordings(session=session)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def ids(self, feed):
+        return [item['id'] for item in feed]
+
+    def test_recordings_url(self):
+        self.assertEqual(
+            self.recordings.recordings_url('Todo', buckets=[1, 2], status='archived'),
+            BASE_URL + '/projects/recordings.json?type=Todo&bucket=1,2&status=archived&sort=updated_at&direction=desc',
+        )
+
+    def test_feed_reads_only_changes(self):
+        self.listing.records['Message'] = [record(n, f'2024-01-0{n}T00:00:00Z') for n in range(1, 6)]
+        self.assertEqual(self.ids(self.recordings.changes(types=['Message'], cursor=self.cursor)), [5, 4, 3, 2, 1])
+
+        self.listing.records['Message'][1] = record(2, '2024-02-01T00:00:00Z')
+        self.listing.records['Message'].append(record(6, '2024-02-01T00:00:00Z'))
+        self.listing.requests.clear()
+        self.assertEqual(sorted(self.ids(self.recordings.changes(types=['Message'], cursor=self.cursor))), [2, 6])
+        # Both changes are on the first page, and the second page starts with something already seen.
+        self.assertEqual(len(self.listing.requests), 2)
+
+        self.assertEqual(self.ids(self.recordings.changes(types=['Message'], cursor=self.cursor)), [])
+
+    def test_records_updated_at_the_cursor_instant_are_not_lost(self):
+        self.listing.records['Message'] = [record(1, '2024-01-01T00:00:00Z')]
+        list(self.recordings.changes(types=['Message'], cursor=self.cursor))
+        self.listing.records['Message'].append(record(2, '2024-01-01T00:00:00.000+00:00'))
+        self.assertEqual(self.ids(self.recordings.changes(types=['Message'], cursor=self.cursor)), [2])
+
+    def test_interrupted_run_resumes_without_skipping(self):
+        self.listing.records['Message'] = [record(n, f'2024-01-0{n}T00:00:00Z') for n in range(1, 6)]
+        self.listing.records['Comment'] = [record(10, '2024-01-01T00:00:00Z', 'Comment')]
+        self.listing.failing = 'page=3'
+        feed = self.recordings.changes(cursor=self.cursor)
+        with self.assertRaises(Exception):
+            for item in feed:
+                pass
+
+        self.listing.failing = None
+        resumed = self.recordings.changes(cursor=self.cursor, typed=True)
+        items = list(resumed)
+        self.assertEqual([(type(item).__name__, item.id) for item in items], [('Message', 1), ('Comment', 10)])
+        self.assertIsInstance(items[0], Message)
+        self.assertEqual(self.ids(self.recordings.changes(cursor=self.cursor)), [])
+
+    def test_reset(self):
+        self.listing.records['Message'] = [record(1, '2024-01-01T00:00:00Z')]
+        feed = self.recordings.changes(types=['Message'], cursor=self.cursor)
+        list(feed)
+        feed.reset()
+        self.assertEqual(self.ids(self.recordings.changes(types=['Message'], cursor=self.cursor)), [1])
+
+
+if __name__ == "__main__":
+    unittest.main()
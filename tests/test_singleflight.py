@@ -0,0 +1,132 @@
+import asyncio
+import threading
+import time
+import unittest
+from unittest.mock import patch, MagicMock
+import sys
+import types
+
+# Provide minimal stubs for external dependencies
+requests_stub = types.ModuleType('requests')
+requests_stub.post = lambda *args, **kwargs: None
+requests_stub.get = lambda *args, **kwargs: None
+requests_stub.Session = type('Session', (), {
+    'mount': lambda self, *args: None,
+    'request': lambda self, *args, **kwargs: None,
+    'close': lambda self: None,
+})
+requests_adapters_stub = types.ModuleType('requests.adapters')
+requests_adapters_stub.HTTPAdapter = MagicMock
+requests_adapters_stub.Retry = MagicMock
+requests_stub.adapters = requests_adapters_stub
+sys.modules.setdefault('requests', requests_stub)
+sys.modules.setdefault('requests.adapters', requests_adapters_stub)
+
+from basecampapi.singleflight import AsyncSingleFlight, SingleFlight
+from basecampapi.transport import Transport
+
+
+def run_together(count, function):
+    results = [None] * count
+    barrier = threading.Barrier(count)
+
+    def run(index):
+        barrier.wait()
+        results[index] = function()
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class SingleFlightTestCase(unittest.TestCase):
+    def test_concurrent_calls_share_one_run(self):
+        flights = SingleFlight()
+        calls = []
+
+        def slow():
+            calls.append(1)
+            time.sleep(0.1)
+            return object()
+
+        results = run_together(5, lambda: flights.do('key', slow))
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(flights.shared, 4)
+
+        # Without a ttl, a later call runs again.
+        flights.do('key', slow)
+        self.assertEqual(len(calls), 2)
+
+    def test_exceptions_are_shared_and_not_remembered(self):
+        flights = SingleFlight(ttl=60)
+
+        def fail():
+            time.sleep(0.05)
+            raise ValueError('boom')
+
+        errors = run_together(3, lambda: self.assertRaises(ValueError, flights.do, 'key', fail))
+        self.assertEqual(len(errors), 3)
+        self.assertEqual(flights.do('key', lambda: 'ok'), 'ok')
+
+    def test_ttl_and_forget(self):
+        flights = SingleFlight(ttl=60)
+        self.assertEqual(flights.do('key', lambda: 1), 1)
+        self.assertEqual(flights.do('key', lambda: 2), 1)
+        self.assertEqual(flights.do('key', lambda: 3, memoize=lambda result: False), 1)
+        flights.forget()
+        self.assertEqual(flights.do('key', lambda: 4, memoize=lambda result: False), 4)
+        self.assertEqual(flights.do('key', lambda: 5), 5)
+
+
+class AsyncSingleFlightTestCase(unittest.TestCase):
+    def test_concurrent_tasks_share_one_run(self):
+        flights = AsyncSingleFlight()
+        calls = []
+
+        async def slow(value):
+            calls.append(value)
+            await asyncio.sleep(0.05)
+            return value
+
+        async def main():
+            waiter = asyncio.ensure_future(flights.do('key', slow, 1))
+            await asyncio.sleep(0)
+            waiter.cancel()
+            # Cancelling one waiter leaves the call running for the others.
+            return await asyncio.gather(*(flights.do('key', slow, 1) for _ in range(3)))
+
+        self.assertEqual(asyncio.run(main()), [1, 1, 1])
+        self.assertEqual(calls, [1])
+
+
+class TransportSingleFlightTestCase(unittest.TestCase):
+    @patch('requests.Session.request')
+    def test_identical_gets_are_collapsed(self, mock_request):
+        def slow_request(method, url, **kwargs):
+            time.sleep(0.1)
+            return MagicMock(ok=True, status_code=200)
+        mock_request.side_effect = slow_request
+
+        transport = Transport(single_flight=SingleFlight())
+        headers = {'Authorization': 'Bearer a', 'Content-Type': 'application/json'}
+        results = run_together(4, lambda: transport.get('https://example.com/messages/1.json', headers=headers))
+        self.assertEqual(mock_request.call_count, 1)
+        self.assertTrue(all(result is results[0] for result in results))
+
+    @patch('requests.Session.request')
+    def test_writes_drop_remembered_responses(self, mock_request):
+        mock_request.side_effect = lambda method, url, **kwargs: MagicMock(ok=True, status_code=200)
+        transport = Transport(single_flight=SingleFlight(ttl=60))
+        url = 'https://example.com/messages/1.json'
+        first = transport.get(url)
+        self.assertIs(transport.get(url), first)
+        transport.put(url, json={'subject': 'New'})
+        self.assertIsNot(transport.get(url), first)
+        self.assertEqual(mock_request.call_count, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
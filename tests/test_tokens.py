@@ -0,0 +1,92 @@
+import os
+import stat
+import tempfile
+import time
+import unittest
+from unittest.mock import patch, MagicMock
+import sys
+import types
+
+# Provide minimal stubs for external dependencies
+requests_stub = types.ModuleType('requests')
+requests_stub.post = lambda *args, **kwargs: None
+requests_stub.get = lambda *args, **kwargs: None
+requests_stub.Session = type('Session', (), {
+    'mount': lambda self, *args: None,
+    'request': lambda self, *args, **kwargs: None,
+    'close': lambda self: None,
+})
+requests_adapters_stub = types.ModuleType('requests.adapters')
+requests_adapters_stub.HTTPAdapter = MagicMock
+requests_adapters_stub.Retry = MagicMock
+requests_stub.adapters = requests_adapters_stub
+sys.modules.setdefault('requests', requests_stub)
+sys.modules.setdefault('requests.adapters', requests_adapters_stub)
+
+from basecampapi import Basecamp, Campfire
+from basecampapi.tokens import FileTokenStore, MemoryTokenStore, token_key
+
+CREDS = {
+    'account_id': '6',
+    'client_id': 'cid',
+    'client_secret': 'secret',
+    'redirect_uri': 'uri',
+    'refresh_token': 'ref',
+}
+
+
+def token_response(token, expires_in=1209600):
+    resp = MagicMock()
+    resp.ok = True
+    resp.json.return_value = {'access_token': token, 'expires_in': expires_in}
+    return resp
+
+
+class TestTokens(unittest.TestCase):
+    def test_file_store_roundtrip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'nested', 'tokens.json')
+            FileTokenStore(path).save('k', {'access_token': 'tok', 'expires_at': 1.0})
+            self.assertEqual(FileTokenStore(path).load('k'), {'access_token': 'tok', 'expires_at': 1.0})
+            self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o600)
+            self.assertNotIn('ref', token_key(CREDS))
+
+    @patch('requests.Session.request')
+    def test_cached_token_is_reused(self, mock_request):
+        mock_request.return_value = token_response('tok')
+        store = MemoryTokenStore()
+
+        Basecamp(credentials=dict(CREDS), token_store=store)
+        bc = Basecamp(credentials=dict(CREDS), token_store=store)
+
+        self.assertEqual(mock_request.call_count, 1)
+        self.assertEqual(bc.credentials['access_token'], 'tok')
+
+    @patch('requests.Session.request')
+    def test_token_renewed_before_expiry(self, mock_request):
+        mock_request.side_effect = [token_response('old', expires_in=60), token_response('new')]
+        bc = Basecamp(credentials=dict(CREDS), refresh_margin=3600)
+
+        self.assertEqual(bc.access_token(), 'new')
+        self.assertGreater(bc.token_expires_at, time.time() + 3600)
+        self.assertEqual(bc.access_token(), 'new')
+        self.assertEqual(mock_request.call_count, 2)
+
+    @patch('requests.Session.request')
+    def test_reauthenticates_on_401(self, mock_request):
+        rejected = MagicMock()
+        rejected.status_code = 401
+        lines = MagicMock()
+        lines.ok = True
+        lines.json.return_value = [{'id': 1}]
+        mock_request.side_effect = [token_response('old'), rejected, token_response('new'), lines]
+
+        Basecamp(credentials=dict(CREDS))
+        result = Campfire(project_id=1, campfire_id=2).get_lines()
+
+        self.assertEqual(result, [{'id': 1}])
+        self.assertEqual(mock_request.call_count, 4)
+        self.assertEqual(mock_request.call_args.kwargs['headers']['Authorization'], 'Bearer new')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import sys
+import types
+
+# Provide minimal stubs for external dependencies
+requests_stub = types.ModuleType('requests')
+requests_stub.post = lambda *args, **kwargs: None
+requests_stub.get = lambda *args, **kwargs: None
+requests_stub.Session = type('Session', (), {
+    'mount': lambda self, *args: None,
+    'request': lambda self, *args, **kwargs: None,
+    'close': lambda self: None,
+})
+requests_adapters_stub = types.ModuleType('requests.adapters')
+requests_adapters_stub.HTTPAdapter = MagicMock
+requests_adapters_stub.Retry = MagicMock
+requests_stub.adapters = requests_adapters_stub
+sys.modules.setdefault('requests', requests_stub)
+sys.modules.setdefault('requests.adapters', requests_adapters_stub)
+
+from basecampapi import Basecamp, Campfire
+from basecampapi.transport import Transport
+
+class TestTransport(unittest.TestCase):
+    @patch('requests.adapters.HTTPAdapter')
+    def test_pool_size_configures_adapter(self, mock_adapter):
+        Transport(pool_size=25)
+        mock_adapter.assert_called_once()
+        self.assertEqual(mock_adapter.call_args.kwargs['pool_maxsize'], 25)
+        self.assertEqual(mock_adapter.call_args.kwargs['pool_connections'], 25)
+
+    @patch('requests.Session.request')
+    def test_default_timeout(self, mock_request):
+        Transport(timeout=5).get('https://example.com')
+        mock_request.assert_called_with('GET', 'https://example.com', timeout=5)
+
+    @patch('requests.Session.request')
+    def test_endpoints_share_session_transport(self, mock_request):
+        access_resp = MagicMock()
+        access_resp.ok = True
+        access_resp.json.return_value = {'access_token': 'tok'}
+
+        get_resp = MagicMock()
+        get_resp.ok = True
+        get_resp.json.return_value = {'id': 2}
+        mock_request.side_effect = [access_resp, get_resp]
+
+        creds = {
+            'account_id': '4',
+            'client_id': 'cid',
+            'client_secret': 'secret',
+            'redirect_uri': 'uri',
+            'refresh_token': 'ref',
+        }
+
+        bc = Basecamp(credentials=creds)
+        campfire = Campfire(project_id=1, campfire_id=2)
+        campfire.get_lines()
+
+        self.assertIs(campfire.session, bc)
+        self.assertIs(campfire._Campfire__transport, bc.transport)
+        self.assertEqual(mock_request.call_count, 2)
+        mock_request.assert_called_with(
+            'GET',
+            'https://3.basecampapi.com/4/buckets/1/chats/2/lines.json',
+            headers={'Authorization': 'Bearer tok', 'Content-Type': 'application/json'}
+        )
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,201 @@
+import io
+import os
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+import sys
+import types
+
+# Provide minimal stubs for external dependencies
+requests_stub = types.ModuleType('requests')
+requests_stub.post = lambda *args, **kwargs: None
+requests_stub.get = lambda *args, **kwargs: None
+requests_stub.Session = type('Session', (), {
+    'mount': lambda self, *args: None,
+    'request': lambda self, *args, **kwargs: None,
+    'close': lambda self: None,
+})
+requests_adapters_stub = types.ModuleType('requests.adapters')
+requests_adapters_stub.HTTPAdapter = MagicMock
+requests_adapters_stub.Retry = MagicMock
+requests_stub.adapters = requests_adapters_stub
+sys.modules.setdefault('requests', requests_stub)
+sys.modules.setdefault('requests.adapters', requests_adapters_stub)
+
+filetype_stub = types.ModuleType('filetype')
+filetype_stub.guess = lambda *args, **kwargs: None
+sys.modules.setdefault('filetype', filetype_stub)
+
+from basecampapi import Basecamp
+from basecampapi.uploads import UploadBody, UploadCache, content_digest, sniff_mime
+
+CREDS = {
+    'account_id': '8',
+    'client_id': 'cid',
+    'client_secret': 'secret',
+    'redirect_uri': 'uri',
+    'refresh_token': 'ref',
+}
+
+
+class TestUploadBody(unittest.TestCase):
+    def test_sources(self):
+        for source in (b'abcdef', bytearray(b'abcdef'), memoryview(b'abcdef'), io.BytesIO(b'abcdef')):
+            body = UploadBody(source, chunk_size=4)
+            self.assertEqual(body.len, 6)
+            self.assertEqual(list(body), [b'abcd', b'ef'])
+
+        body = UploadBody(iter([b'ab', b'cdef']), chunk_size=3)
+        self.assertIsNone(body.len)
+        self.assertEqual(b''.join(body), b'abcdef')
+
+    def test_peek_does_not_consume(self):
+        body = UploadBody(iter([b'ab', b'cd', b'ef']))
+        self.assertEqual(body.peek(3), b'abc')
+        self.assertEqual(body.read(), b'abcd')
+        self.assertEqual(body.read(), b'ef')
+        self.assertEqual(body.read(), b'')
+
+    def test_progress_and_rewind(self):
+        progress = []
+        body = UploadBody(b'abcdef', progress=lambda sent, total: progress.append((sent, total)), chunk_size=4)
+        list(body)
+        self.assertEqual(progress, [(4, 6), (6, 6)])
+        body.seek(0)
+        self.assertEqual(body.read(), b'abcd')
+
+        with self.assertRaises(OSError):
+            UploadBody(iter([b'ab'])).seek(0)
+
+    @patch('filetype.guess')
+    def test_sniff_mime_reads_only_header(self, mock_guess):
+        mock_guess.return_value = None
+        self.assertEqual(sniff_mime(b'x' * 1000, 'report.pdf'), 'application/pdf')
+        self.assertEqual(len(mock_guess.call_args.args[0]), 261)
+        self.assertEqual(sniff_mime(b'', None), 'application/octet-stream')
+
+
+class TestAttachmentUploads(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.paths = []
+        for index in range(3):
+            path = os.path.join(self.tmp.name, f'file{index}.txt')
+            with open(path, 'wb') as handle:
+                handle.write(b'x' * (index + 1))
+            self.paths.append(path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    @patch('requests.Session.request')
+    def test_upload_many_and_stream(self, mock_request):
+        def server(method, url, **kwargs):
+            resp = MagicMock()
+            resp.ok = True
+            if 'launchpad' in url:
+                resp.json.return_value = {'access_token': 'tok'}
+            else:
+                data = kwargs['data']
+                body = b''.join(data) if isinstance(data, UploadBody) else data.read()
+                resp.json.return_value = {'attachable_sgid': f'sgid-{len(body)}'}
+            return resp
+
+        mock_request.side_effect = server
+        attachments = Basecamp(credentials=dict(CREDS)).attachments()
+
+        progress = []
+        sgids = attachments.upload_many(self.paths, max_workers=3, progress=lambda path, sent, total: progress.append(path))
+        self.assertEqual(sgids, ['sgid-1', 'sgid-2', 'sgid-3'])
+        self.assertEqual(sorted(attachments.files), ['file0.txt', 'file1.txt', 'file2.txt'])
+        self.assertEqual(sorted(set(progress)), self.paths)
+
+        sgid = attachments.upload_stream((chunk for chunk in [b'ab', b'cd']), 'notes.txt')
+        self.assertEqual(sgid, 'sgid-4')
+        headers = mock_request.call_args.kwargs['headers']
+        self.assertEqual(headers['Content-Type'], 'text/plain')
+        # Basecamp needs the size up front, so a generator is measured on disk first.
+        self.assertEqual(headers['Content-Length'], '4')
+
+
+class TestUploadCache(unittest.TestCase):
+    def test_digest_is_streamed_and_rewinds(self):
+        stream = io.BytesIO(b'--abcdef')
+        stream.seek(2)
+        self.assertEqual(content_digest(stream, chunk_size=3), content_digest(b'abcdef'))
+        self.assertEqual(stream.tell(), 2)
+
+    def test_eviction_and_stats(self):
+        cache = UploadCache(max_entries=2)
+        cache.put('8', 'a', 'a.png', 'sgid-a', 1, 'image/png')
+        cache.put('8', 'b', 'b.png', 'sgid-b', 1, 'image/png')
+        self.assertEqual(cache.get('8', 'a', 'a.png')['sgid'], 'sgid-a')
+        cache.put('8', 'c', 'c.png', 'sgid-c', 1, 'image/png')
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get('8', 'b', 'b.png'))
+        self.assertIsNone(cache.get('9', 'a', 'a.png'))
+        self.assertEqual(cache.stats, {'hits': 1, 'misses': 2, 'hit_rate': 1 / 3})
+
+    @patch('requests.Session.request')
+    def test_repeated_uploads_hit_cache(self, mock_request):
+        uploads = []
+
+        def server(method, url, **kwargs):
+            resp = MagicMock()
+            resp.ok = True
+            if 'launchpad' in url:
+                resp.json.return_value = {'access_token': 'tok'}
+            else:
+                data = kwargs['data']
+                body = b''.join(data) if isinstance(data, UploadBody) else bytes(data)
+                uploads.append(body)
+                resp.json.return_value = {'attachable_sgid': f'sgid-{len(uploads)}'}
+            return resp
+
+        mock_request.side_effect = server
+        cache = UploadCache()
+        attachments = Basecamp(credentials=dict(CREDS)).attachments(upload_cache=cache)
+
+        self.assertEqual(attachments.upload_from_bytes(b'logo', 'logo.png'), 'sgid-1')
+        self.assertEqual(attachments.upload_from_bytes(bytearray(b'logo'), 'logo.png'), 'sgid-1')
+        self.assertEqual(attachments.upload_stream(io.BytesIO(b'logo'), 'logo.png'), 'sgid-1')
+        self.assertEqual(attachments.upload_from_bytes(b'logo', 'other.png'), 'sgid-2')
+        self.assertEqual(len(uploads), 2)
+
+        # An unseekable stream is hashed while it is sent.
+        self.assertEqual(attachments.upload_stream(iter([b'te', b'xt']), 'a.txt'), 'sgid-3')
+        self.assertEqual(attachments.upload_from_bytes(b'text', 'a.txt'), 'sgid-3')
+        self.assertEqual(len(uploads), 3)
+        self.assertEqual(attachments.files['a.txt']['sgid'], 'sgid-3')
+        self.assertEqual(cache.stats['hits'], 3)
+
+    @patch('requests.Session.request')
+    def test_upload_file_is_cached_under_the_name_sent(self, mock_request):
+        names = []
+
+        def server(method, url, **kwargs):
+            resp = MagicMock()
+            resp.ok = True
+            if 'launchpad' in url:
+                resp.json.return_value = {'access_token': 'tok'}
+            else:
+                names.append(url.split('name=')[1])
+                resp.json.return_value = {'attachable_sgid': f'sgid-{len(names)}'}
+            return resp
+
+        mock_request.side_effect = server
+        attachments = Basecamp(credentials=dict(CREDS)).attachments(upload_cache=UploadCache())
+        with tempfile.TemporaryDirectory() as directory:
+            paths = [os.path.join(directory, name, 'report.txt') for name in ('a', 'b')]
+            for path in paths:
+                os.makedirs(os.path.dirname(path))
+                with open(path, 'wb') as file:
+                    file.write(b'same content')
+
+            self.assertEqual(attachments.upload_file(paths[0], 'report.txt'), 'sgid-1')
+            self.assertEqual(attachments.upload_file(paths[1], 'report.txt'), 'sgid-2')
+            self.assertEqual(attachments.upload_file(paths[0], 'report.txt'), 'sgid-1')
+        self.assertEqual(names, paths)
+
+if __name__ == '__main__':
+    unittest.main()
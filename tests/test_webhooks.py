@@ -0,0 +1,149 @@
+import asyncio
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+import sys
+import types
+
+# Provide minimal stubs for external dependencies
+requests_stub = types.ModuleType('requests')
+requests_stub.post = lambda *args, **kwargs: None
+requests_stub.get = lambda *args, **kwargs: None
+requests_stub.Session = type('Session', (), {
+    'mount': lambda self, *args: None,
+    'request': lambda self, *args, **kwargs: None,
+    'close': lambda self: None,
+})
+requests_adapters_stub = types.ModuleType('requests.adapters')
+requests_adapters_stub.HTTPAdapter = MagicMock
+requests_adapters_stub.Retry = MagicMock
+requests_stub.adapters = requests_adapters_stub
+sys.modules.setdefault('requests', requests_stub)
+sys.modules.setdefault('requests.adapters', requests_adapters_stub)
+
+from basecampapi.cache import MemoryCache
+from basecampapi.mirror import Mirror
+from basecampapi.models import CampfireLine, Comment
+from basecampapi.webhooks import WebhookReceiver, parse_event, stale_urls
+
+ACCOUNT = 'https://3.basecampapi.com/195539477'
+
+
+def payload(kind='comment_created', recording_type='Comment', parent_type='Message'):
+    parents = {'Message': f'{ACCOUNT}/buckets/2085958499/messages/1069479351.json',
+               'Chat::Transcript': f'{ACCOUNT}/buckets/2085958499/chats/1069479345.json'}
+    return json.dumps({
+        'id': 9007199254741001,
+        'kind': kind,
+        'created_at': '2024-05-01T10:00:00.000Z',
+        'creator': {'id': 1049715913, 'name': 'Victor Cooper'},
+        'recording': {
+            'id': 1069479400,
+            'type': recording_type,
+            'status': 'active',
+            'content': '<div>Ship it</div>',
+            'created_at': '2024-05-01T10:00:00.000Z',
+            'updated_at': '2024-05-01T10:00:00.000Z',
+            'url': f'{ACCOUNT}/buckets/2085958499/{"comments" if recording_type == "Comment" else "chats/1069479345/lines"}/1069479400.json',
+            'bucket': {'id': 2085958499, 'name': 'The Leto Laptop', 'type': 'Project'},
+            'parent': {'id': 1069479351, 'type': parent_type, 'url': parents[parent_type]},
+            'creator': {'id': 1049715913, 'name': 'Victor Cooper'},
+        },
+    }).encode()
+
+
+class ParseTestCase(unittest.TestCase):
+    def test_recordings_become_typed_models(self):
+        event = parse_event(payload())
+        self.assertEqual(event.kind, 'comment_created')
+        self.assertEqual(event.project_id, 2085958499)
+        self.assertIsInstance(event.recording, Comment)
+        self.assertEqual(event.recording.parent_id, 1069479351)
+        self.assertEqual(event.creator_name, 'Victor Cooper')
+
+        line = parse_event(payload('chat_line_created', 'Chat::Lines::Text', 'Chat::Transcript'))
+        self.assertIsInstance(line.recording, CampfireLine)
+
+    def test_invalid_payload(self):
+        with self.assertRaises(ValueError):
+            parse_event(b'{"hello": "world"}')
+
+    def test_stale_urls(self):
+        self.assertEqual(stale_urls(json.loads(payload())['recording']), [
+            f'{ACCOUNT}/buckets/2085958499/comments/1069479400.json',
+            f'{ACCOUNT}/buckets/2085958499/recordings/1069479351/comments.json',
+        ])
+        line = json.loads(payload('chat_line_created', 'Chat::Lines::Text', 'Chat::Transcript'))['recording']
+        self.assertEqual(stale_urls(line)[1], f'{ACCOUNT}/buckets/2085958499/chats/1069479345/lines.json')
+
+
+class ReceiverTestCase(unittest.TestCase):
+    def test_secret_and_backpressure(self):
+        receiver = WebhookReceiver(secret='s3cret', queue_size=1, start=False)
+        self.assertEqual(receiver.receive(payload(), token='wrong'), 403)
+        self.assertEqual(receiver.receive(b'not json', token='s3cret'), 400)
+        self.assertEqual(receiver.receive(payload(), token='s3cret'), 200)
+        self.assertEqual(receiver.receive(payload(), token='s3cret'), 503)
+
+    def test_process_updates_cache_mirror_and_handlers(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        mirror = Mirror(os.path.join(directory.name, 'mirror.db'))
+        self.addCleanup(mirror.close)
+        cache = MemoryCache()
+        comments_url = f'{ACCOUNT}/buckets/2085958499/recordings/1069479351/comments.json'
+        cache.set(comments_url, '"etag"', None, b'[]')
+
+        receiver = WebhookReceiver(cache=cache, mirror=mirror)
+        comments, everything = [], []
+        receiver.on('comment_*')(comments.append)
+        receiver.on()(everything.append)
+        receiver.on('message_created')(lambda event: self.fail('wrong kind'))
+
+        self.assertEqual(receiver.receive(payload()), 200)
+        receiver.close()
+
+        self.assertEqual(len(comments), 1)
+        self.assertEqual(len(everything), 1)
+        self.assertIsNone(cache.get(comments_url))
+        self.assertEqual([comment['id'] for comment in mirror.comments(message_id=1069479351)], [1069479400])
+
+    def test_wsgi_app(self):
+        receiver = WebhookReceiver(secret='s3cret', start=False)
+        body = payload()
+        environ = {
+            'REQUEST_METHOD': 'POST', 'QUERY_STRING': 'token=s3cret',
+            'CONTENT_LENGTH': str(len(body)), 'wsgi.input': io.BytesIO(body),
+        }
+        statuses = []
+        reply = receiver(environ, lambda status, headers: statuses.append(status))
+        self.assertEqual(statuses, ['200 OK'])
+        self.assertEqual(json.loads(b''.join(reply)), {'status': 200})
+        self.assertEqual(receiver.events.qsize(), 1)
+
+        receiver({'REQUEST_METHOD': 'GET'}, lambda status, headers: statuses.append(status))
+        self.assertEqual(statuses[-1], '405 Method Not Allowed')
+
+    def test_asgi_app(self):
+        receiver = WebhookReceiver(start=False)
+        body = payload()
+        messages = [{'type': 'http.request', 'body': body[:10], 'more_body': True}, {'type': 'http.request', 'body': body[10:]}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {'type': 'http', 'method': 'POST', 'query_string': b''}
+        asyncio.run(receiver.asgi(scope, receive, send))
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertEqual(receiver.events.get_nowait().kind, 'comment_created')
+
+
+if __name__ == "__main__":
+    unittest.main()